@@ -10,9 +10,19 @@ For GUI automation (wallet popups, browser extensions, etc.)
 
 import argparse
 import json
+import os
 import sys
 import time
 from pathlib import Path
+from typing import Optional
+
+# Optional faster JSON encoder for command output
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -20,12 +30,25 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 from desktop_control.core import DEFAULT_DISPLAY
 from desktop_control import xdotool
 from desktop_control import screenshot as screenshot_module
-from desktop_control import atspi
-from desktop_control import ocr
-from desktop_control.finder import ElementFinder
-from desktop_control.waiter import Waiter, WaitTimeout
 from desktop_control import cache as element_cache
-from desktop_control import annotate
+from desktop_control import daemon
+
+# AT-SPI, OCR, finder, waiter and annotation modules are imported inside
+# the commands that use them, so plain xdotool commands don't pay for
+# loading gi, pytesseract, PIL and numpy.
+
+# Minimum padding (pixels) around an element when OCR-verifying a click
+VERIFY_MIN_MARGIN = 32
+
+# AT-SPI roles whose names are their visible labels, so an exact name
+# match needs no OCR confirmation for click-element --verify
+VERIFY_TRUSTED_ROLES = frozenset({
+    "push button", "toggle button", "check box", "radio button", "menu item", "link"
+})
+
+# zlib level for screenshot-annotated PNGs; these are scratch files, and
+# level 1 encodes several times faster than Pillow's default of 6
+PNG_COMPRESS_LEVEL = 1
 
 
 def cmd_screenshot(args) -> dict:
@@ -70,12 +93,19 @@ def cmd_type(args) -> dict:
     return xdotool.type_text(
         args.text,
         delay=args.type_delay,
-        display=args.display
+        display=args.display,
+        fast=args.fast
     )
 
 
 def cmd_key(args) -> dict:
-    """Press key combination."""
+    """Press key combination or a sequence of them."""
+    if args.seq and args.keys:
+        return {"error": "Use either a key argument or --seq, not both"}
+    if args.seq:
+        return xdotool.keys(args.seq, display=args.display)
+    if not args.keys:
+        return {"error": "key requires a key argument or --seq"}
     return xdotool.key(args.keys, display=args.display)
 
 
@@ -111,6 +141,8 @@ def cmd_windows(args) -> dict:
 
 def cmd_find_element(args) -> dict:
     """Find UI element via AT-SPI with OCR fallback."""
+    from desktop_control.finder import ElementFinder
+
     finder = ElementFinder(display=args.display)
 
     if args.all:
@@ -138,6 +170,8 @@ def cmd_find_element(args) -> dict:
 
 def cmd_find_text(args) -> dict:
     """Find text on screen via OCR."""
+    from desktop_control.finder import ElementFinder
+
     finder = ElementFinder(display=args.display, use_atspi=False)
 
     if args.all:
@@ -162,8 +196,60 @@ def cmd_find_text(args) -> dict:
         return {"error": f"Text not found: '{args.text}'"}
 
 
+def _verify_region(element, screen_size: tuple[int, int]) -> tuple[int, int, int, int]:
+    """
+    Get the area OCR'd by click-element --verify.
+
+    Three times the element's size around its center (at least
+    VERIFY_MIN_MARGIN pixels on each side), clamped to the screen. An
+    element whose area lies entirely off screen (e.g. AT-SPI bounds on
+    another monitor) gets the whole screen.
+
+    Args:
+        element: Element about to be clicked
+        screen_size: Screenshot (width, height)
+
+    Returns:
+        (left, top, right, bottom) crop box
+    """
+    margin_x = max(element.width, VERIFY_MIN_MARGIN)
+    margin_y = max(element.height, VERIFY_MIN_MARGIN)
+    width, height = screen_size
+    left = max(0, element.x - margin_x)
+    top = max(0, element.y - margin_y)
+    right = min(width, element.x + element.width + margin_x)
+    bottom = min(height, element.y + element.height + margin_y)
+    if right <= left or bottom <= top:
+        return (0, 0, width, height)
+    return (left, top, right, bottom)
+
+
+def _atspi_match_is_trusted(element, name: Optional[str], display: str) -> bool:
+    """
+    Check if an AT-SPI match is certain enough to skip OCR verification.
+
+    Requires an exact (case-insensitive) name match on a labelled
+    control whose center is on screen.
+    """
+    from desktop_control.element import ElementSource
+
+    if element.source != ElementSource.ATSPI or not name:
+        return False
+    if name.strip().casefold() != element.name.strip().casefold():
+        return False
+    if element.role_name not in VERIFY_TRUSTED_ROLES:
+        return False
+
+    width, height = xdotool.get_screen_size(display)
+    x, y = element.center
+    return 0 <= x < width and 0 <= y < height
+
+
 def cmd_click_element(args) -> dict:
     """Click element by name/role."""
+    from desktop_control import ocr
+    from desktop_control.finder import ElementFinder
+
     if not args.name and not args.role:
         return {"error": "click-element requires at least one selector: --name or --role"}
 
@@ -194,17 +280,19 @@ def cmd_click_element(args) -> dict:
                 "element": element.to_dict()
             }
 
-        # Take screenshot and verify text is at expected location
-        img = screenshot_module.screenshot_to_pil(args.display)
-        if img:
-            matches = ocr.find_text(img, verify_text)
-            if not matches:
-                return {
-                    "error": "Pre-click verification failed: text not found",
-                    "element": element.to_dict()
-                }
-        else:
-            return {"error": "Pre-click verification failed: screenshot capture failed"}
+        # Take screenshot and verify text is at expected location, unless
+        # AT-SPI already matched a labelled control exactly
+        if not _atspi_match_is_trusted(element, args.name, args.display):
+            img = screenshot_module.screenshot_to_pil(args.display)
+            if img:
+                matches = ocr.find_text(img.crop(_verify_region(element, img.size)), verify_text)
+                if not matches:
+                    return {
+                        "error": "Pre-click verification failed: text not found",
+                        "element": element.to_dict()
+                    }
+            else:
+                return {"error": "Pre-click verification failed: screenshot capture failed"}
 
     # Click at element center
     button = "right" if args.right else "left"
@@ -231,7 +319,12 @@ def cmd_click_element(args) -> dict:
 
 def cmd_wait_for(args) -> dict:
     """Wait for element or text to appear."""
-    waiter = Waiter(display=args.display)
+    from desktop_control.waiter import Waiter, WaitTimeout
+
+    waiter = Waiter(
+        display=args.display,
+        initial_interval=args.poll_interval_min
+    )
 
     if args.text and (args.name or args.role or args.app):
         return {
@@ -288,26 +381,27 @@ def cmd_wait_for(args) -> dict:
 
 def cmd_list_elements(args) -> dict:
     """List interactive elements."""
+    from desktop_control.finder import ElementFinder
+
     finder = ElementFinder(display=args.display)
 
     elements = finder.list_interactive(
         app=args.app,
-        visible_only=not args.include_hidden
+        visible_only=not args.include_hidden,
+        role=args.role,
+        max_results=args.max_results
     )
 
-    # Filter by role if specified
-    if args.role:
-        role_lower = args.role.lower()
-        elements = [e for e in elements if role_lower in e.role_name.lower()]
-
     return {
-        "elements": [e.to_dict() for e in elements[:args.max_results]],
+        "elements": [e.to_dict() for e in elements],
         "count": len(elements)
     }
 
 
 def cmd_status(args) -> dict:
     """Check status of AT-SPI and OCR."""
+    from desktop_control import annotate, atspi, ocr
+
     return {
         "atspi": {
             "available": atspi.is_available(),
@@ -316,87 +410,90 @@ def cmd_status(args) -> dict:
         "ocr": {
             "available": ocr.is_available()
         },
+        "pillow_simd": annotate.is_pillow_simd(),
         "display": args.display
     }
 
 
 def cmd_screenshot_annotated(args) -> dict:
     """Take annotated screenshot with numbered element markers."""
-    from PIL import Image
-    import os
-
-    # Get screen size for cache
-    screen_size = xdotool.get_screen_size(args.display)
-    if screen_size == (0, 0):
-        return {"error": "Failed to get screen dimensions"}
-
-    # Take screenshot
-    img = screenshot_module.screenshot_to_pil(args.display)
-    if img is None:
-        return {"error": "Failed to capture screenshot"}
+    from concurrent.futures import ThreadPoolExecutor
+    from desktop_control import annotate
+    from desktop_control.finder import ElementFinder
 
-    # Find interactive elements
-    finder = ElementFinder(display=args.display)
-    elements = finder.list_interactive(
-        app=args.app,
-        visible_only=not args.include_hidden
-    )
-
-    # Filter by role if specified
-    if args.role:
-        role_lower = args.role.lower()
-        elements = [e for e in elements if role_lower in e.role_name.lower()]
+    output_base = args.output or f"/tmp/screen_{time.time_ns() // 1_000_000_000}"
+    orig_path = f"{output_base}.png"
 
-    # Limit to max results
-    elements = elements[:args.max_elements]
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        # Capture while AT-SPI walks the tree; the walk stays on this
+        # thread since libatspi is not thread-safe
+        capture = pool.submit(screenshot_module.screenshot_to_pil, args.display)
 
-    if not elements:
-        # Still save screenshot even if no elements
-        output_base = args.output or f"/tmp/screen_{int(time.time())}"
-        orig_path = f"{output_base}.png"
-        img.save(orig_path)
-        return {
-            "screenshot_path": orig_path,
-            "annotated_path": orig_path,
-            "original_size": {"width": img.width, "height": img.height},
-            "display_size": {"width": img.width, "height": img.height},
-            "elements": [],
-            "element_count": 0
-        }
+        # Find interactive elements
+        finder = ElementFinder(display=args.display)
+        elements = finder.list_interactive(
+            app=args.app,
+            visible_only=not args.include_hidden,
+            role=args.role,
+            max_results=args.max_elements
+        )
 
-    # Annotate and downsample
-    max_w = args.max_width or 1280
-    max_h = args.max_height or 720
-    _, annotated_img, scale = annotate.annotate_screenshot(
-        img, elements, max_w, max_h
-    )
+        # The screenshot covers the root window, so its size is the
+        # screen size click-id later checks against
+        img = capture.result()
+        if img is None:
+            return {"error": "Failed to capture screenshot"}
+        screen_size = img.size
+        screen_w, screen_h = screen_size
+
+        # Encode the original while annotating
+        orig_saved = pool.submit(img.save, orig_path, compress_level=PNG_COMPRESS_LEVEL)
+
+        if not elements:
+            # Still save screenshot even if no elements
+            orig_saved.result()
+            size = {"width": screen_w, "height": screen_h}
+            return {
+                "screenshot_path": orig_path,
+                "annotated_path": orig_path,
+                "original_size": size,
+                "display_size": dict(size),
+                "elements": [],
+                "element_count": 0
+            }
 
-    # Store elements in cache
-    element_cache.store_elements(elements, screen_size)
+        # Annotate and downsample
+        max_w = args.max_width or 1280
+        max_h = args.max_height or 720
+        _, annotated_img, scale = annotate.annotate_screenshot(
+            img, elements, max_w, max_h
+        )
 
-    # Save images
-    output_base = args.output or f"/tmp/screen_{int(time.time())}"
-    orig_path = f"{output_base}.png"
-    annotated_path = f"{output_base}_annotated.png"
+        # Store elements in cache
+        element_cache.store_elements(elements, screen_size)
 
-    img.save(orig_path)
-    annotated_img.save(annotated_path)
+        # Save images
+        annotated_path = f"{output_base}_annotated.png"
+        annotated_img.save(annotated_path, compress_level=PNG_COMPRESS_LEVEL)
+        orig_saved.result()
 
     # Build element list with IDs and percentage coordinates
+    inv_w = 1.0 / screen_w if screen_w > 0 else 0.0
+    inv_h = 1.0 / screen_h if screen_h > 0 else 0.0
     element_list = []
     for idx, elem in enumerate(elements, start=1):
         elem_dict = elem.to_dict()
         elem_dict["id"] = idx
         # Add percentage coordinates
         cx, cy = elem.center
-        elem_dict["x_percent"] = round(cx / screen_size[0], 4) if screen_size[0] > 0 else 0
-        elem_dict["y_percent"] = round(cy / screen_size[1], 4) if screen_size[1] > 0 else 0
+        elem_dict["x_percent"] = round(cx * inv_w, 4)
+        elem_dict["y_percent"] = round(cy * inv_h, 4)
         element_list.append(elem_dict)
 
     return {
         "screenshot_path": orig_path,
         "annotated_path": annotated_path,
-        "original_size": {"width": img.width, "height": img.height},
+        "original_size": {"width": screen_w, "height": screen_h},
         "display_size": {"width": annotated_img.width, "height": annotated_img.height},
         "scale": round(scale, 4),
         "elements": element_list,
@@ -407,15 +504,16 @@ def cmd_screenshot_annotated(args) -> dict:
 
 def cmd_click_id(args) -> dict:
     """Click cached element by ID."""
-    # Check cache validity
-    if not element_cache.is_cache_valid():
+    # Check cache validity once; the elements are used from this snapshot
+    cache = element_cache.get_cache()
+    cached, valid = cache.snapshot()
+    if not valid:
         return {
             "error": "Element cache expired or empty. Run screenshot-annotated first.",
             "cache_valid": False
         }
 
     # Ensure screen size is unchanged since cache creation.
-    cache = element_cache.get_cache()
     expected_size = cache.screen_size
     current_size = xdotool.get_screen_size(args.display)
     if current_size == (0, 0):
@@ -430,9 +528,8 @@ def cmd_click_id(args) -> dict:
         }
 
     # Get element from cache
-    element = element_cache.get_element(args.element_id)
+    element = cached.get(args.element_id)
     if element is None:
-        cached = element_cache.get_all_elements()
         return {
             "error": f"Element ID {args.element_id} not found in cache",
             "available_ids": list(cached.keys()),
@@ -491,21 +588,23 @@ def cmd_screen_size(args) -> dict:
 def cmd_cache_status(args) -> dict:
     """Get element cache status."""
     cache = element_cache.get_cache()
-    elements = cache.get_all()
+    elements, valid = cache.snapshot()
 
-    element_list = []
-    for eid, elem in elements.items():
-        elem_dict = elem.to_dict()
-        elem_dict["id"] = eid
-        element_list.append(elem_dict)
+    # Only serialize elements when they are shown
+    element_list = None
+    if args.show_elements:
+        element_list = [
+            {**elem.to_dict(), "id": eid}
+            for eid, elem in elements.items()
+        ]
 
     return {
-        "valid": cache.is_valid(),
-        "count": cache.count,
-        "age_seconds": round(cache.age, 2) if cache.is_valid() else None,
+        "valid": valid,
+        "count": len(elements),
+        "age_seconds": round(cache.age, 2) if valid else None,
         "ttl_seconds": element_cache.ElementCache.TTL,
         "screen_size": {"width": cache.screen_size[0], "height": cache.screen_size[1]},
-        "elements": element_list if args.show_elements else None
+        "elements": element_list
     }
 
 
@@ -521,7 +620,50 @@ def cmd_drag(args) -> dict:
     )
 
 
-def main():
+def cmd_daemon(args) -> dict:
+    """Serve commands over a Unix socket until interrupted."""
+    from desktop_control import annotate, atspi, ocr
+
+    # Keep element lists between commands until AT-SPI reports a change
+    atspi.watch_tree_changes()
+    # Load the OCR model and label font now rather than in the first
+    # command that needs them
+    ocr.preload()
+    annotate.preload()
+
+    try:
+        daemon.serve(args.socket, handle_daemon_request)
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        return {"error": f"Daemon failed: {e}"}
+    return {"stopped": True, "socket": args.socket}
+
+
+def write_result(result: dict, compact: bool) -> None:
+    """
+    Write a command result to stdout as JSON.
+
+    Args:
+        result: Command result dict
+        compact: Emit single-line JSON instead of indented output
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        data = orjson.dumps(result, option=option)
+    elif compact:
+        data = json.dumps(result, separators=(",", ":")).encode() + b"\n"
+    else:
+        data = json.dumps(result, indent=2).encode() + b"\n"
+    sys.stdout.flush()
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser for all subcommands."""
     parser = argparse.ArgumentParser(
         description="Desktop control with semantic element targeting"
     )
@@ -536,6 +678,12 @@ def main():
         default=0,
         help="Delay before action (seconds)"
     )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        default=None,
+        help="Single-line JSON output (default when stdout is not a terminal)"
+    )
 
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -543,10 +691,12 @@ def main():
 
     # Screenshot
     p_screenshot = subparsers.add_parser("screenshot", help="Take a screenshot")
+    p_screenshot.set_defaults(handler=cmd_screenshot)
     p_screenshot.add_argument("--output", "-o", help="Output file path")
 
     # Click
     p_click = subparsers.add_parser("click", help="Click at coordinates")
+    p_click.set_defaults(handler=cmd_click)
     p_click.add_argument("x", type=int, nargs="?", default=0, help="X coordinate (pixels)")
     p_click.add_argument("y", type=int, nargs="?", default=0, help="Y coordinate (pixels)")
     p_click.add_argument("--x-percent", type=float, help="X as fraction 0.0-1.0 (overrides x)")
@@ -557,34 +707,47 @@ def main():
 
     # Type
     p_type = subparsers.add_parser("type", help="Type text")
+    p_type.set_defaults(handler=cmd_type)
     p_type.add_argument("text", help="Text to type")
     p_type.add_argument("--type-delay", type=int, default=12, help="Keystroke delay (ms)")
+    p_type.add_argument(
+        "--fast", action="store_true", help="No delay between keystrokes"
+    )
 
     # Key
     p_key = subparsers.add_parser("key", help="Press key combination")
-    p_key.add_argument("keys", help="Key(s) to press (e.g., 'Return', 'ctrl+a')")
+    p_key.set_defaults(handler=cmd_key)
+    p_key.add_argument("keys", nargs="?", help="Key(s) to press (e.g., 'Return', 'ctrl+a')")
+    p_key.add_argument(
+        "--seq",
+        nargs="+",
+        help="Press several keys in order in one call (e.g., --seq Tab Tab Return)"
+    )
 
     # Move
     p_move = subparsers.add_parser("move", help="Move mouse")
+    p_move.set_defaults(handler=cmd_move)
     p_move.add_argument("x", type=int, help="X coordinate")
     p_move.add_argument("y", type=int, help="Y coordinate")
 
     # Active window
-    subparsers.add_parser("active", help="Get active window info")
+    subparsers.add_parser("active", help="Get active window info").set_defaults(handler=cmd_active)
 
     # Find window (renamed from 'find' to avoid conflict)
     p_find_window = subparsers.add_parser("find-window", help="Find windows by name")
+    p_find_window.set_defaults(handler=cmd_find_window)
     p_find_window.add_argument("name", help="Window name to search")
 
     # Focus window
     p_focus = subparsers.add_parser("focus", help="Focus window by name")
+    p_focus.set_defaults(handler=cmd_focus)
     p_focus.add_argument("name", help="Window name to focus")
 
     # Mouse position
-    subparsers.add_parser("position", help="Get mouse position")
+    subparsers.add_parser("position", help="Get mouse position").set_defaults(handler=cmd_position)
 
     # List windows
-    subparsers.add_parser("windows", help="List all windows")
+    subparsers.add_parser("windows", help="List all windows").set_defaults(handler=cmd_windows)
 
     # ===== New semantic commands =====
 
@@ -593,6 +756,7 @@ def main():
         "find-element",
         help="Find UI element via AT-SPI with OCR fallback"
     )
+    p_find_elem.set_defaults(handler=cmd_find_element)
     p_find_elem.add_argument("--name", "-n", help="Element name/text to find")
     p_find_elem.add_argument("--role", "-r", help="Element role (button, entry, etc.)")
     p_find_elem.add_argument("--app", "-a", help="Application name filter")
@@ -605,6 +769,7 @@ def main():
         "find-text",
         help="Find text on screen via OCR"
     )
+    p_find_text.set_defaults(handler=cmd_find_text)
     p_find_text.add_argument("text", help="Text to find")
     p_find_text.add_argument("--exact", action="store_true", help="Exact match")
     p_find_text.add_argument("--case-sensitive", action="store_true", help="Case sensitive")
@@ -616,6 +781,7 @@ def main():
         "click-element",
         help="Click element by name/role"
     )
+    p_click_elem.set_defaults(handler=cmd_click_element)
     p_click_elem.add_argument("--name", "-n", help="Element name/text")
     p_click_elem.add_argument("--role", "-r", help="Element role")
     p_click_elem.add_argument("--app", "-a", help="Application name filter")
@@ -628,6 +794,7 @@ def main():
         "wait-for",
         help="Wait for element or text to appear"
     )
+    p_wait.set_defaults(handler=cmd_wait_for)
     p_wait.add_argument("--name", "-n", help="Element name (AT-SPI + OCR)")
     p_wait.add_argument("--role", "-r", help="Element role (AT-SPI only)")
     p_wait.add_argument("--app", "-a", help="Application name filter")
@@ -635,19 +802,26 @@ def main():
     p_wait.add_argument("--exact", action="store_true", help="Exact text match")
     p_wait.add_argument("--gone", action="store_true", help="Wait until element/text disappears")
     p_wait.add_argument("--timeout", type=float, default=30.0, help="Timeout in seconds")
+    p_wait.add_argument(
+        "--poll-interval-min",
+        type=float,
+        default=0.05,
+        help="Poll interval in seconds after the initial burst (backs off to 0.5)"
+    )
 
     # List elements
     p_list = subparsers.add_parser(
         "list-elements",
         help="List interactive elements"
     )
+    p_list.set_defaults(handler=cmd_list_elements)
     p_list.add_argument("--app", "-a", help="Application name filter")
     p_list.add_argument("--role", "-r", help="Filter by role")
     p_list.add_argument("--include-hidden", action="store_true", help="Include hidden elements")
     p_list.add_argument("--max-results", type=int, default=100, help="Max results")
 
     # Status check
-    subparsers.add_parser("status", help="Check AT-SPI and OCR status")
+    subparsers.add_parser("status", help="Check AT-SPI and OCR status").set_defaults(handler=cmd_status)
 
     # ===== New annotated screenshot commands =====
 
@@ -656,6 +830,7 @@ def main():
         "screenshot-annotated",
         help="Take annotated screenshot with numbered element markers"
     )
+    p_screenshot_annotated.set_defaults(handler=cmd_screenshot_annotated)
     p_screenshot_annotated.add_argument("--output", "-o", help="Output file path (without extension)")
     p_screenshot_annotated.add_argument("--app", "-a", help="Application name filter")
     p_screenshot_annotated.add_argument("--role", "-r", help="Filter by role")
@@ -669,6 +844,7 @@ def main():
         "click-id",
         help="Click cached element by ID"
     )
+    p_click_id.set_defaults(handler=cmd_click_id)
     p_click_id.add_argument("element_id", type=int, help="Element ID from screenshot-annotated")
     p_click_id.add_argument("--right", action="store_true", help="Right click")
     p_click_id.add_argument("--double", action="store_true", help="Double click")
@@ -678,6 +854,7 @@ def main():
         "click-percent",
         help="Click at percentage-based coordinates"
     )
+    p_click_percent.set_defaults(handler=cmd_click_percent)
     p_click_percent.add_argument("x_percent", type=float, help="X as fraction 0.0-1.0")
     p_click_percent.add_argument("y_percent", type=float, help="Y as fraction 0.0-1.0")
     p_click_percent.add_argument("--right", action="store_true", help="Right click")
@@ -685,61 +862,183 @@ def main():
     p_click_percent.add_argument("--double", action="store_true", help="Double click")
 
     # Screen size
-    subparsers.add_parser("screen-size", help="Get screen dimensions")
+    subparsers.add_parser("screen-size", help="Get screen dimensions").set_defaults(handler=cmd_screen_size)
 
     # Cache status
     p_cache = subparsers.add_parser("cache-status", help="Get element cache status")
+    p_cache.set_defaults(handler=cmd_cache_status)
     p_cache.add_argument("--show-elements", action="store_true", help="Include element details")
 
     # Drag
     p_drag = subparsers.add_parser("drag", help="Drag from one position to another")
+    p_drag.set_defaults(handler=cmd_drag)
     p_drag.add_argument("start_x", type=int, help="Start X coordinate")
     p_drag.add_argument("start_y", type=int, help="Start Y coordinate")
     p_drag.add_argument("end_x", type=int, help="End X coordinate")
     p_drag.add_argument("end_y", type=int, help="End Y coordinate")
     p_drag.add_argument("--right", action="store_true", help="Right drag")
 
-    # Parse arguments
-    args = parser.parse_args()
+    # Daemon
+    p_daemon = subparsers.add_parser(
+        "daemon",
+        help=f"Serve commands over a Unix socket (clients use ${daemon.SOCKET_ENV})"
+    )
+    p_daemon.set_defaults(handler=cmd_daemon)
+    p_daemon.add_argument(
+        "--socket",
+        default=daemon.default_socket_path(),
+        help=f"Socket path (default: ${daemon.SOCKET_ENV}, else $XDG_RUNTIME_DIR/desktop-control.sock)"
+    )
+
+    return parser
+
+
+# Hot commands parsed without building the full parser: handler, the
+# subcommand's option defaults, and (name, type) for each positional.
+# Must stay in sync with build_parser().
+_FAST_COMMANDS = {
+    "click": (
+        cmd_click,
+        {"x_percent": None, "y_percent": None, "right": False,
+         "middle": False, "double": False},
+        (("x", int), ("y", int)),
+    ),
+    "move": (cmd_move, {}, (("x", int), ("y", int))),
+    "key": (cmd_key, {"seq": None}, (("keys", str),)),
+    "type": (cmd_type, {"type_delay": 12, "fast": False}, (("text", str),)),
+    "screen-size": (cmd_screen_size, {}, ()),
+    "position": (cmd_position, {}, ()),
+    "active": (cmd_active, {}, ()),
+    "windows": (cmd_windows, {}, ()),
+}
+
+
+def parse_fast_args(argv: list[str]) -> Optional[argparse.Namespace]:
+    """
+    Parse plain "click X Y", "move X Y", "key KEYS" and "type TEXT" calls,
+    and the option-less screen-size, position, active and windows.
+
+    Building the full parser costs more than most xdotool commands, so
+    these common forms skip it. Anything else, including any option,
+    returns None and is left to argparse.
+
+    Args:
+        argv: Command-line arguments without the program name
+
+    Returns:
+        Parsed arguments, or None if argparse must handle them
+    """
+    if not argv or argv[0] not in _FAST_COMMANDS:
+        return None
+
+    handler, defaults, positionals = _FAST_COMMANDS[argv[0]]
+    values = argv[1:]
+    if len(values) != len(positionals):
+        return None
+    if any(value.startswith("-") for value in values):
+        return None
+
+    try:
+        parsed = {
+            name: convert(value)
+            for (name, convert), value in zip(positionals, values)
+        }
+    except ValueError:
+        return None
+
+    return argparse.Namespace(
+        display=DEFAULT_DISPLAY,
+        delay=0,
+        compact=None,
+        command=argv[0],
+        handler=handler,
+        **defaults,
+        **parsed
+    )
+
+
+_daemon_parser: Optional[argparse.ArgumentParser] = None
+
+
+def handle_daemon_request(argv: list[str], tty: bool) -> dict:
+    """
+    Parse and run one command inside the daemon.
+
+    Args:
+        argv: Client's command-line arguments without the program name
+        tty: Whether the client's stdout is a terminal
+
+    Returns:
+        Reply dict with the command "result" and whether the client
+        should print it "compact"
+    """
+    import contextlib
+    import io
+
+    global _daemon_parser
+
+    args = parse_fast_args(argv)
+    if args is None:
+        if _daemon_parser is None:
+            _daemon_parser = build_parser()
+        usage = io.StringIO()
+        try:
+            with contextlib.redirect_stderr(usage):
+                args = _daemon_parser.parse_args(argv)
+        except SystemExit:
+            return {"result": {"error": usage.getvalue().strip() or "Invalid arguments"}}
+
+    if args.command == "daemon":
+        return {"result": {"error": "Daemon is already running"}}
 
-    # Apply delay if specified
     if args.delay > 0:
         time.sleep(args.delay)
 
-    # Command dispatch
-    commands = {
-        "screenshot": cmd_screenshot,
-        "click": cmd_click,
-        "type": cmd_type,
-        "key": cmd_key,
-        "move": cmd_move,
-        "active": cmd_active,
-        "find-window": cmd_find_window,
-        "focus": cmd_focus,
-        "position": cmd_position,
-        "windows": cmd_windows,
-        "find-element": cmd_find_element,
-        "find-text": cmd_find_text,
-        "click-element": cmd_click_element,
-        "wait-for": cmd_wait_for,
-        "list-elements": cmd_list_elements,
-        "status": cmd_status,
-        # New annotated screenshot commands
-        "screenshot-annotated": cmd_screenshot_annotated,
-        "click-id": cmd_click_id,
-        "click-percent": cmd_click_percent,
-        "screen-size": cmd_screen_size,
-        "cache-status": cmd_cache_status,
-        "drag": cmd_drag,
+    # The daemon outlives resolution changes, and click-id checks cached
+    # element maps against the screen size, so read it afresh per request
+    xdotool.invalidate_screen_size()
+    result = args.handler(args)
+    return {
+        "result": result,
+        "compact": args.compact if args.compact is not None else not tty
     }
 
-    handler = commands.get(args.command)
-    if handler:
-        result = handler(args)
+
+def _run_in_daemon(argv: list[str]) -> Optional[dict]:
+    """
+    Send the command to a running daemon, if $DESKTOP_CTL_SOCK names one.
+
+    Returns:
+        Daemon reply, or None to run the command in this process
+    """
+    socket_path = os.environ.get(daemon.SOCKET_ENV)
+    if not socket_path or not argv or argv[0] == "daemon":
+        return None
+    # Help is printed by argparse directly, so keep it local
+    if "-h" in argv or "--help" in argv:
+        return None
+    return daemon.request(argv, sys.stdout.isatty(), socket_path)
+
+
+def main():
+    argv = sys.argv[1:]
+
+    reply = _run_in_daemon(argv)
+    if reply is not None:
+        result = reply["result"]
+        compact = reply.get("compact", not sys.stdout.isatty())
     else:
-        result = {"error": f"Unknown command: {args.command}"}
+        # Parse arguments
+        args = parse_fast_args(argv) or build_parser().parse_args(argv)
+
+        # Apply delay if specified
+        if args.delay > 0:
+            time.sleep(args.delay)
+
+        result = args.handler(args)
+        compact = args.compact if args.compact is not None else not sys.stdout.isatty()
 
-    print(json.dumps(result, indent=2))
+    write_result(result, compact)
     sys.exit(0 if "error" not in result else 1)
 
 
@@ -6,8 +6,18 @@ with xdotool for mouse/keyboard control.
 """
 
 from .element import Element
-from .finder import ElementFinder
-from .waiter import Waiter
 
 __version__ = "2.0.0"
 __all__ = ["Element", "ElementFinder", "Waiter"]
+
+
+def __getattr__(name):
+    # Loaded on first use, since finder and waiter import the AT-SPI and
+    # OCR stacks that xdotool-only callers never need
+    if name == "ElementFinder":
+        from .finder import ElementFinder
+        return ElementFinder
+    if name == "Waiter":
+        from .waiter import Waiter
+        return Waiter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
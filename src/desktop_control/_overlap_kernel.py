@@ -0,0 +1,46 @@
+"""
+Numba-compiled box overlap test for large AT-SPI/OCR merges.
+
+Importing this module raises ImportError when numba isn't installed;
+element.py then uses its NumPy broadcast instead. The kernel is compiled
+on first use and cached on disk (cache=True), so later processes skip
+compilation.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(parallel=True, cache=True)
+def covered_mask(boxes, candidates, threshold):
+    """
+    For each candidate box, check if it overlaps any box.
+
+    Same test as element._boxes_overlap, fused into one loop so no
+    (N, M) temporaries are allocated.
+
+    Args:
+        boxes: (N, 4) int64 array of x, y, width, height
+        candidates: (M, 4) int64 array of x, y, width, height
+        threshold: Minimum intersection over the smaller box's area
+
+    Returns:
+        (M,) bool array, True where the candidate overlaps some box
+    """
+    n = boxes.shape[0]
+    m = candidates.shape[0]
+    covered = np.zeros(m, np.bool_)
+    for j in prange(m):
+        cx, cy, cw, ch = candidates[j, 0], candidates[j, 1], candidates[j, 2], candidates[j, 3]
+        candidate_area = cw * ch
+        for i in range(n):
+            bx, by, bw, bh = boxes[i, 0], boxes[i, 1], boxes[i, 2], boxes[i, 3]
+            inter_w = min(bx + bw, cx + cw) - max(bx, cx)
+            inter_h = min(by + bh, cy + ch) - max(by, cy)
+            if inter_w <= 0 or inter_h <= 0:
+                continue
+            smaller_area = min(bw * bh, candidate_area)
+            if smaller_area > 0 and (inter_w * inter_h) / smaller_area >= threshold:
+                covered[j] = True
+                break
+    return covered
@@ -0,0 +1,57 @@
+"""
+Numba-compiled adaptive threshold for OCR preprocessing without OpenCV.
+
+Importing this module raises ImportError when numba isn't installed;
+ocr.py then leaves the grayscale image unthresholded. The kernel is
+compiled on first use and cached on disk (cache=True), so later
+processes skip compilation.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(parallel=True, cache=True)
+def mean_threshold(gray, block, c):
+    """
+    Binarize a grayscale image against the mean of each pixel's block.
+
+    Same rule as cv2.adaptiveThreshold with ADAPTIVE_THRESH_MEAN_C and
+    THRESH_BINARY: 255 where the pixel exceeds its local mean minus c,
+    else 0. Like OpenCV, the image is extended past its edges by
+    repeating the edge pixels (BORDER_REPLICATE), so every block has
+    block * block pixels. Local sums come from an integral image of the
+    extended image, so the cost doesn't depend on block size.
+
+    Args:
+        gray: (H, W) uint8 array
+        block: Odd block size in pixels
+        c: Constant subtracted from the mean
+
+    Returns:
+        (H, W) uint8 array of 0 and 255
+    """
+    h, w = gray.shape
+    radius = block // 2
+    # Integral image of gray padded by radius on each side, with the
+    # padding read from the nearest edge pixel
+    integral = np.zeros((h + 2 * radius + 1, w + 2 * radius + 1), np.int64)
+    for py in range(h + 2 * radius):
+        y = min(max(py - radius, 0), h - 1)
+        row_sum = 0
+        for px in range(w + 2 * radius):
+            x = min(max(px - radius, 0), w - 1)
+            row_sum += np.int64(gray[y, x])
+            integral[py + 1, px + 1] = integral[py, px + 1] + row_sum
+
+    count = block * block
+    out = np.empty((h, w), np.uint8)
+    for y in prange(h):
+        # Pixel (y, x)'s block starts at (y, x) in the padded image
+        y1 = y + block
+        for x in range(w):
+            x1 = x + block
+            total = integral[y1, x1] - integral[y, x1] - integral[y1, x] + integral[y, x]
+            # pixel > total / count - c, kept in integers
+            out[y, x] = 255 if np.int64(gray[y, x]) * count > total - c * count else 0
+    return out
@@ -4,18 +4,53 @@ Screenshot annotation and downsampling.
 Provides functions to:
 - Downsample screenshots for faster LLM processing
 - Annotate screenshots with numbered element markers
+
+Resizing is the expensive part. Installing Pillow-SIMD in place of
+Pillow (pip uninstall pillow && pip install pillow-simd) speeds it up
+several times with no code changes; it is detected at runtime and keeps
+LANCZOS for every ratio.
 """
 
-from typing import Optional, TYPE_CHECKING
+import functools
+from typing import Optional
+
+# Imported up front: this module is only loaded by commands that draw
+try:
+    import PIL
+    from PIL import Image, ImageDraw, ImageFont
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Label fonts, in order of preference
+FONT_PATHS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/freefont/FreeSansBold.ttf",
+)
+
+DIGITS = "0123456789"
+
+# Below this scale, plain Pillow downsamples with BICUBIC instead of
+# LANCZOS: the difference isn't visible after such a reduction, but the
+# wider LANCZOS kernel costs noticeably more
+BICUBIC_BELOW_SCALE = 0.5
 
-if TYPE_CHECKING:
-    from PIL import Image
+
+@functools.lru_cache(maxsize=None)
+def is_pillow_simd() -> bool:
+    """Check if the installed Pillow is the Pillow-SIMD build."""
+    if not PIL_AVAILABLE:
+        return False
+    # Pillow-SIMD releases carry a .postN suffix (e.g. 9.0.0.post1)
+    return ".post" in PIL.__version__
 
 
 def downsample_image(
     img: "Image.Image",
     max_width: int = 1280,
-    max_height: int = 720
+    max_height: int = 720,
+    resample: Optional[int] = None,
+    draft: bool = False
 ) -> tuple["Image.Image", float]:
     """
     Downsample an image while maintaining aspect ratio.
@@ -26,6 +61,13 @@ def downsample_image(
         img: PIL Image to downsample
         max_width: Maximum width in pixels
         max_height: Maximum height in pixels
+        resample: Pillow resampling filter. Defaults to LANCZOS, or
+                  BICUBIC when shrinking below BICUBIC_BELOW_SCALE without
+                  Pillow-SIMD. BILINEAR is faster still where quality
+                  matters less.
+        draft: For a JPEG that hasn't been decoded yet, let the decoder
+               shrink by 1/2, 1/4 or 1/8 while decoding. This changes img
+               itself, so only use it when the full-size image isn't needed.
 
     Returns:
         Tuple of (downsampled image, scale factor)
@@ -47,13 +89,99 @@ def downsample_image(
     new_width = int(orig_width * scale)
     new_height = int(orig_height * scale)
 
-    # Use LANCZOS for high-quality downsampling
-    from PIL import Image as PILImage
-    downsampled = img.resize((new_width, new_height), PILImage.Resampling.LANCZOS)
+    if resample is None:
+        if scale < BICUBIC_BELOW_SCALE and not is_pillow_simd():
+            resample = Image.Resampling.BICUBIC
+        else:
+            resample = Image.Resampling.LANCZOS
+
+    if draft:
+        # No-op for anything but a not-yet-loaded JPEG; the decoder never
+        # goes below the requested size
+        img.draft(img.mode, (new_width, new_height))
+        if img.size == (new_width, new_height):
+            return img, scale
+
+    # reducing_gap first shrinks by an integer factor with a cheap box
+    # filter, which is much faster on large screens and visually
+    # indistinguishable at a gap of 3.
+    downsampled = img.resize((new_width, new_height), resample, reducing_gap=3.0)
 
     return downsampled, scale
 
 
+@functools.lru_cache(maxsize=16)
+def _load_font(size: int) -> "ImageFont.ImageFont":
+    """Load the label font at a size, falling back to Pillow's default."""
+    for path in FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def _digit_widths(draw: "ImageDraw.ImageDraw", font) -> dict[str, float]:
+    """Get the advance width of each decimal digit in a font."""
+    try:
+        return {c: font.getlength(c) for c in DIGITS}
+    except AttributeError:
+        # Bitmap fonts on Pillow < 9.2 have no getlength
+        return {c: draw.textbbox((0, 0), c, font=font)[2] for c in DIGITS}
+
+
+def _marker_centers(
+    elements: list,
+    scale: float,
+    margin: int,
+    img_width: int,
+    img_height: int
+) -> list[tuple[int, int]]:
+    """
+    Scale element centers to the image and keep them margin px inside it.
+
+    Uses one vectorized pass when numpy is installed; results are the
+    same either way.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return [
+            (
+                max(margin, min(int(cx * scale), img_width - margin)),
+                max(margin, min(int(cy * scale), img_height - margin)),
+            )
+            for cx, cy in (element.center for element in elements)
+        ]
+
+    if not elements:
+        return []
+    centers = np.array([element.center for element in elements], dtype=np.float64)
+    # astype truncates toward zero, like int()
+    centers = (centers * scale).astype(np.int64)
+    # min then max, so the lower bound wins on images narrower than 2 * margin
+    centers = np.maximum(np.minimum(centers, [img_width - margin, img_height - margin]), margin)
+    return [tuple(center) for center in centers.tolist()]
+
+
+def preload(font_size: int = 14) -> bool:
+    """
+    Load the label font ahead of the first annotation.
+
+    Meant for long-running processes (the daemon).
+
+    Args:
+        font_size: Label font size to load (annotate_elements' default)
+
+    Returns:
+        True if Pillow is available and the font is loaded
+    """
+    if not PIL_AVAILABLE:
+        return False
+    _load_font(font_size)
+    return True
+
+
 def annotate_elements(
     img: "Image.Image",
     elements: list,
@@ -61,7 +189,8 @@ def annotate_elements(
     circle_radius: int = 12,
     circle_color: str = "red",
     text_color: str = "white",
-    font_size: int = 14
+    font_size: int = 14,
+    copy: bool = True
 ) -> "Image.Image":
     """
     Annotate an image with numbered element markers.
@@ -76,36 +205,27 @@ def annotate_elements(
         circle_color: Color of the marker circles
         text_color: Color of the ID numbers
         font_size: Size of the ID numbers
+        copy: Draw on a copy; pass False to draw on img itself when the
+              caller owns it
 
     Returns:
-        Annotated copy of the image
+        Annotated image (a copy unless copy is False)
     """
-    from PIL import ImageDraw, ImageFont
-
     # Create a copy to avoid modifying the original
-    annotated = img.copy()
+    annotated = img.copy() if copy else img
     draw = ImageDraw.Draw(annotated)
 
-    # Try to load a font, fall back to default
-    try:
-        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", font_size)
-    except (OSError, IOError):
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/freefont/FreeSansBold.ttf", font_size)
-        except (OSError, IOError):
-            font = ImageFont.load_default()
+    font = _load_font(font_size)
+    img_width, img_height = annotated.size
 
-    for idx, element in enumerate(elements, start=1):
-        # Get element center, applying scale factor
-        cx, cy = element.center
-        cx = int(cx * scale)
-        cy = int(cy * scale)
+    # Labels are only digits, so measure each digit once and sum per label
+    digit_widths = _digit_widths(draw, font)
+    digits_bbox = draw.textbbox((0, 0), DIGITS, font=font)
+    text_height = digits_bbox[3] - digits_bbox[1]
 
-        # Ensure coordinates are within image bounds
-        img_width, img_height = img.size
-        cx = max(circle_radius, min(cx, img_width - circle_radius))
-        cy = max(circle_radius, min(cy, img_height - circle_radius))
+    centers = _marker_centers(elements, scale, circle_radius, img_width, img_height)
 
+    for idx, (cx, cy) in enumerate(centers, start=1):
         # Draw circle
         bbox = [
             cx - circle_radius,
@@ -118,10 +238,7 @@ def annotate_elements(
         # Draw ID number centered in circle
         id_text = str(idx)
 
-        # Get text bounding box for centering
-        text_bbox = draw.textbbox((0, 0), id_text, font=font)
-        text_width = text_bbox[2] - text_bbox[0]
-        text_height = text_bbox[3] - text_bbox[1]
+        text_width = int(sum(digit_widths[c] for c in id_text))
 
         text_x = cx - text_width // 2
         text_y = cy - text_height // 2 - 1  # Small adjustment for visual centering
@@ -152,7 +269,7 @@ def annotate_screenshot(
     # Downsample
     downsampled, scale = downsample_image(img, max_width, max_height)
 
-    # Annotate
-    annotated = annotate_elements(downsampled, elements, scale)
+    # Annotate; a downsampled image is already a fresh copy
+    annotated = annotate_elements(downsampled, elements, scale, copy=downsampled is img)
 
     return img, annotated, scale
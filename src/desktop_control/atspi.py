@@ -1,26 +1,63 @@
 """
 AT-SPI accessibility tree integration.
 
-Uses pyatspi to traverse the accessibility tree and find UI elements
-by name, role, and state.
+Uses libatspi (through gi's Atspi bindings) to traverse the accessibility
+tree and find UI elements by name, role, and state.
+
+libatspi owns the D-Bus connections, including direct peer-to-peer
+connections to applications that offer them on recent at-spi2-core, and
+caches name, role, states and children on the client side. Its objects
+are not thread-safe, so the tree is always walked from a single thread.
+
+A long-running process can call watch_tree_changes() to also cache
+list_interactive_elements() results until AT-SPI reports a change, and
+wait_for_tree_change() to block until the next one.
 """
 
 import os
+import time
 from dataclasses import dataclass, field
 from typing import Optional, Generator, Callable
 
+from .core import DATACLASS_SLOTS, clear_env_cache
+from .screenshot import input_generation
+
 # AT-SPI imports - these require python3-pyatspi package
 try:
     import gi
     gi.require_version('Atspi', '2.0')
-    from gi.repository import Atspi
+    from gi.repository import Atspi, GLib
     ATSPI_AVAILABLE = True
 except (ImportError, ValueError):
     ATSPI_AVAILABLE = False
     Atspi = None
+    GLib = None
+
+# Events that drop cached interactive-element lists
+TREE_CHANGE_EVENTS = (
+    "object:children-changed",
+    "object:state-changed",
+    "object:bounds-changed",
+    "object:property-change:accessible-name",
+    "window:",
+    "document:load-complete",
+)
+
+# Safety net for missed events, in seconds
+TREE_CACHE_TTL = 60.0
+
+# Listener for TREE_CHANGE_EVENTS; the tree cache is only used while set
+_tree_listener = None
+
+# Bumped by every TREE_CHANGE_EVENTS event while watched
+_tree_generation = 0
 
+# (app, visible_only, role, max_results) ->
+#     (monotonic time, input generation, elements)
+_tree_cache: dict[tuple, tuple[float, int, list]] = {}
 
-@dataclass
+
+@dataclass(**DATACLASS_SLOTS)
 class ATSPIElement:
     """Represents an element from the AT-SPI accessibility tree."""
     name: str
@@ -83,35 +120,43 @@ def is_available() -> bool:
     return ATSPI_AVAILABLE
 
 
+# States reported in ATSPIElement.states, in order: (name, StateType name)
+STATE_NAMES = (
+    ("visible", "VISIBLE"),
+    ("showing", "SHOWING"),
+    ("enabled", "ENABLED"),
+    ("sensitive", "SENSITIVE"),
+    ("focusable", "FOCUSABLE"),
+    ("focused", "FOCUSED"),
+    ("checked", "CHECKED"),
+    ("pressed", "PRESSED"),
+    ("selected", "SELECTED"),
+    ("editable", "EDITABLE"),
+    ("expandable", "EXPANDABLE"),
+    ("expanded", "EXPANDED"),
+)
+
+# (name, Atspi.StateType) pairs, resolved on first use
+_state_types: Optional[list] = None
+
+
 def _get_element_states(accessible) -> list[str]:
     """Extract state names from an accessible object."""
+    global _state_types
     if not ATSPI_AVAILABLE:
         return []
 
-    states = []
     try:
-        state_set = accessible.get_state_set()
-        # Check common states
-        state_names = [
-            ("visible", Atspi.StateType.VISIBLE),
-            ("showing", Atspi.StateType.SHOWING),
-            ("enabled", Atspi.StateType.ENABLED),
-            ("sensitive", Atspi.StateType.SENSITIVE),
-            ("focusable", Atspi.StateType.FOCUSABLE),
-            ("focused", Atspi.StateType.FOCUSED),
-            ("checked", Atspi.StateType.CHECKED),
-            ("pressed", Atspi.StateType.PRESSED),
-            ("selected", Atspi.StateType.SELECTED),
-            ("editable", Atspi.StateType.EDITABLE),
-            ("expandable", Atspi.StateType.EXPANDABLE),
-            ("expanded", Atspi.StateType.EXPANDED),
-        ]
-        for name, state_type in state_names:
-            if state_set.contains(state_type):
-                states.append(name)
+        if _state_types is None:
+            _state_types = [
+                (name, getattr(Atspi.StateType, attr)) for name, attr in STATE_NAMES
+            ]
+        # One get_states() call decoded locally rather than a contains()
+        # call per state
+        present = set(accessible.get_state_set().get_states())
+        return [name for name, state_type in _state_types if state_type in present]
     except Exception:
-        pass
-    return states
+        return []
 
 
 def _get_element_actions(accessible) -> list[str]:
@@ -133,6 +178,21 @@ def _get_element_actions(accessible) -> list[str]:
     return list(dict.fromkeys(actions))
 
 
+def _has_action_iface(accessible) -> bool:
+    """
+    Check if an accessible implements the Action interface.
+
+    libatspi answers from the interface list it caches per object, so
+    unlike reading actions or bounds this usually needs no D-Bus call.
+    Errors count as True, so callers only ever skip nodes that certainly
+    have no actions.
+    """
+    try:
+        return accessible.get_action_iface() is not None
+    except Exception:
+        return True
+
+
 def _get_element_bounds(accessible) -> tuple[int, int, int, int]:
     """Get element bounds (x, y, width, height) in desktop coordinates."""
     if not ATSPI_AVAILABLE:
@@ -148,43 +208,173 @@ def _get_element_bounds(accessible) -> tuple[int, int, int, int]:
     return (0, 0, 0, 0)
 
 
+def _is_hidden_subtree(accessible) -> bool:
+    """
+    Check if an accessible is defunct, or hidden and without screen area.
+
+    SHOWING implies every ancestor is showing, but some toolkits leave
+    VISIBLE or SHOWING unset on containers whose children are on screen,
+    so a node missing either only counts as hidden if its bounds are
+    empty too. The bounds cost a D-Bus call, so they are only fetched
+    for such nodes.
+    """
+    try:
+        state_set = accessible.get_state_set()
+        if state_set.contains(Atspi.StateType.DEFUNCT):
+            return True
+        if (
+            state_set.contains(Atspi.StateType.VISIBLE)
+            and state_set.contains(Atspi.StateType.SHOWING)
+        ):
+            return False
+    except Exception:
+        return False
+    _, _, width, height = _get_element_bounds(accessible)
+    return width <= 0 or height <= 0
+
+
 def _accessible_to_element(
     accessible,
     app_name: str = "",
-    path: str = ""
+    path: str = "",
+    role_name: Optional[str] = None,
+    prefilter_fn: Optional[Callable[[ATSPIElement], bool]] = None
 ) -> Optional[ATSPIElement]:
-    """Convert an Atspi accessible object to ATSPIElement."""
+    """
+    Convert an Atspi accessible object to ATSPIElement.
+
+    Properties libatspi caches client-side (name, role, description,
+    states) are read first. Bounds and actions need D-Bus round-trips
+    (one per action name), so they are only fetched once prefilter_fn,
+    which sees the element without them, accepts it. Callers that
+    already fetched the role name pass it in.
+
+    Past the prefilter nothing is made lazy: every accepted element is
+    serialized (to_dict) or copied into an Element, both of which read
+    states, bounds and actions, and fetching them later would mean
+    keeping live accessibles alive in the element caches.
+
+    Returns:
+        ATSPIElement, or None on error or if prefilter_fn rejected it
+    """
     if not ATSPI_AVAILABLE or accessible is None:
         return None
 
     try:
         name = accessible.get_name() or ""
         role = accessible.get_role()
-        role_name = accessible.get_role_name() or ""
+        if role_name is None:
+            role_name = accessible.get_role_name() or ""
         description = accessible.get_description() or ""
-
-        x, y, w, h = _get_element_bounds(accessible)
         states = _get_element_states(accessible)
-        actions = _get_element_actions(accessible)
 
-        return ATSPIElement(
+        elem = ATSPIElement(
             name=name,
             role=str(role),
             role_name=role_name,
             description=description,
-            x=x,
-            y=y,
-            width=w,
-            height=h,
+            x=0,
+            y=0,
+            width=0,
+            height=0,
             states=states,
-            actions=actions,
             app_name=app_name,
             path=path
         )
+        if prefilter_fn is not None and not prefilter_fn(elem):
+            return None
+
+        elem.x, elem.y, elem.width, elem.height = _get_element_bounds(accessible)
+        elem.actions = _get_element_actions(accessible)
+        return elem
     except Exception:
         return None
 
 
+def _on_tree_change(event) -> None:
+    """Drop cached element lists when the accessibility tree changes."""
+    global _tree_generation
+    _tree_cache.clear()
+    _tree_generation += 1
+
+
+def watch_tree_changes() -> bool:
+    """
+    Cache list_interactive_elements() results until the tree changes.
+
+    Meant for long-running processes (the daemon). Events are delivered
+    through the default GLib main context, which is drained before each
+    cache lookup. Mouse and keyboard actions also drop the cache, since
+    the events they cause may not have arrived yet.
+
+    Returns:
+        True if change events are being watched
+    """
+    global _tree_listener
+
+    if not ATSPI_AVAILABLE:
+        return False
+    if _tree_listener is not None:
+        return True
+
+    try:
+        listener = Atspi.EventListener.new(_on_tree_change)
+        for event_type in TREE_CHANGE_EVENTS:
+            listener.register(event_type)
+    except Exception:
+        return False
+
+    _tree_listener = listener
+    return True
+
+
+def _dispatch_pending_events() -> None:
+    """Run handlers for AT-SPI events received so far."""
+    context = GLib.MainContext.default()
+    while context.pending():
+        context.iteration(False)
+
+
+def wait_for_tree_change(timeout: float) -> bool:
+    """
+    Block until AT-SPI reports a tree change, or for timeout seconds.
+
+    Runs the default GLib main context until one of TREE_CHANGE_EVENTS
+    arrives, so waiting costs no CPU. Without watch_tree_changes() this
+    just sleeps.
+
+    Args:
+        timeout: Maximum time to wait in seconds
+
+    Returns:
+        True if the tree changed, False on timeout
+    """
+    if _tree_listener is None:
+        time.sleep(max(0.0, timeout))
+        return False
+
+    start = _tree_generation
+    _dispatch_pending_events()
+    if _tree_generation != start or timeout <= 0:
+        return _tree_generation != start
+
+    timed_out = []
+
+    def on_timeout():
+        timed_out.append(True)
+        return False
+
+    context = GLib.MainContext.default()
+    source_id = GLib.timeout_add(max(1, int(timeout * 1000)), on_timeout)
+    try:
+        while _tree_generation == start and not timed_out:
+            context.iteration(True)
+    finally:
+        if not timed_out:
+            GLib.source_remove(source_id)
+    return _tree_generation != start
+
+
 def get_desktop():
     """Get the root desktop accessible object."""
     if not ATSPI_AVAILABLE:
@@ -215,20 +405,92 @@ def get_applications() -> list[str]:
     return apps
 
 
+def get_app_bounds(app: str) -> Optional[tuple[int, int, int, int]]:
+    """
+    Get the area covered by an application's showing top-level windows.
+
+    Args:
+        app: Application name (case-insensitive substring, as app_filter)
+
+    Returns:
+        (x, y, width, height) of the union of the windows' bounds, or None
+        if no matching application has a showing window
+    """
+    if not ATSPI_AVAILABLE:
+        return None
+
+    app_lower = app.lower()
+    left = top = right = bottom = None
+    try:
+        desktop = get_desktop()
+        if desktop is None:
+            return None
+        for i in range(desktop.get_child_count()):
+            application = desktop.get_child_at_index(i)
+            if not application or app_lower not in (application.get_name() or "").lower():
+                continue
+            for j in range(application.get_child_count()):
+                window = application.get_child_at_index(j)
+                if not window or _is_hidden_subtree(window):
+                    continue
+                x, y, w, h = _get_element_bounds(window)
+                if w <= 0 or h <= 0:
+                    continue
+                left = x if left is None else min(left, x)
+                top = y if top is None else min(top, y)
+                right = x + w if right is None else max(right, x + w)
+                bottom = y + h if bottom is None else max(bottom, y + h)
+    except Exception:
+        return None
+
+    if left is None:
+        return None
+    return (left, top, right - left, bottom - top)
+
+
 def traverse_tree(
     root=None,
     max_depth: int = 15,
     filter_fn: Optional[Callable] = None,
-    app_filter: Optional[str] = None
-) -> Generator[ATSPIElement, None, None]:
+    app_filter: Optional[str] = None,
+    role_filter: Optional[Callable[[str], bool]] = None,
+    prefilter_fn: Optional[Callable[[ATSPIElement], bool]] = None,
+    prune_hidden: bool = False,
+    node_filter: Optional[Callable[[object, str], bool]] = None,
+    with_accessible: bool = False
+) -> Generator:
     """
     Traverse the accessibility tree and yield elements.
 
+    Elements are produced lazily, so callers can stop after the first
+    match without walking the rest of the tree.
+
+    The walk is deliberately single-threaded. libatspi is not thread-safe
+    (all calls share one D-Bus connection and main context), so walking
+    application subtrees from worker threads can corrupt its caches or
+    deadlock. Cost is instead cut by visiting fewer nodes (role_filter,
+    prefilter_fn, prune_hidden) and by caching results.
+
     Args:
         root: Starting accessible (defaults to desktop)
         max_depth: Maximum depth to traverse
         filter_fn: Optional function to filter elements (receives ATSPIElement)
         app_filter: Optional app name to filter by
+        role_filter: Optional check on the role name, applied before the
+            element's other attributes are fetched. Children of rejected
+            nodes are still traversed.
+        prefilter_fn: Optional check on an element before its bounds and
+            actions are fetched (they are zero/empty when it runs).
+            Children of rejected nodes are still traversed.
+        prune_hidden: Skip nodes below the application level that are
+            defunct, or not visible and showing with empty bounds, along
+            with their whole subtree
+        node_filter: Optional check on the raw accessible and its role
+            name, applied with role_filter, for checks that need neither
+            the full element nor a D-Bus call (see _has_action_iface).
+            Children of rejected nodes are still traversed.
+        with_accessible: Yield (element, accessible) pairs, for callers
+            that need to query the live object again
 
     Yields:
         ATSPIElement objects matching the criteria
@@ -241,39 +503,97 @@ def traverse_tree(
         if root is None:
             return
 
-    def _traverse(accessible, depth: int, app_name: str, path: str):
-        if depth > max_depth:
-            return
+    app_filter_lower = app_filter.lower() if app_filter else None
+
+    def _visit(accessible, depth: int, app_name: str, path: str):
+        """
+        Check one node.
+
+        Returns:
+            (app_name, element or None), or None to skip the node and
+            its whole subtree. A node that can't be read is skipped on
+            its own; its children are still visited.
+        """
+        # Get application name at top level; other applications are
+        # skipped with their whole subtree, before any element is built
+        if depth == 1:
+            try:
+                app_name = accessible.get_name() or ""
+            except Exception:
+                app_name = ""
+            if app_filter_lower and app_filter_lower not in app_name.lower():
+                return None
+        elif prune_hidden and depth > 1 and _is_hidden_subtree(accessible):
+            return None
 
         try:
-            # Get application name at top level
-            if depth == 1:
-                app_name = accessible.get_name() or ""
-                if app_filter and app_filter.lower() not in app_name.lower():
-                    return
-
-            # Convert to element
-            elem = _accessible_to_element(accessible, app_name, path)
-            if elem:
-                # Apply filter if provided
-                if filter_fn is None or filter_fn(elem):
-                    yield elem
-
-            # Traverse children
-            child_count = accessible.get_child_count()
-            for i in range(child_count):
-                try:
-                    child = accessible.get_child_at_index(i)
-                    if child:
-                        child_path = f"{path}/{i}"
-                        yield from _traverse(child, depth + 1, app_name, child_path)
-                except Exception:
-                    continue
+            # Check the role alone first; building a full element costs
+            # a dozen or more D-Bus calls
+            role_name = None
+            if role_filter is not None or node_filter is not None:
+                role_name = accessible.get_role_name() or ""
+                elem = None
+                if (
+                    (role_filter is None or role_filter(role_name))
+                    and (node_filter is None or node_filter(accessible, role_name))
+                ):
+                    elem = _accessible_to_element(
+                        accessible, app_name, path, role_name, prefilter_fn
+                    )
+            else:
+                elem = _accessible_to_element(
+                    accessible, app_name, path, prefilter_fn=prefilter_fn
+                )
+            # Apply filter if provided
+            if elem and filter_fn is not None and not filter_fn(elem):
+                elem = None
+            return app_name, elem
+        except Exception:
+            return app_name, None
 
+    if max_depth < 0:
+        return
+    visited = _visit(root, 0, "", "")
+    if visited is None:
+        return
+    app_name, elem = visited
+    if elem:
+        yield (elem, root) if with_accessible else elem
+
+    # Depth-first, pre-order walk with an explicit stack rather than
+    # recursive generators. Each frame is [accessible, depth, app_name,
+    # path, next child index, child count]; children are fetched one at
+    # a time, so a caller that stops early leaves the rest untouched.
+    stack = [[root, 0, app_name, "", 0, None]]
+    while stack:
+        frame = stack[-1]
+        accessible, depth, app_name, path, index, child_count = frame
+        if child_count is None:
+            try:
+                child_count = accessible.get_child_count() if depth < max_depth else 0
+            except Exception:
+                child_count = 0
+            frame[5] = child_count
+        if index >= child_count:
+            stack.pop()
+            continue
+        frame[4] = index + 1
+
+        try:
+            child = accessible.get_child_at_index(index)
         except Exception:
-            pass
+            continue
+        if not child:
+            continue
 
-    yield from _traverse(root, 0, "", "")
+        child_path = f"{path}/{index}"
+        visited = _visit(child, depth + 1, app_name, child_path)
+        if visited is None:
+            continue
+        child_app_name, elem = visited
+        if elem:
+            yield (elem, child) if with_accessible else elem
+        stack.append([child, depth + 1, child_app_name, child_path, 0, None])
 
 
 def find_elements(
@@ -298,37 +618,73 @@ def find_elements(
     Returns:
         List of matching ATSPIElement objects
     """
-    def filter_fn(elem: ATSPIElement) -> bool:
+    results = []
+    for elem in traverse_tree(
+        **_element_query(name, role, app, visible_only, clickable_only)
+    ):
+        results.append(elem)
+        if len(results) >= max_results:
+            break
+
+    return results
+
+
+def _element_query(
+    name: Optional[str],
+    role: Optional[str],
+    app: Optional[str],
+    visible_only: bool,
+    clickable_only: bool
+) -> dict:
+    """
+    Build the traverse_tree arguments for a find_elements search.
+
+    Returns:
+        Keyword arguments for traverse_tree
+    """
+    # casefold() also matches case variants lower() misses (e.g. "ß"/"SS")
+    name_folded = name.casefold() if name else None
+
+    def prefilter_fn(elem: ATSPIElement) -> bool:
         # Check visibility
         if visible_only and not elem.is_visible:
             return False
 
-        # Check clickable
-        if clickable_only and not any(a in {"click", "press", "activate"} for a in elem.actions):
-            return False
-
         # Check name match
-        if name:
-            name_lower = name.lower()
-            if name_lower not in elem.name.lower():
-                if name_lower not in elem.description.lower():
+        if name_folded:
+            if name_folded not in elem.name.casefold():
+                if name_folded not in elem.description.casefold():
                     return False
 
-        # Check role match
-        if role:
-            role_lower = role.lower()
-            if role_lower not in elem.role_name.lower():
-                return False
-
         return True
 
-    results = []
-    for elem in traverse_tree(app_filter=app, filter_fn=filter_fn):
-        results.append(elem)
-        if len(results) >= max_results:
-            break
+    def filter_fn(elem: ATSPIElement) -> bool:
+        # Check clickable (actions are only known after the prefilter)
+        if clickable_only and not any(a in {"click", "press", "activate"} for a in elem.actions):
+            return False
 
-    return results
+        return True
+
+    node_filter = None
+    if clickable_only:
+        def node_filter(accessible, role_name: str) -> bool:
+            # Nodes without the Action interface can't be clickable
+            return _has_action_iface(accessible)
+
+    role_filter = None
+    if role:
+        role_lower = role.lower()
+
+        def role_filter(role_name: str) -> bool:
+            return role_lower in role_name.lower()
+
+    return {
+        "app_filter": app,
+        "filter_fn": filter_fn,
+        "role_filter": role_filter,
+        "prefilter_fn": prefilter_fn,
+        "node_filter": node_filter,
+    }
 
 
 def find_element(
@@ -352,43 +708,215 @@ def find_element(
     return results[0] if results else None
 
 
-def list_interactive_elements(
+def find_element_handle(
+    name: Optional[str] = None,
+    role: Optional[str] = None,
     app: Optional[str] = None,
     visible_only: bool = True
+) -> Optional[tuple[ATSPIElement, object]]:
+    """
+    Find a single element and keep its live accessible object.
+
+    Lets a caller that watches one element re-read its bounds with
+    get_bounds() instead of searching the tree again. The accessible
+    must only be used from the thread that found it.
+
+    Returns:
+        (element, accessible) for the first match, or None
+    """
+    for found in traverse_tree(
+        with_accessible=True,
+        **_element_query(name, role, app, visible_only, False)
+    ):
+        return found
+    return None
+
+
+def get_bounds(accessible) -> Optional[tuple[int, int, int, int]]:
+    """
+    Re-read the screen bounds of a live accessible object.
+
+    One D-Bus call, against a full tree walk to find the element again.
+
+    Returns:
+        (x, y, width, height), or None if the object is gone (defunct,
+        or its application exited) or has no area
+    """
+    if not ATSPI_AVAILABLE or accessible is None:
+        return None
+    try:
+        component = accessible.get_component_iface()
+        if not component:
+            return None
+        rect = component.get_extents(Atspi.CoordType.SCREEN)
+    except Exception:
+        return None
+    if rect.width <= 0 or rect.height <= 0:
+        return None
+    return (rect.x, rect.y, rect.width, rect.height)
+
+
+def find_first_of(
+    specs: list[dict],
+    visible_only: bool = True
+) -> Optional[tuple[int, ATSPIElement]]:
+    """
+    Find the first spec, in list order, that matches an element.
+
+    All specs are matched during a single walk of the tree, instead of
+    one walk per spec. The walk stops early once the first spec has
+    matched.
+
+    Args:
+        specs: Element specs, each a dict with optional name, role and
+            app keys (matched as in find_elements)
+        visible_only: Only match visible elements
+
+    Returns:
+        (index of the spec, its first matching element), or None
+    """
+    prepared = []
+    for spec in specs:
+        name, role, app = spec.get("name"), spec.get("role"), spec.get("app")
+        prepared.append((
+            name.casefold() if name else None,
+            role.lower() if role else None,
+            app.lower() if app else None,
+        ))
+    if not prepared:
+        return None
+
+    # Only walk one application when every spec names the same one
+    apps = {app for _, _, app in prepared}
+    app_filter = specs[0].get("app") if len(apps) == 1 and None not in apps else None
+
+    def spec_matches(spec: tuple, elem: ATSPIElement) -> bool:
+        name_folded, role_lower, app_lower = spec
+        if role_lower and role_lower not in elem.role_name.lower():
+            return False
+        if app_lower and app_lower not in elem.app_name.lower():
+            return False
+        if name_folded and name_folded not in elem.name.casefold():
+            if name_folded not in elem.description.casefold():
+                return False
+        return True
+
+    role_filter = None
+    if all(role for _, role, _ in prepared):
+        def role_filter(role_name: str) -> bool:
+            role_name_lower = role_name.lower()
+            return any(role in role_name_lower for _, role, _ in prepared)
+
+    def prefilter_fn(elem: ATSPIElement) -> bool:
+        if visible_only and not elem.is_visible:
+            return False
+        return any(spec_matches(spec, elem) for spec in prepared)
+
+    best = None
+    for elem in traverse_tree(
+        app_filter=app_filter,
+        role_filter=role_filter,
+        prefilter_fn=prefilter_fn
+    ):
+        limit = len(prepared) if best is None else best[0]
+        for index in range(limit):
+            if spec_matches(prepared[index], elem):
+                best = (index, elem)
+                break
+        if best is not None and best[0] == 0:
+            break
+
+    return best
+
+
+# Role name substrings that make an element interactive (so "check menu
+# item" and "password text" count too)
+INTERACTIVE_ROLES = frozenset({
+    "push button", "toggle button", "radio button",
+    "check box", "combo box", "menu item", "list item",
+    "link", "entry", "text", "slider", "spin button"
+})
+
+# role name -> whether it matches INTERACTIVE_ROLES; AT-SPI has only a
+# few dozen role names, so each is checked once per process
+_interactive_role_names: dict[str, bool] = {}
+
+
+def _is_interactive_role(role_name: str) -> bool:
+    """Check if a role name contains one of the INTERACTIVE_ROLES."""
+    interactive = _interactive_role_names.get(role_name)
+    if interactive is None:
+        role_lower = role_name.lower()
+        interactive = any(role in role_lower for role in INTERACTIVE_ROLES)
+        _interactive_role_names[role_name] = interactive
+    return interactive
+
+
+def list_interactive_elements(
+    app: Optional[str] = None,
+    visible_only: bool = True,
+    role: Optional[str] = None,
+    max_results: Optional[int] = None
 ) -> list[ATSPIElement]:
     """
     List all interactive elements (buttons, links, inputs, etc.)
 
     Args:
         app: Optional application name to filter by
-        visible_only: Only return visible elements
+        visible_only: Only return visible elements (hidden subtrees are
+            not walked)
+        role: Optional role name substring to filter by
+        max_results: Stop walking the tree after this many matches
 
     Returns:
         List of interactive ATSPIElement objects
     """
-    interactive_roles = {
-        "push button", "toggle button", "radio button",
-        "check box", "combo box", "menu item", "list item",
-        "link", "entry", "text", "slider", "spin button"
-    }
+    def prefilter_fn(elem: ATSPIElement) -> bool:
+        return not visible_only or elem.is_visible
 
-    def filter_fn(elem: ATSPIElement) -> bool:
-        if visible_only and not elem.is_visible:
-            return False
+    def node_filter(accessible, role_name: str) -> bool:
+        # Rejects the bulk of the tree (panels, labels, fillers) before
+        # its bounds and actions are fetched over D-Bus
+        return _is_interactive_role(role_name) or _has_action_iface(accessible)
 
-        # Check if role is interactive
-        role_lower = elem.role_name.lower()
-        for interactive_role in interactive_roles:
-            if interactive_role in role_lower:
-                return True
-
-        # Also check if it has actions
-        if elem.actions:
-            return True
+    def filter_fn(elem: ATSPIElement) -> bool:
+        # Interactive role, or anything else with actions
+        return _is_interactive_role(elem.role_name) or bool(elem.actions)
+
+    cache_key = (app, visible_only, role, max_results)
+    if _tree_listener is not None:
+        _dispatch_pending_events()
+        cached = _tree_cache.get(cache_key)
+        if (
+            cached is not None
+            and time.monotonic() - cached[0] < TREE_CACHE_TTL
+            and cached[1] == input_generation()
+        ):
+            return list(cached[2])
+
+    role_filter = None
+    if role:
+        role_lower = role.lower()
+
+        def role_filter(role_name: str) -> bool:
+            return role_lower in role_name.lower()
 
-        return False
+    results = []
+    for elem in traverse_tree(
+        app_filter=app,
+        filter_fn=filter_fn,
+        role_filter=role_filter,
+        prefilter_fn=prefilter_fn,
+        prune_hidden=visible_only,
+        node_filter=node_filter
+    ):
+        results.append(elem)
+        if max_results is not None and len(results) >= max_results:
+            break
 
-    return list(traverse_tree(app_filter=app, filter_fn=filter_fn))
+    if _tree_listener is not None:
+        _tree_cache[cache_key] = (time.monotonic(), input_generation(), list(results))
+    return results
 
 
 def do_action(element: ATSPIElement, action_name: str = "click") -> bool:
@@ -417,6 +945,9 @@ def setup_environment():
     # Required for Qt applications
     os.environ.setdefault("QT_LINUX_ACCESSIBILITY_ALWAYS_ON", "1")
 
+    # Commands started from here on must see the new variables
+    clear_env_cache()
+
     # Accessibility bus should be running
     # In headless sessions, you may need to start it manually:
     # /usr/lib/at-spi2-core/at-spi-bus-launcher &
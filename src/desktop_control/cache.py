@@ -3,11 +3,32 @@ Element caching for click-by-ID functionality.
 
 Provides a cache with TTL for storing elements found during
 screenshot annotation, enabling subsequent click-id commands.
+
+The global cache is also written to a small binary file, so click-id
+works from a different process than the screenshot-annotated that
+filled it:
+
+    header   magic, version, count, screen width/height, timestamp
+             (time.monotonic(), which is system-wide on Linux)
+    records  count * (x, y, width, height, meta offset, meta length)
+    blob     per-element JSON of the remaining fields
 """
 
+import json
+import os
+import struct
+import tempfile
 import time
-from typing import Optional
-from .element import Element
+from array import array
+from types import MappingProxyType
+from typing import Mapping, Optional
+from .element import Element, ElementSource
+
+CACHE_MAGIC = b"DCEC"
+CACHE_VERSION = 2
+
+_HEADER = struct.Struct("<4sHIiid")
+_RECORD = struct.Struct("<iiiiII")
 
 
 class ElementCache:
@@ -20,10 +41,25 @@ class ElementCache:
 
     TTL = 5.0  # Cache time-to-live in seconds
 
-    def __init__(self):
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: File to persist the cache in (memory only if None)
+        """
         self._elements: dict[int, Element] = {}
+        self._elements_view: Mapping[int, Element] = MappingProxyType(self._elements)
+        # Element bounds in ID order, kept alongside _elements for hit-testing
+        self._xs = array("i")
+        self._ys = array("i")
+        self._widths = array("i")
+        self._heights = array("i")
         self._timestamp: float = 0.0
         self._screen_size: tuple[int, int] = (0, 0)
+        self._path = path
+        # mtime_ns of the file when last read or written
+        self._file_mtime: Optional[int] = None
 
     def store(
         self,
@@ -40,9 +76,12 @@ class ElementCache:
         Returns:
             Dict mapping element IDs to Elements
         """
-        self._elements = {i: elem for i, elem in enumerate(elements, start=1)}
-        self._timestamp = time.time()
+        self._set_elements({i: elem for i, elem in enumerate(elements, start=1)})
+        self._set_bounds(elements)
+        self._timestamp = time.monotonic()
         self._screen_size = screen_size
+        if self._path:
+            self._write_file()
         return self._elements
 
     def get(self, element_id: int) -> Optional[Element]:
@@ -59,16 +98,92 @@ class ElementCache:
             return None
         return self._elements.get(element_id)
 
-    def get_all(self) -> dict[int, Element]:
+    def get_all(self) -> Mapping[int, Element]:
         """
         Get all cached elements.
 
         Returns:
-            Dict mapping element IDs to Elements, empty if cache invalid
+            Read-only mapping of element IDs to Elements, empty if cache
+            invalid
         """
         if not self.is_valid():
             return {}
-        return self._elements.copy()
+        return self._elements_view
+
+    def snapshot(self) -> tuple[Mapping[int, Element], bool]:
+        """
+        Get the cached elements and whether the cache is valid, with a
+        single validity check.
+
+        Returns:
+            Tuple of (read-only mapping of element IDs to Elements, empty
+            if the cache is invalid; validity)
+        """
+        if self.is_valid():
+            return self._elements_view, True
+        return {}, False
+
+    def element_at(self, x: int, y: int) -> Optional[int]:
+        """
+        Find the cached element containing a point.
+
+        Args:
+            x: X coordinate in screen pixels
+            y: Y coordinate in screen pixels
+
+        Returns:
+            ID of the smallest element containing the point (the lowest
+            ID among equal sizes), or None if none does or the cache is
+            invalid
+        """
+        if not self.is_valid():
+            return None
+
+        best_id = None
+        best_area = 0
+        for i, (ex, ey, w, h) in enumerate(
+            zip(self._xs, self._ys, self._widths, self._heights), start=1
+        ):
+            if ex <= x < ex + w and ey <= y < ey + h:
+                area = w * h
+                if best_id is None or area < best_area:
+                    best_id, best_area = i, area
+        return best_id
+
+    def elements_in_rect(self, x1: int, y1: int, x2: int, y2: int) -> list[int]:
+        """
+        Find the cached elements lying entirely inside a rectangle.
+
+        Args:
+            x1: Left edge
+            y1: Top edge
+            x2: Right edge (exclusive)
+            y2: Bottom edge (exclusive)
+
+        Returns:
+            IDs of the enclosed elements in ID order, empty if the cache
+            is invalid
+        """
+        if not self.is_valid():
+            return []
+        return [
+            i for i, (ex, ey, w, h) in enumerate(
+                zip(self._xs, self._ys, self._widths, self._heights), start=1
+            )
+            if x1 <= ex and ex + w <= x2 and y1 <= ey and ey + h <= y2
+        ]
+
+    def _set_elements(self, elements: dict[int, Element]) -> None:
+        """Replace the cached elements and their read-only view."""
+        self._elements = elements
+        self._elements_view = MappingProxyType(elements)
+
+    def _set_bounds(self, elements) -> None:
+        """Rebuild the bounds arrays from elements in ID order."""
+        self._xs = array("i", [e.x for e in elements])
+        self._ys = array("i", [e.y for e in elements])
+        self._widths = array("i", [e.width for e in elements])
+        self._heights = array("i", [e.height for e in elements])
 
     def is_valid(self) -> bool:
         """
@@ -84,14 +199,101 @@ class ElementCache:
         if not self._elements:
             return False
 
-        age = time.time() - self._timestamp
-        return age < self.TTL
+        # A negative age means the timestamp is from before a reboot
+        return 0.0 <= time.monotonic() - self._timestamp < self.TTL
 
     def invalidate(self) -> None:
         """Clear the cache."""
-        self._elements = {}
+        self._set_elements({})
+        self._set_bounds(())
         self._timestamp = 0.0
         self._screen_size = (0, 0)
+        if self._path:
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+            self._file_mtime = None
+
+    def refresh(self) -> None:
+        """Load the cache file if another process has written it since."""
+        if not self._path:
+            return
+        try:
+            mtime = os.stat(self._path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._file_mtime:
+            self._read_file()
+            self._file_mtime = mtime
+
+    def _write_file(self) -> None:
+        """Write the cache file atomically; failures leave it memory-only."""
+        records = []
+        blob = bytearray()
+        for elem in self._elements.values():
+            meta = json.dumps([
+                elem.name, elem.source.value, elem.role, elem.role_name,
+                elem.description, elem.states, elem.actions, elem.app_name,
+                elem.confidence
+            ], separators=(",", ":")).encode()
+            records.append(_RECORD.pack(
+                elem.x, elem.y, elem.width, elem.height, len(blob), len(meta)
+            ))
+            blob += meta
+
+        header = _HEADER.pack(
+            CACHE_MAGIC, CACHE_VERSION, len(records),
+            self._screen_size[0], self._screen_size[1], self._timestamp
+        )
+
+        directory = os.path.dirname(self._path) or "."
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".element-cache-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(header + b"".join(records) + blob)
+                os.replace(tmp_path, self._path)
+            except OSError:
+                os.unlink(tmp_path)
+                raise
+            self._file_mtime = os.stat(self._path).st_mtime_ns
+        except OSError:
+            pass
+
+    def _read_file(self) -> None:
+        """Replace the cache contents with the cache file's."""
+        try:
+            with open(self._path, "rb") as f:
+                data = f.read()
+            magic, version, count, width, height, timestamp = _HEADER.unpack_from(data)
+            if magic != CACHE_MAGIC or version != CACHE_VERSION:
+                return
+
+            blob_start = _HEADER.size + count * _RECORD.size
+            elements = {}
+            for i in range(count):
+                x, y, w, h, offset, length = _RECORD.unpack_from(
+                    data, _HEADER.size + i * _RECORD.size
+                )
+                meta = data[blob_start + offset:blob_start + offset + length]
+                (name, source, role, role_name, description,
+                 states, actions, app_name, confidence) = json.loads(meta)
+                elements[i + 1] = Element(
+                    name=name, x=x, y=y, width=w, height=h,
+                    source=ElementSource(source), role=role,
+                    role_name=role_name, description=description,
+                    states=states, actions=actions, app_name=app_name,
+                    confidence=confidence
+                )
+        except (OSError, struct.error, ValueError, TypeError, KeyError, IndexError):
+            # Truncated, foreign or garbled files are treated as no cache
+            return
+
+        self._set_elements(elements)
+        self._set_bounds(elements.values())
+        self._timestamp = timestamp
+        self._screen_size = (width, height)
 
     def check_screen_size(self, screen_size: tuple[int, int]) -> bool:
         """
@@ -120,7 +322,7 @@ class ElementCache:
         """Age of cache in seconds."""
         if self._timestamp == 0:
             return float('inf')
-        return time.time() - self._timestamp
+        return time.monotonic() - self._timestamp
 
     @property
     def screen_size(self) -> tuple[int, int]:
@@ -132,11 +334,20 @@ class ElementCache:
 _cache: Optional[ElementCache] = None
 
 
+def cache_path() -> str:
+    """Get the file the global cache is persisted in."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "desktop_control_cache.bin")
+    return f"/tmp/desktop_control_cache-{os.getuid()}.bin"
+
+
 def get_cache() -> ElementCache:
-    """Get the global element cache."""
+    """Get the global element cache, picking up other processes' writes."""
     global _cache
     if _cache is None:
-        _cache = ElementCache()
+        _cache = ElementCache(path=cache_path())
+    _cache.refresh()
     return _cache
 
 
@@ -153,11 +364,21 @@ def get_element(element_id: int) -> Optional[Element]:
     return get_cache().get(element_id)
 
 
-def get_all_elements() -> dict[int, Element]:
+def get_all_elements() -> Mapping[int, Element]:
     """Get all elements from the global cache."""
     return get_cache().get_all()
 
 
+def element_at(x: int, y: int) -> Optional[int]:
+    """Find the ID of the cached element containing a point."""
+    return get_cache().element_at(x, y)
+
+
+def elements_in_rect(x1: int, y1: int, x2: int, y2: int) -> list[int]:
+    """Find the IDs of the cached elements lying entirely inside a rectangle."""
+    return get_cache().elements_in_rect(x1, y1, x2, y2)
+
+
 def is_cache_valid() -> bool:
     """Check if the global cache is valid."""
     return get_cache().is_valid()
@@ -3,18 +3,32 @@ Core utilities shared across desktop control modules.
 """
 
 import os
+import shutil
 import subprocess
+import sys
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Union
 
 DEFAULT_DISPLAY = ":10.0"
 
+# Keyword arguments for @dataclass on the per-element and per-command
+# records: slotted dataclasses (Python 3.10+) drop the per-instance
+# __dict__, which adds up over thousands of tree nodes
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+# display -> environment for child processes, so each command doesn't
+# copy os.environ just to set DISPLAY
+_env_cache: dict[str, dict[str, str]] = {}
+
+# command name -> absolute executable path
+_executable_cache: dict[str, str] = {}
+
+
+@dataclass(**DATACLASS_SLOTS)
 class CommandResult:
     """Result of a shell command execution."""
     returncode: int
-    stdout: str
+    stdout: Union[str, bytes]  # bytes when run with text=False
     stderr: str
 
     @property
@@ -22,10 +36,43 @@ class CommandResult:
         return self.returncode == 0
 
 
+def _command_env(display: Optional[str]) -> Optional[dict[str, str]]:
+    """
+    Get the environment for a child process on the given display.
+
+    Returns None (inherit the current environment) when no display
+    override is needed.
+    """
+    if not display or os.environ.get("DISPLAY") == display:
+        return None
+    env = _env_cache.get(display)
+    if env is None:
+        env = {**os.environ, "DISPLAY": display}
+        _env_cache[display] = env
+    return env
+
+
+def _resolve_executable(name: str) -> str:
+    """Resolve a command name to an absolute path, caching the lookup."""
+    path = _executable_cache.get(name)
+    if path is None:
+        path = shutil.which(name) or name
+        _executable_cache[name] = path
+    return path
+
+
+def clear_env_cache() -> None:
+    """Forget cached child environments after os.environ is modified."""
+    _env_cache.clear()
+
+
 def run_cmd(
     cmd: list[str],
     display: Optional[str] = None,
-    timeout: Optional[float] = None
+    timeout: Optional[float] = None,
+    input: Optional[str] = None,
+    strip: bool = True,
+    text: bool = True
 ) -> CommandResult:
     """
     Run a command with optional DISPLAY override.
@@ -34,26 +81,48 @@ def run_cmd(
         cmd: Command and arguments as list
         display: X display to use (e.g., ":10.0")
         timeout: Command timeout in seconds
+        input: Text to write to the command's stdin
+        strip: Strip surrounding whitespace from stdout/stderr. Disable
+               when blank lines in the output are significant.
+        text: Decode stdout as text. When False, stdout is returned as
+              raw bytes (never stripped), e.g. for image data.
 
     Returns:
         CommandResult with returncode, stdout, and stderr
     """
-    env = os.environ.copy()
-    if display:
-        env["DISPLAY"] = display
+    env = _command_env(display)
 
     try:
+        # With an absolute executable path and close_fds=False, CPython
+        # starts the child with posix_spawn instead of fork/exec. Python
+        # opens file descriptors non-inheritable, so nothing extra leaks.
         result = subprocess.run(
-            cmd,
+            [_resolve_executable(cmd[0])] + cmd[1:],
             capture_output=True,
-            text=True,
             env=env,
-            timeout=timeout
+            timeout=timeout,
+            input=input.encode() if input is not None else None,
+            close_fds=False
         )
+        stderr = result.stderr.decode(errors="replace")
+        if not text:
+            return CommandResult(
+                returncode=result.returncode,
+                stdout=result.stdout,
+                stderr=stderr.strip()
+            )
+
+        stdout = result.stdout.decode(errors="replace")
+        if not strip:
+            return CommandResult(
+                returncode=result.returncode,
+                stdout=stdout,
+                stderr=stderr
+            )
         return CommandResult(
             returncode=result.returncode,
-            stdout=result.stdout.strip(),
-            stderr=result.stderr.strip()
+            stdout=stdout.strip(),
+            stderr=stderr.strip()
         )
     except subprocess.TimeoutExpired:
         return CommandResult(
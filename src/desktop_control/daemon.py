@@ -0,0 +1,204 @@
+"""
+Long-running command server over a Unix socket.
+
+A daemon process keeps modules imported and per-process state warm (the
+libxdo handle, OCR caches, the element cache) and runs commands sent by
+short-lived CLI invocations, which then skip interpreter and import
+startup.
+
+Messages are length-prefixed JSON: a 4-byte big-endian length followed
+by that many bytes of UTF-8 JSON, one request and one reply per
+connection.
+
+Both ends only talk to processes of the same user: the socket lives in
+$XDG_RUNTIME_DIR (or a private per-user directory under /tmp), and
+clients check the daemon's uid before sending a command.
+"""
+
+import json
+import os
+import socket
+import stat
+import struct
+import threading
+from typing import Callable, Optional
+
+# Environment variable naming the daemon socket for clients
+SOCKET_ENV = "DESKTOP_CTL_SOCK"
+
+_HEADER = struct.Struct(">I")
+
+# struct ucred returned by SO_PEERCRED: pid, uid, gid
+_UCRED = struct.Struct("3i")
+
+
+def _fallback_dir() -> str:
+    """Get the private per-user socket directory used without $XDG_RUNTIME_DIR."""
+    return f"/tmp/desktop-control-{os.getuid()}"
+
+
+def default_socket_path() -> str:
+    """Get the socket path from the environment or a per-user default."""
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "desktop-control.sock")
+    return os.path.join(_fallback_dir(), "daemon.sock")
+
+
+def _make_private_dir(path: str) -> None:
+    """
+    Create a directory only the current user can use, or check an existing one.
+
+    Raises:
+        PermissionError: If the directory belongs to another user or is
+            open to other users
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if info.st_uid != os.getuid() or not stat.S_ISDIR(info.st_mode) or info.st_mode & 0o077:
+        raise PermissionError(f"{path} is not a private directory of the current user")
+
+
+def _peer_uid(conn: socket.socket) -> int:
+    """Get the uid of the process at the other end of a Unix socket."""
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _UCRED.size)
+    return _UCRED.unpack(creds)[1]
+
+
+def _send(conn: socket.socket, message: dict) -> None:
+    """Send one length-prefixed JSON message."""
+    data = json.dumps(message, separators=(",", ":")).encode()
+    conn.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(conn: socket.socket, size: int) -> Optional[bytes]:
+    """Read exactly size bytes, or None if the peer closed early."""
+    chunks = []
+    while size:
+        chunk = conn.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv(conn: socket.socket) -> Optional[dict]:
+    """Receive one length-prefixed JSON message."""
+    header = _recv_exactly(conn, _HEADER.size)
+    if header is None:
+        return None
+    data = _recv_exactly(conn, _HEADER.unpack(header)[0])
+    if data is None:
+        return None
+    return json.loads(data)
+
+
+def request(
+    argv: list[str],
+    tty: bool,
+    socket_path: str,
+    timeout: Optional[float] = None
+) -> Optional[dict]:
+    """
+    Run a command in the daemon.
+
+    Args:
+        argv: Command-line arguments without the program name
+        tty: Whether the client's stdout is a terminal
+        socket_path: Daemon socket path
+        timeout: Socket timeout in seconds (None waits indefinitely,
+                 since commands like wait-for can run for a long time)
+
+    Returns:
+        Reply dict with "result" (and "compact" unless the request
+        failed), or None if the daemon could not be reached or belongs
+        to another user (the command has not run and may be run
+        in-process instead)
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(timeout)
+        try:
+            conn.connect(socket_path)
+            if _peer_uid(conn) != os.getuid():
+                return None
+        except OSError:
+            return None
+
+        # From here on the command may have run, so never report None
+        try:
+            _send(conn, {"argv": argv, "tty": tty})
+            reply = _recv(conn)
+        except (OSError, ValueError) as e:
+            return {"result": {"error": f"Daemon connection failed: {e}"}}
+        if reply is None:
+            return {"result": {"error": "Daemon closed the connection"}}
+        return reply
+
+
+def serve(
+    socket_path: str,
+    handler: Callable[[list[str], bool], dict],
+    ready: Optional[threading.Event] = None
+) -> None:
+    """
+    Accept and run commands until interrupted.
+
+    Requests are handled one at a time, so commands from concurrent
+    clients never interleave their input events.
+
+    Args:
+        socket_path: Socket path to listen on (a stale file is replaced)
+        handler: Called with (argv, tty); returns the reply dict
+        ready: Set once the socket is listening, so clients can connect
+
+    Raises:
+        PermissionError: If the default /tmp socket directory isn't
+            private to the current user
+    """
+    if os.path.dirname(socket_path) == _fallback_dir():
+        _make_private_dir(_fallback_dir())
+
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(socket_path)
+        finally:
+            os.umask(old_umask)
+        server.listen()
+        if ready is not None:
+            ready.set()
+
+        try:
+            while True:
+                conn, _ = server.accept()
+                with conn:
+                    if _peer_uid(conn) != os.getuid():
+                        continue
+                    try:
+                        message = _recv(conn)
+                        if message is None:
+                            continue
+                        reply = handler(message["argv"], bool(message.get("tty")))
+                    except Exception as e:
+                        reply = {"result": {"error": f"Daemon error: {e}"}}
+                    try:
+                        _send(conn, reply)
+                    except OSError:
+                        pass
+        finally:
+            try:
+                os.unlink(socket_path)
+            except FileNotFoundError:
+                pass
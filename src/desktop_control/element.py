@@ -8,6 +8,13 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
 
+from .core import DATACLASS_SLOTS
+
+
+# Box pairs above which merge_elements uses the numba overlap kernel;
+# below this, compiling or loading it costs more than broadcasting
+NUMBA_MIN_PAIRS = 250_000
+
 
 class ElementSource(Enum):
     """Source of the element."""
@@ -15,12 +22,14 @@ class ElementSource(Enum):
     OCR = "ocr"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Element:
     """
     Unified UI element representation.
 
     Can be created from AT-SPI accessibility tree or OCR detection.
+    Bounds are captured when the element is found, so center and the
+    other geometry properties never query AT-SPI again.
     """
     # Core properties
     name: str
@@ -174,25 +183,160 @@ def merge_elements(
         Merged list of Elements
     """
     # Convert to unified Elements
-    result = [Element.from_atspi(e) for e in atspi_elements]
+    return extend_without_overlaps(
+        [Element.from_atspi(e) for e in atspi_elements],
+        [Element.from_ocr(e) for e in ocr_elements],
+        overlap_threshold
+    )
+
+
+def extend_without_overlaps(
+    elements: list[Element],
+    extra: list[Element],
+    overlap_threshold: float = 0.5
+) -> list[Element]:
+    """
+    Append the extra elements that don't overlap an element already present.
+
+    Each extra element is checked against the original elements and the
+    extra elements added before it. The original elements are tested
+    against all extra boxes at once, the added ones through a grid index,
+    so neither check walks every pair in Python.
 
-    # Add OCR elements that don't overlap with AT-SPI elements
-    for ocr_elem in ocr_elements:
-        ocr_box = Element.from_ocr(ocr_elem)
+    Args:
+        elements: Elements to keep as they are (e.g. from AT-SPI)
+        extra: Candidate elements to add (e.g. from OCR), in order
+        overlap_threshold: Minimum overlap ratio to consider elements the same
+
+    Returns:
+        New list of the elements followed by the added extra elements
+    """
+    result = list(elements)
 
-        # Check if this OCR element overlaps with any AT-SPI element
-        overlaps = False
-        for atspi_elem in result:
-            if _boxes_overlap(atspi_elem, ocr_box, overlap_threshold):
-                overlaps = True
-                break
+    # Drop extra boxes covered by an original element, all pairs at once
+    covered = _overlap_any(result, extra, overlap_threshold)
 
-        if not overlaps:
-            result.append(ocr_box)
+    # Boxes each remaining extra box is checked against: the extra boxes
+    # already added, plus the original elements if numpy wasn't available
+    index = _BoxGrid(result if covered is None else ())
+
+    for i, box in enumerate(extra):
+        if covered is not None and covered[i]:
+            continue
+
+        candidates = index.candidates(box)
+        if not any(_boxes_overlap(other, box, overlap_threshold) for other in candidates):
+            result.append(box)
+            index.add(box)
 
     return result
 
 
+class _BoxGrid:
+    """
+    Uniform grid over element boxes for finding overlap candidates.
+
+    Each box is filed under every cell it covers, so a box only needs
+    checking against boxes sharing one of its cells rather than all of
+    them. Boxes covering more than MAX_CELLS cells (windows, full-screen
+    containers) are kept in a plain list and checked against every box
+    instead, so they don't fill thousands of cells.
+    """
+
+    CELL_SIZE = 64
+    MAX_CELLS = 64
+
+    def __init__(self, elements=()):
+        self._boxes: list[Element] = []
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        self._large: list[int] = []
+        for elem in elements:
+            self.add(elem)
+
+    def _cell_ranges(self, elem: Element) -> tuple[range, range]:
+        size = self.CELL_SIZE
+        return (
+            range(elem.x // size, (elem.x + elem.width - 1) // size + 1),
+            range(elem.y // size, (elem.y + elem.height - 1) // size + 1),
+        )
+
+    def add(self, elem: Element) -> None:
+        """Add a box to the grid."""
+        if elem.width <= 0 or elem.height <= 0:
+            # Empty boxes never overlap anything
+            return
+        box_index = len(self._boxes)
+        self._boxes.append(elem)
+        xs, ys = self._cell_ranges(elem)
+        if len(xs) * len(ys) > self.MAX_CELLS:
+            self._large.append(box_index)
+            return
+        for cx in xs:
+            for cy in ys:
+                self._cells.setdefault((cx, cy), []).append(box_index)
+
+    def candidates(self, elem: Element) -> list[Element]:
+        """Get the boxes that may overlap elem, in insertion order."""
+        if elem.width <= 0 or elem.height <= 0:
+            return []
+        xs, ys = self._cell_ranges(elem)
+        if len(xs) * len(ys) > self.MAX_CELLS:
+            # Looking up every cell would cost more than checking all boxes
+            return list(self._boxes)
+        found = set(self._large)
+        for cx in xs:
+            for cy in ys:
+                found.update(self._cells.get((cx, cy), ()))
+        return [self._boxes[i] for i in sorted(found)]
+
+
+def _overlap_any(
+    elements: list[Element],
+    candidates: list[Element],
+    threshold: float
+) -> Optional[list[bool]]:
+    """
+    For each candidate, check if it overlaps any element (see _boxes_overlap).
+
+    Large inputs use the numba kernel when numba is installed, which
+    avoids the (N, M) temporaries of the NumPy broadcast.
+
+    Returns:
+        One flag per candidate, or None if numpy is unavailable
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    if not elements or not candidates:
+        return [False] * len(candidates)
+
+    a = np.array([(e.x, e.y, e.width, e.height) for e in elements], dtype=np.int64)
+    b = np.array([(e.x, e.y, e.width, e.height) for e in candidates], dtype=np.int64)
+
+    if len(elements) * len(candidates) >= NUMBA_MIN_PAIRS:
+        try:
+            from ._overlap_kernel import covered_mask
+        except ImportError:
+            pass
+        else:
+            return covered_mask(a, b, float(threshold)).tolist()
+
+    ax, ay, aw, ah = (a[:, i, None] for i in range(4))
+    bx, by, bw, bh = (b[None, :, i] for i in range(4))
+
+    inter_w = np.minimum(ax + aw, bx + bw) - np.maximum(ax, bx)
+    inter_h = np.minimum(ay + ah, by + bh) - np.maximum(ay, by)
+    smaller_area = np.minimum(aw * ah, bw * bh)
+
+    valid = (inter_w > 0) & (inter_h > 0) & (smaller_area > 0)
+    intersection = inter_w * inter_h
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overlap = valid & (intersection / np.where(valid, smaller_area, 1) >= threshold)
+    return overlap.any(axis=0).tolist()
+
+
 def _boxes_overlap(elem1: Element, elem2: Element, threshold: float) -> bool:
     """Check if two elements overlap beyond the threshold."""
     # Calculate intersection
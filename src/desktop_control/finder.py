@@ -5,14 +5,51 @@ Orchestrates element finding using the accessibility tree first,
 falling back to OCR when AT-SPI doesn't find the element.
 """
 
-from typing import Optional
+import dataclasses
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional
 
-from .element import Element, ElementSource
+from .element import Element, ElementSource, extend_without_overlaps
 from . import atspi
 from . import ocr
 from .screenshot import screenshot_to_pil
 
 
+def _run_in_background(fn: Callable, *args) -> Future:
+    """
+    Run fn(*args) on a daemon thread, alongside an AT-SPI tree walk.
+
+    Unlike executor workers, daemon threads aren't joined at interpreter
+    exit, so a one-shot command that AT-SPI answers doesn't wait for
+    background work whose result it never reads.
+
+    Returns:
+        Future for fn's result
+    """
+    future: Future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="finder", daemon=True).start()
+    return future
+
+
+def _center_in(match, roi: Optional[tuple[int, int, int, int]]) -> bool:
+    """Check if an OCR match's center lies in an (x, y, width, height) area."""
+    if roi is None:
+        return True
+    x, y, w, h = roi
+    cx, cy = match.x + match.width // 2, match.y + match.height // 2
+    return x <= cx < x + w and y <= cy < y + h
+
+
 class ElementFinder:
     """
     Unified element finder using AT-SPI and OCR.
@@ -46,6 +83,11 @@ class ElementFinder:
         # Cache for screenshot (cleared after each find operation)
         self._screenshot_cache = None
 
+        # Last find()/find_any() query AT-SPI couldn't answer. Repeating it
+        # (a wait polling for absent elements) runs OCR alongside the tree
+        # walk, since the OCR result will most likely be used.
+        self._atspi_missed: Optional[tuple] = None
+
     def find(
         self,
         name: Optional[str] = None,
@@ -56,7 +98,13 @@ class ElementFinder:
         """
         Find a single element matching the criteria.
 
-        Tries AT-SPI first, then falls back to OCR.
+        Tries AT-SPI first, then falls back to OCR. While AT-SPI runs,
+        the fallback's screenshot is captured in the background. When the
+        same query missed in AT-SPI last time, as when a wait polls for
+        an element that hasn't appeared, the OCR search runs there too,
+        so a miss costs max(AT-SPI, OCR) rather than the sum. OCR isn't
+        started speculatively otherwise: on an AT-SPI hit its result
+        would go unused.
 
         Args:
             name: Element text/name to find
@@ -69,6 +117,19 @@ class ElementFinder:
         """
         self._screenshot_cache = None
 
+        # AT-SPI isn't thread-safe, so look up the app's area here
+        roi = self._app_roi(app) if self.use_ocr and name else None
+
+        query = ("find", name, role, app, visible_only)
+        speculate = self._atspi_missed == query
+        background = None
+        stop = threading.Event()
+        if self.use_atspi and self.use_ocr and name:
+            if speculate:
+                background = _run_in_background(self._capture_and_find_first, name, roi, stop)
+            else:
+                background = _run_in_background(screenshot_to_pil, self.display)
+
         # Try AT-SPI first
         if self.use_atspi:
             atspi_elem = atspi.find_element(
@@ -78,16 +139,149 @@ class ElementFinder:
                 visible_only=visible_only
             )
             if atspi_elem:
+                self._atspi_missed = None
+                if background is not None:
+                    # Skips the OCR if the capture is still in progress
+                    stop.set()
+                    background.cancel()
                 return Element.from_atspi(atspi_elem)
+            self._atspi_missed = query
 
         # Fall back to OCR if name is provided
         if self.use_ocr and name:
-            ocr_match = self._find_text_ocr(name)
+            if background is None:
+                ocr_match = self._find_text_ocr(name, roi=roi)
+            elif speculate:
+                ocr_match = background.result()
+            else:
+                self._screenshot_cache = background.result()
+                ocr_match = self._find_text_ocr(name, roi=roi)
             if ocr_match:
                 return Element.from_ocr(ocr_match)
 
         return None
 
+    def find_tracked(
+        self,
+        name: Optional[str] = None,
+        role: Optional[str] = None,
+        app: Optional[str] = None,
+        visible_only: bool = True
+    ) -> tuple[Optional[Element], object]:
+        """
+        Find a single element, keeping a handle to re-read its bounds.
+
+        Same lookup as find(), run sequentially. An AT-SPI match comes
+        with its live accessible, which atspi.get_bounds() can re-query
+        without another tree walk; OCR matches have no handle.
+
+        Returns:
+            (element, handle); element is None if not found, handle is
+            None unless the element came from AT-SPI
+        """
+        self._screenshot_cache = None
+
+        if self.use_atspi:
+            found = atspi.find_element_handle(
+                name=name,
+                role=role,
+                app=app,
+                visible_only=visible_only
+            )
+            if found:
+                atspi_elem, handle = found
+                return Element.from_atspi(atspi_elem), handle
+
+        if self.use_ocr and name:
+            ocr_match = self._find_text_ocr(name, roi=self._app_roi(app))
+            if ocr_match:
+                return Element.from_ocr(ocr_match), None
+
+        return None, None
+
+    def find_any(
+        self,
+        specs: list[dict],
+        visible_only: bool = True
+    ) -> Optional[tuple[int, Element]]:
+        """
+        Find the first of several elements, in list order.
+
+        Same result as calling find() on each spec in turn until one is
+        found, but AT-SPI walks the tree once for all specs and OCR reads
+        one screenshot once for all names. As in find(), the screenshot
+        is captured while AT-SPI runs, and the OCR runs there too only
+        if AT-SPI missed the first spec on the previous call.
+
+        Args:
+            specs: Element specs, each a dict with optional name, role
+                   and app keys (same as find() parameters)
+            visible_only: Only find visible elements
+
+        Returns:
+            (index of the spec, Element) if any is found, None otherwise
+        """
+        self._screenshot_cache = None
+        if not specs:
+            return None
+
+        use_ocr = self.use_ocr and any(spec.get("name") for spec in specs)
+        # AT-SPI isn't thread-safe, so look up the apps' areas here, once
+        # per distinct app
+        app_rois = {}
+        rois = []
+        for spec in specs:
+            app = spec.get("app")
+            if use_ocr and spec.get("name") and app not in app_rois:
+                app_rois[app] = self._app_roi(app)
+            rois.append(app_rois.get(app) if use_ocr and spec.get("name") else None)
+
+        query = ("find_any", tuple(tuple(sorted(spec.items())) for spec in specs), visible_only)
+        speculate = self._atspi_missed == query
+        background = None
+        stop = threading.Event()
+        if self.use_atspi and use_ocr:
+            if speculate:
+                background = _run_in_background(self._capture_and_ocr, stop)
+            else:
+                background = _run_in_background(screenshot_to_pil, self.display)
+
+        atspi_found = None
+        if self.use_atspi:
+            atspi_found = atspi.find_first_of(specs, visible_only=visible_only)
+            if atspi_found is not None and atspi_found[0] == 0:
+                self._atspi_missed = None
+                if background is not None:
+                    stop.set()
+                    background.cancel()
+                return 0, Element.from_atspi(atspi_found[1])
+            self._atspi_missed = query
+
+        # OCR can still find a spec listed before the AT-SPI match
+        limit = len(specs) if atspi_found is None else atspi_found[0]
+        if use_ocr and any(spec.get("name") for spec in specs[:limit]):
+            if background is None:
+                result = self._capture_and_ocr()
+            elif speculate:
+                result = background.result()
+            else:
+                img = background.result()
+                result = self._get_ocr_result(img) if img is not None else None
+            if result is not None:
+                for index in range(limit):
+                    name = specs[index].get("name")
+                    if not name:
+                        continue
+                    for match in ocr.find_text_in_result(result, name):
+                        if _center_in(match, rois[index]):
+                            return index, Element.from_ocr(match)
+        elif background is not None:
+            stop.set()
+
+        if atspi_found is not None:
+            return atspi_found[0], Element.from_atspi(atspi_found[1])
+        return None
+
     def find_all(
         self,
         name: Optional[str] = None,
@@ -100,6 +294,10 @@ class ElementFinder:
         """
         Find all elements matching the criteria.
 
+        For name searches, OCR runs in the background while AT-SPI walks
+        the tree, since both result sets are usually needed. It is
+        skipped if AT-SPI fills max_results before the capture is done.
+
         Args:
             name: Element text/name to find (partial match)
             role: Element role (AT-SPI only)
@@ -114,6 +312,14 @@ class ElementFinder:
         self._screenshot_cache = None
         results = []
 
+        # AT-SPI isn't thread-safe, so look up the app's area here
+        roi = self._app_roi(app) if self.use_ocr and name else None
+
+        ocr_future = None
+        stop = threading.Event()
+        if self.use_atspi and self.use_ocr and name:
+            ocr_future = _run_in_background(self._capture_and_find_text, name, roi, stop)
+
         # Get AT-SPI results
         if self.use_atspi:
             atspi_results = atspi.find_elements(
@@ -129,13 +335,17 @@ class ElementFinder:
         # Add OCR results if name search and not enough AT-SPI results
         if self.use_ocr and name and len(results) < max_results:
             remaining = max_results - len(results)
-            ocr_matches = self._find_all_text_ocr(name, max_results=remaining)
+            if ocr_future is not None:
+                ocr_matches = ocr_future.result()[:remaining]
+            else:
+                ocr_matches = self._find_all_text_ocr(name, max_results=remaining, roi=roi)
 
             # Filter out OCR matches that overlap with AT-SPI results
-            for match in ocr_matches:
-                ocr_elem = Element.from_ocr(match)
-                if not self._overlaps_any(ocr_elem, results):
-                    results.append(ocr_elem)
+            results = extend_without_overlaps(
+                results, [Element.from_ocr(m) for m in ocr_matches]
+            )
+        elif ocr_future is not None:
+            stop.set()
 
         return results[:max_results]
 
@@ -168,12 +378,8 @@ class ElementFinder:
         if img is None:
             return None
 
-        matches = ocr.find_text(
-            img,
-            text,
-            exact=exact,
-            case_sensitive=case_sensitive,
-            min_confidence=self.ocr_min_confidence
+        matches = ocr.find_text_in_result(
+            self._get_ocr_result(img), text, exact=exact, case_sensitive=case_sensitive
         )
 
         if matches:
@@ -207,20 +413,54 @@ class ElementFinder:
         if img is None:
             return []
 
-        matches = ocr.find_text(
-            img,
-            text,
-            exact=exact,
-            case_sensitive=case_sensitive,
-            min_confidence=self.ocr_min_confidence
+        matches = ocr.find_text_in_result(
+            self._get_ocr_result(img), text, exact=exact, case_sensitive=case_sensitive
         )
 
         return [Element.from_ocr(m) for m in matches[:max_results]]
 
+    def find_all_texts(
+        self,
+        texts: list[str],
+        exact: bool = False,
+        case_sensitive: bool = False,
+        max_results: int = 50
+    ) -> dict[str, list[Element]]:
+        """
+        Find all occurrences of several texts with one screenshot and OCR pass.
+
+        Args:
+            texts: Texts to find
+            exact: Require exact match
+            case_sensitive: Case-sensitive matching
+            max_results: Maximum number of results per text
+
+        Returns:
+            Dict mapping each text to its Elements
+        """
+        found: dict[str, list[Element]] = {text: [] for text in texts}
+        if not self.use_ocr or not texts:
+            return found
+
+        self._screenshot_cache = None
+        img = self._get_screenshot()
+        if img is None:
+            return found
+
+        result = self._get_ocr_result(img)
+        for text in found:
+            matches = ocr.find_text_in_result(
+                result, text, exact=exact, case_sensitive=case_sensitive
+            )
+            found[text] = [Element.from_ocr(m) for m in matches[:max_results]]
+        return found
+
     def list_interactive(
         self,
         app: Optional[str] = None,
-        visible_only: bool = True
+        visible_only: bool = True,
+        role: Optional[str] = None,
+        max_results: Optional[int] = None
     ) -> list[Element]:
         """
         List all interactive elements (buttons, links, inputs, etc.)
@@ -230,6 +470,8 @@ class ElementFinder:
         Args:
             app: Application name filter
             visible_only: Only list visible elements
+            role: Role name substring filter
+            max_results: Maximum number of elements
 
         Returns:
             List of interactive Elements
@@ -239,84 +481,147 @@ class ElementFinder:
 
         atspi_results = atspi.list_interactive_elements(
             app=app,
-            visible_only=visible_only
+            visible_only=visible_only,
+            role=role,
+            max_results=max_results
         )
         return [Element.from_atspi(e) for e in atspi_results]
 
     def _get_screenshot(self):
         """Get screenshot, using cache if available."""
-        if self._screenshot_cache is not None:
-            return self._screenshot_cache
-
-        self._screenshot_cache = screenshot_to_pil(self.display)
+        if self._screenshot_cache is None:
+            self._screenshot_cache = screenshot_to_pil(self.display)
         return self._screenshot_cache
 
-    def _find_text_ocr(self, text: str):
-        """Find text using OCR."""
-        img = self._get_screenshot()
-        if img is None:
-            return None
+    def _get_ocr_result(self, img) -> "ocr.OCRResult":
+        """
+        OCR a screenshot (or crop) with the finder's settings.
 
-        matches = ocr.find_text(
-            img,
-            text,
-            exact=False,
-            case_sensitive=False,
-            min_confidence=self.ocr_min_confidence
+        Results are cached by frame in the ocr module, so searches for
+        different names in the same frame run Tesseract once.
+        """
+        return ocr.ocr_image(
+            img, psm=ocr.auto_psm(*img.size), min_confidence=self.ocr_min_confidence
         )
 
+    def _app_roi(self, app: Optional[str]) -> Optional[tuple[int, int, int, int]]:
+        """Get the screen area to OCR for an app filter, if AT-SPI knows it."""
+        if not app or not self.use_atspi:
+            return None
+        return atspi.get_app_bounds(app)
+
+    def _capture_and_ocr(
+        self,
+        stop: Optional[threading.Event] = None
+    ) -> Optional["ocr.OCRResult"]:
+        """
+        Capture the whole screen and OCR it (may run in the background).
+
+        Returns None without running OCR if stop is set once the capture
+        is done.
+        """
+        img = screenshot_to_pil(self.display)
+        if img is None or (stop is not None and stop.is_set()):
+            return None
+        return self._get_ocr_result(img)
+
+    def _capture_and_find_first(
+        self,
+        text: str,
+        roi: Optional[tuple[int, int, int, int]],
+        stop: threading.Event
+    ):
+        """
+        Capture the screen and find the first occurrence of text with OCR.
+
+        Runs in the background (see find()), so it takes its own capture
+        instead of going through the per-call screenshot cache. Returns
+        None without running OCR if stop is set once the capture is done.
+        """
+        img = screenshot_to_pil(self.display)
+        if img is None or stop.is_set():
+            return None
+        matches = self._ocr_find(text, roi, first_only=True, img=img)
         return matches[0] if matches else None
 
-    def _find_all_text_ocr(self, text: str, max_results: int = 50):
-        """Find all text using OCR."""
-        img = self._get_screenshot()
+    def _capture_and_find_text(
+        self,
+        text: str,
+        roi: Optional[tuple[int, int, int, int]],
+        stop: threading.Event
+    ):
+        """
+        Capture the screen and find all occurrences of text with OCR.
+
+        Runs in the background (see find_all()), so it takes its own
+        capture instead of going through the per-call screenshot cache.
+        Returns [] without running OCR if stop is set once the capture
+        is done.
+        """
+        img = screenshot_to_pil(self.display)
+        if img is None or stop.is_set():
+            return []
+        return self._ocr_find(text, roi, img=img)
+
+    def _ocr_find(
+        self,
+        text: str,
+        roi: Optional[tuple[int, int, int, int]] = None,
+        first_only: bool = False,
+        img=None
+    ):
+        """
+        Find text using OCR, optionally only within part of the screen.
+
+        Args:
+            text: Text to find
+            roi: Optional (x, y, width, height) to crop to before OCR;
+                 match coordinates are still screen coordinates
+            first_only: Stop at the first match (see ocr.find_first_text)
+            img: Screenshot to search (default: the cached screenshot)
+
+        Returns:
+            List of OCRMatch objects
+        """
+        if img is None:
+            img = self._get_screenshot()
         if img is None:
             return []
 
-        return ocr.find_text(
-            img,
-            text,
-            exact=False,
-            case_sensitive=False,
-            min_confidence=self.ocr_min_confidence
-        )[:max_results]
+        left = top = 0
+        if roi is not None:
+            x, y, w, h = roi
+            left, top = max(0, x), max(0, y)
+            right, bottom = min(img.width, x + w), min(img.height, y + h)
+            if right <= left or bottom <= top:
+                return []
+            img = img.crop((left, top, right, bottom))
+
+        if first_only:
+            match = ocr.find_first_text(img, text, min_confidence=self.ocr_min_confidence)
+            matches = [match] if match is not None else []
+        else:
+            matches = ocr.find_text_in_result(self._get_ocr_result(img), text)
+        if left or top:
+            # Matches may be the OCR cache's own objects, so copy them
+            matches = [
+                dataclasses.replace(m, x=m.x + left, y=m.y + top) for m in matches
+            ]
+        return matches
+
+    def _find_text_ocr(self, text: str, roi: Optional[tuple[int, int, int, int]] = None):
+        """Find text using OCR."""
+        matches = self._ocr_find(text, roi, first_only=True)
+        return matches[0] if matches else None
 
-    def _overlaps_any(
-        self,
-        elem: Element,
-        others: list[Element],
-        threshold: float = 0.5
-    ) -> bool:
-        """Check if element overlaps with any in the list."""
-        for other in others:
-            if self._boxes_overlap(elem, other, threshold):
-                return True
-        return False
-
-    def _boxes_overlap(
+    def _find_all_text_ocr(
         self,
-        elem1: Element,
-        elem2: Element,
-        threshold: float
-    ) -> bool:
-        """Check if two elements overlap beyond the threshold."""
-        x1 = max(elem1.x, elem2.x)
-        y1 = max(elem1.y, elem2.y)
-        x2 = min(elem1.x + elem1.width, elem2.x + elem2.width)
-        y2 = min(elem1.y + elem1.height, elem2.y + elem2.height)
-
-        if x1 >= x2 or y1 >= y2:
-            return False
-
-        intersection = (x2 - x1) * (y2 - y1)
-        area1 = elem1.width * elem1.height
-        area2 = elem2.width * elem2.height
-        smaller_area = min(area1, area2)
-
-        if smaller_area == 0:
-            return False
-
-        return intersection / smaller_area >= threshold
+        text: str,
+        max_results: int = 50,
+        roi: Optional[tuple[int, int, int, int]] = None
+    ):
+        """Find all text using OCR."""
+        return self._ocr_find(text, roi)[:max_results]
 
 
 # Convenience functions using default finder
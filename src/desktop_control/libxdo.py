@@ -0,0 +1,349 @@
+"""
+In-process mouse and keyboard control through libxdo.
+
+Binds the library behind xdotool with ctypes so common actions don't
+start an xdotool process each time. One libxdo handle (and X connection)
+is kept per display for the life of the process.
+
+Every function returns None when libxdo can't be used, in which case
+callers fall back to running the xdotool command. Setting
+DESKTOP_CTL_XDOTOOL_CLI=1 forces that fallback, e.g. to compare behavior
+against the xdotool command line.
+"""
+
+import ctypes
+import ctypes.util
+import os
+from typing import Optional
+
+# Set to a non-empty value to skip libxdo and always run xdotool
+XDOTOOL_CLI_ENV = "DESKTOP_CTL_XDOTOOL_CLI"
+
+# Window argument meaning "the focused window / current pointer position"
+CURRENTWINDOW = 0
+
+# Return code for a successful libxdo call
+XDO_SUCCESS = 0
+
+_lib = None
+_load_attempted = False
+
+# libX11, for freeing strings libxdo returns; None if it couldn't be loaded
+_x11 = None
+
+# display -> xdo_t pointer
+_handles: dict[str, int] = {}
+
+
+def _load():
+    """Load libxdo and declare the functions used, once per process."""
+    global _lib, _x11, _load_attempted
+    if _load_attempted:
+        return _lib
+    _load_attempted = True
+
+    if os.environ.get(XDOTOOL_CLI_ENV):
+        return None
+
+    path = ctypes.util.find_library("xdo") or "libxdo.so.3"
+    try:
+        lib = ctypes.CDLL(path)
+    except OSError:
+        return None
+
+    xdo_p = ctypes.c_void_p
+    window = ctypes.c_ulong
+    useconds = ctypes.c_uint
+    int_p = ctypes.POINTER(ctypes.c_int)
+    uint_p = ctypes.POINTER(ctypes.c_uint)
+
+    try:
+        lib.xdo_new.argtypes = [ctypes.c_char_p]
+        lib.xdo_new.restype = xdo_p
+        lib.xdo_free.argtypes = [xdo_p]
+        lib.xdo_free.restype = None
+        lib.xdo_move_mouse.argtypes = [xdo_p, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.xdo_move_mouse.restype = ctypes.c_int
+        lib.xdo_wait_for_mouse_move_to.argtypes = [xdo_p, ctypes.c_int, ctypes.c_int]
+        lib.xdo_wait_for_mouse_move_to.restype = ctypes.c_int
+        lib.xdo_click_window_multiple.argtypes = [
+            xdo_p, window, ctypes.c_int, ctypes.c_int, useconds
+        ]
+        lib.xdo_click_window_multiple.restype = ctypes.c_int
+        lib.xdo_mouse_down.argtypes = [xdo_p, window, ctypes.c_int]
+        lib.xdo_mouse_down.restype = ctypes.c_int
+        lib.xdo_mouse_up.argtypes = [xdo_p, window, ctypes.c_int]
+        lib.xdo_mouse_up.restype = ctypes.c_int
+        lib.xdo_enter_text_window.argtypes = [xdo_p, window, ctypes.c_char_p, useconds]
+        lib.xdo_enter_text_window.restype = ctypes.c_int
+        lib.xdo_send_keysequence_window.argtypes = [
+            xdo_p, window, ctypes.c_char_p, useconds
+        ]
+        lib.xdo_send_keysequence_window.restype = ctypes.c_int
+        lib.xdo_get_mouse_location.argtypes = [xdo_p, int_p, int_p, int_p]
+        lib.xdo_get_mouse_location.restype = ctypes.c_int
+        lib.xdo_get_viewport_dimensions.argtypes = [xdo_p, uint_p, uint_p, ctypes.c_int]
+        lib.xdo_get_viewport_dimensions.restype = ctypes.c_int
+        lib.xdo_get_active_window.argtypes = [xdo_p, ctypes.POINTER(window)]
+        lib.xdo_get_active_window.restype = ctypes.c_int
+        lib.xdo_get_window_name.argtypes = [
+            xdo_p, window, ctypes.POINTER(ctypes.c_void_p), int_p, int_p
+        ]
+        lib.xdo_get_window_name.restype = ctypes.c_int
+        lib.xdo_get_window_location.argtypes = [
+            xdo_p, window, int_p, int_p, ctypes.POINTER(ctypes.c_void_p)
+        ]
+        lib.xdo_get_window_location.restype = ctypes.c_int
+        lib.xdo_get_window_size.argtypes = [xdo_p, window, uint_p, uint_p]
+        lib.xdo_get_window_size.restype = ctypes.c_int
+    except AttributeError:
+        # Too old to provide everything used here
+        return None
+
+    try:
+        x11 = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+        x11.XFree.argtypes = [ctypes.c_void_p]
+        x11.XFree.restype = ctypes.c_int
+        x11.XScreenNumberOfScreen.argtypes = [ctypes.c_void_p]
+        x11.XScreenNumberOfScreen.restype = ctypes.c_int
+        _x11 = x11
+    except (OSError, AttributeError):
+        _x11 = None
+
+    _lib = lib
+    return _lib
+
+
+def _handle(display: str):
+    """Get the libxdo handle for a display, opening it on first use."""
+    lib = _load()
+    if lib is None:
+        return None
+
+    xdo = _handles.get(display)
+    if xdo is None:
+        xdo = lib.xdo_new(display.encode())
+        if not xdo:
+            return None
+        _handles[display] = xdo
+    return xdo
+
+
+def is_available(display: str) -> bool:
+    """Check if libxdo is loaded and can open the display."""
+    return _handle(display) is not None
+
+
+def move_mouse(
+    x: int,
+    y: int,
+    display: str,
+    sync: bool = True
+) -> Optional[bool]:
+    """
+    Move the pointer to screen coordinates.
+
+    Args:
+        x: X coordinate
+        y: Y coordinate
+        display: X display to use
+        sync: Wait until the pointer has arrived (like mousemove --sync)
+
+    Returns:
+        True on success, False on failure, None if libxdo is unavailable
+    """
+    xdo = _handle(display)
+    if xdo is None:
+        return None
+    if _lib.xdo_move_mouse(xdo, x, y, 0) != XDO_SUCCESS:
+        return False
+    if sync:
+        return _lib.xdo_wait_for_mouse_move_to(xdo, x, y) == XDO_SUCCESS
+    return True
+
+
+def click(
+    button: int,
+    display: str,
+    repeat: int = 1,
+    delay_ms: int = 100
+) -> Optional[bool]:
+    """
+    Click a mouse button at the current pointer position.
+
+    Args:
+        button: Button number (1 left, 2 middle, 3 right)
+        display: X display to use
+        repeat: Number of clicks
+        delay_ms: Milliseconds between repeated clicks
+
+    Returns:
+        True on success, False on failure, None if libxdo is unavailable
+    """
+    xdo = _handle(display)
+    if xdo is None:
+        return None
+    return _lib.xdo_click_window_multiple(
+        xdo, CURRENTWINDOW, button, repeat, delay_ms * 1000
+    ) == XDO_SUCCESS
+
+
+def mouse_down(button: int, display: str) -> Optional[bool]:
+    """
+    Press a mouse button at the current pointer position.
+
+    Args:
+        button: Button number (1 left, 2 middle, 3 right)
+        display: X display to use
+
+    Returns:
+        True on success, False on failure, None if libxdo is unavailable
+    """
+    xdo = _handle(display)
+    if xdo is None:
+        return None
+    return _lib.xdo_mouse_down(xdo, CURRENTWINDOW, button) == XDO_SUCCESS
+
+
+def mouse_up(button: int, display: str) -> Optional[bool]:
+    """
+    Release a mouse button at the current pointer position.
+
+    Args:
+        button: Button number (1 left, 2 middle, 3 right)
+        display: X display to use
+
+    Returns:
+        True on success, False on failure, None if libxdo is unavailable
+    """
+    xdo = _handle(display)
+    if xdo is None:
+        return None
+    return _lib.xdo_mouse_up(xdo, CURRENTWINDOW, button) == XDO_SUCCESS
+
+
+def enter_text(text: str, display: str, delay_ms: int = 12) -> Optional[bool]:
+    """
+    Type text into the focused window.
+
+    Args:
+        text: Text to type
+        display: X display to use
+        delay_ms: Milliseconds between keystrokes
+
+    Returns:
+        True on success, False on failure, None if libxdo is unavailable
+    """
+    xdo = _handle(display)
+    if xdo is None:
+        return None
+    return _lib.xdo_enter_text_window(
+        xdo, CURRENTWINDOW, text.encode(), delay_ms * 1000
+    ) == XDO_SUCCESS
+
+
+def send_keysequence(
+    keys: str,
+    display: str,
+    delay_ms: int = 12
+) -> Optional[bool]:
+    """
+    Press a key or key combination (e.g., "ctrl+a").
+
+    Args:
+        keys: Key sequence in xdotool syntax
+        display: X display to use
+        delay_ms: Milliseconds between key events
+
+    Returns:
+        True on success, False on failure, None if libxdo is unavailable
+    """
+    xdo = _handle(display)
+    if xdo is None:
+        return None
+    return _lib.xdo_send_keysequence_window(
+        xdo, CURRENTWINDOW, keys.encode(), delay_ms * 1000
+    ) == XDO_SUCCESS
+
+
+def get_mouse_location(display: str) -> Optional[tuple[int, int]]:
+    """
+    Get the pointer position.
+
+    Returns:
+        (x, y), or None if libxdo is unavailable or the query failed
+    """
+    xdo = _handle(display)
+    if xdo is None:
+        return None
+    x, y, screen = ctypes.c_int(), ctypes.c_int(), ctypes.c_int()
+    if _lib.xdo_get_mouse_location(
+        xdo, ctypes.byref(x), ctypes.byref(y), ctypes.byref(screen)
+    ) != XDO_SUCCESS:
+        return None
+    return (x.value, y.value)
+
+
+def get_viewport_dimensions(display: str) -> Optional[tuple[int, int]]:
+    """
+    Get the screen size, as reported by xdotool getdisplaygeometry.
+
+    Returns:
+        (width, height), or None if libxdo is unavailable or the query failed
+    """
+    xdo = _handle(display)
+    if xdo is None:
+        return None
+    width, height = ctypes.c_uint(), ctypes.c_uint()
+    if _lib.xdo_get_viewport_dimensions(
+        xdo, ctypes.byref(width), ctypes.byref(height), 0
+    ) != XDO_SUCCESS:
+        return None
+    return (width.value, height.value)
+
+
+def get_active_window(display: str) -> Optional[tuple[str, dict]]:
+    """
+    Get the focused window's name and geometry.
+
+    Returns:
+        (name, geometry) where geometry has the lowercase keys of
+        xdotool getwindowgeometry --shell (window, x, y, width, height,
+        screen), or None if libxdo is unavailable or a query failed
+    """
+    xdo = _handle(display)
+    if xdo is None or _x11 is None:
+        return None
+
+    wid = ctypes.c_ulong()
+    if _lib.xdo_get_active_window(xdo, ctypes.byref(wid)) != XDO_SUCCESS:
+        return None
+
+    name_ptr = ctypes.c_void_p()
+    name_len, name_type = ctypes.c_int(), ctypes.c_int()
+    if _lib.xdo_get_window_name(
+        xdo, wid, ctypes.byref(name_ptr), ctypes.byref(name_len), ctypes.byref(name_type)
+    ) != XDO_SUCCESS:
+        return None
+    name = ""
+    if name_ptr.value:
+        name = ctypes.string_at(name_ptr.value, name_len.value).decode("utf-8", "replace")
+        _x11.XFree(name_ptr)
+
+    x, y, screen = ctypes.c_int(), ctypes.c_int(), ctypes.c_void_p()
+    width, height = ctypes.c_uint(), ctypes.c_uint()
+    if _lib.xdo_get_window_location(
+        xdo, wid, ctypes.byref(x), ctypes.byref(y), ctypes.byref(screen)
+    ) != XDO_SUCCESS or _lib.xdo_get_window_size(
+        xdo, wid, ctypes.byref(width), ctypes.byref(height)
+    ) != XDO_SUCCESS:
+        return None
+
+    return name, {
+        "window": wid.value,
+        "x": x.value,
+        "y": y.value,
+        "width": width.value,
+        "height": height.value,
+        "screen": _x11.XScreenNumberOfScreen(screen) if screen.value else 0,
+    }
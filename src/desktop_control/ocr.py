@@ -5,20 +5,40 @@ Provides fallback element finding when AT-SPI is unavailable or
 doesn't expose the needed elements.
 """
 
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Union
+import hashlib
+import math
+import os
 import re
+import threading
+
+# Tesseract's OpenMP threading costs more than it gains on the small,
+# sparse images used here. libgomp reads the limit when it loads with the
+# imports below, so it is only in os.environ for them; the tesseract
+# binary gets it through _TesseractEnv. Other child processes never
+# see it.
+OMP_THREAD_LIMIT = "1"
+_set_omp_limit = "OMP_THREAD_LIMIT" not in os.environ
+if _set_omp_limit:
+    os.environ["OMP_THREAD_LIMIT"] = OMP_THREAD_LIMIT
 
 # OCR imports
 try:
     import pytesseract
-    from PIL import Image
+    from PIL import Image, ImageChops
     import numpy as np
     TESSERACT_AVAILABLE = True
 except ImportError:
     TESSERACT_AVAILABLE = False
     pytesseract = None
     Image = None
+    ImageChops = None
     np = None
 
 try:
@@ -28,6 +48,55 @@ except ImportError:
     CV2_AVAILABLE = False
     cv2 = None
 
+# Optional in-process Tesseract bindings; avoids starting the tesseract
+# binary for every OCR call
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+    tesserocr = None
+
+if _set_omp_limit:
+    del os.environ["OMP_THREAD_LIMIT"]
+
+
+class _TesseractEnv(Mapping):
+    """The current os.environ plus OMP_THREAD_LIMIT, for the tesseract binary."""
+
+    def _env(self) -> dict:
+        return {"OMP_THREAD_LIMIT": OMP_THREAD_LIMIT, **os.environ}
+
+    def __getitem__(self, key):
+        return self._env()[key]
+
+    def __iter__(self):
+        return iter(self._env())
+
+    def __len__(self):
+        return len(self._env())
+
+
+# pytesseract starts tesseract with its module's environ, not an argument
+if TESSERACT_AVAILABLE and hasattr(pytesseract.pytesseract, "environ"):
+    pytesseract.pytesseract.environ = _TesseractEnv()
+
+# Optional fast non-cryptographic hash for OCR cache keys
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+    xxhash = None
+
+# Optional multi-pattern regex engine for find_text_regex_multi
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+    hyperscan = None
+
 
 @dataclass
 class OCRMatch:
@@ -65,6 +134,55 @@ class OCRResult:
     """Full OCR result with all detected text."""
     words: list[OCRMatch] = field(default_factory=list)
     full_text: str = ""
+    _texts: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _phrase_indexes: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def texts(self, case_sensitive: bool) -> list[str]:
+        """
+        Get the word texts, in word order.
+
+        Built once per result and case mode, so searches on a cached
+        result don't lowercase every word again.
+
+        Args:
+            case_sensitive: Keep the original case (otherwise lowercased)
+
+        Returns:
+            One string per word
+        """
+        texts = self._texts.get(case_sensitive)
+        if texts is None:
+            texts = [w.text if case_sensitive else w.text.lower() for w in self.words]
+            self._texts[case_sensitive] = texts
+        return texts
+
+    def phrase_index(self, case_sensitive: bool) -> tuple[str, list[int], list[int]]:
+        """
+        Get the words joined by spaces, with each word's start and end offset.
+
+        Built once per result and case mode, so repeated phrase searches
+        on a cached result only scan one string.
+
+        Args:
+            case_sensitive: Keep the original case (otherwise lowercased)
+
+        Returns:
+            (joined text, word start offsets, word end offsets)
+        """
+        index = self._phrase_indexes.get(case_sensitive)
+        if index is None:
+            texts = self.texts(case_sensitive)
+            starts = []
+            ends = []
+            offset = 0
+            for text in texts:
+                starts.append(offset)
+                offset += len(text)
+                ends.append(offset)
+                offset += 1
+            index = (" ".join(texts), starts, ends)
+            self._phrase_indexes[case_sensitive] = index
+        return index
 
     def to_dict(self) -> dict:
         return {
@@ -73,6 +191,360 @@ class OCRResult:
         }
 
 
+# Wider images are downscaled by an integer factor before OCR; Tesseract
+# time grows with pixel count and UI text on larger (HiDPI) screens stays
+# readable at this width
+OCR_MAX_WIDTH = 1920
+
+# Padding around changed pixels when re-reading only part of a frame
+OCR_REGION_MARGIN = 8
+
+# Changed areas larger than this fraction of the frame get a full OCR pass
+OCR_REGION_MAX_FRACTION = 0.25
+
+# When the changed pixels span too much of the frame as one box, they are
+# split into separate regions on a grid of cells this size, so two small
+# changes far apart (a clock and a caret) don't force a full OCR pass
+OCR_REGION_CELL = 32
+
+# With upscale="auto", small images are only upscaled when their text is
+# shorter than this many pixels; larger (HiDPI) text gains nothing from
+# it and upscaling multiplies Tesseract's work
+OCR_MIN_TEXT_HEIGHT = 12
+
+# With upscale="auto", images this large in either dimension are never
+# upscaled
+OCR_UPSCALE_MAX_SIZE = 1600
+
+# Results of recent OCR runs keyed on (frame digest, settings). Polling
+# callers usually OCR the same static screen repeatedly, or flip between a
+# few states (a blinking caret, a spinner), so repeats reuse the result
+# instead of running Tesseract again.
+OCR_CACHE_SIZE = 32
+_ocr_cache: "OrderedDict[tuple, OCRResult]" = OrderedDict()
+
+# Words read from two overlapping tiles with a larger intersection over
+# union than this are the same word; the more confident reading is kept
+TILE_DEDUP_IOU = 0.7
+
+# Runs Tesseract on the tiles of one image in parallel. Each call is
+# single-threaded (OMP_THREAD_LIMIT above), so one worker per core.
+_tile_executor: Optional[ThreadPoolExecutor] = None
+
+# Most recent OCR run as (image, params, OCRResult), the baseline for
+# re-reading only the changed region of the next frame
+_last_ocr: Optional[tuple] = None
+
+# Guards _ocr_cache and _last_ocr, which finder updates from background
+# threads as well as the caller's
+_ocr_cache_lock = threading.Lock()
+
+
+def _frame_key(image: "Image.Image", params: tuple) -> tuple:
+    """Build an OCR cache key from the image's pixels and OCR settings."""
+    data = image.tobytes()
+    if XXHASH_AVAILABLE:
+        digest = xxhash.xxh3_128_digest(data)
+    else:
+        digest = hashlib.sha256(data).digest()
+    return (digest, image.size, image.mode, params)
+
+
+# Environment variable naming a tessdata directory to load models from
+# instead of Tesseract's default, e.g. a tessdata_fast checkout, whose
+# integer LSTM models are much faster than tessdata_best on UI text
+TESSDATA_ENV = "DESKTOP_CTL_TESSDATA"
+
+# OCR engine mode: LSTM only (1), skipping the legacy engine
+OCR_ENGINE_MODE = 1
+
+# Tesseract variables set on every run. UI labels are rarely dictionary
+# words, and the word lists slow LSTM decoding down without helping it.
+TESSERACT_VARIABLES = {
+    "load_system_dawg": "0",
+    "load_freq_dawg": "0",
+    "preserve_interword_spaces": "1",
+}
+
+# Page segmentation modes picked by auto_psm for crops of these sizes.
+# Sparse text (11) runs full layout analysis and is the slowest mode, so
+# it is kept for large areas where the layout is unknown.
+PSM_WORD_MAX_AREA = 8000
+PSM_LINE_MIN_ASPECT = 5.0
+PSM_LINE_MAX_HEIGHT = 64
+PSM_BLOCK_MAX_AREA = 60000
+
+# psm -> initialized tesserocr API, reused across calls. The API is not
+# thread-safe, so all use goes through _tesserocr_lock.
+_tesserocr_apis: dict = {}
+_tesserocr_lock = threading.Lock()
+
+
+def _tesserocr_api(psm: int):
+    """Get the tesserocr API for a psm, loading the model on first use."""
+    api = _tesserocr_apis.get(psm)
+    if api is None:
+        kwargs = {
+            "psm": psm,
+            "oem": tesserocr.OEM(OCR_ENGINE_MODE),
+            "variables": TESSERACT_VARIABLES,
+        }
+        tessdata = os.environ.get(TESSDATA_ENV)
+        if tessdata:
+            kwargs["path"] = tessdata
+        api = tesserocr.PyTessBaseAPI(**kwargs)
+        _tesserocr_apis[psm] = api
+    return api
+
+
+def preload(psm: int = 11) -> bool:
+    """
+    Load the in-process Tesseract model ahead of the first OCR call.
+
+    Meant for long-running processes (the daemon), so no command pays
+    for the model load. A configured GPU backend is loaded instead.
+
+    Args:
+        psm: Page segmentation mode to load (11 = sparse text, as used
+             by ocr_image)
+
+    Returns:
+        True if a GPU backend or tesserocr API is ready
+    """
+    if not TESSERACT_AVAILABLE:
+        return False
+    if _get_gpu_backend() is not None:
+        return True
+    if not TESSEROCR_AVAILABLE:
+        return False
+    try:
+        with _tesserocr_lock:
+            _tesserocr_api(psm)
+    except Exception:
+        return False
+    return True
+
+
+def _new_word_data() -> dict:
+    """Empty pytesseract-style word data."""
+    return {"text": [], "conf": [], "left": [], "top": [], "width": [], "height": []}
+
+
+def _read_tesserocr_words(api, data: dict) -> dict:
+    """
+    Append the words of the last tesserocr Recognize() call to data.
+
+    Args:
+        api: tesserocr API that has just recognized an image
+        data: Word data to append to (see _tesserocr_image_to_data)
+
+    Returns:
+        data
+    """
+    iterator = api.GetIterator()
+    if iterator is None:
+        return data
+
+    level = tesserocr.RIL.WORD
+    for word in tesserocr.iterate_level(iterator, level):
+        box = word.BoundingBox(level)
+        if box is None:
+            continue
+        x1, y1, x2, y2 = box
+        data["text"].append(word.GetUTF8Text(level) or "")
+        data["conf"].append(word.Confidence(level))
+        data["left"].append(x1)
+        data["top"].append(y1)
+        data["width"].append(x2 - x1)
+        data["height"].append(y2 - y1)
+    return data
+
+
+# PIL mode -> bytes per pixel for raw buffers handed to tesserocr
+_RAW_IMAGE_MODES = {"L": 1, "RGB": 3, "RGBA": 4}
+
+
+def _set_tesserocr_image(api, image: "Image.Image") -> None:
+    """
+    Hand an image to tesserocr as raw pixels.
+
+    tesserocr's SetImage encodes a PIL image to BMP or PNG for Leptonica
+    to decode again. SetImageBytes takes the pixel buffer as is.
+
+    Args:
+        api: tesserocr API
+        image: PIL Image object
+    """
+    bpp = _RAW_IMAGE_MODES.get(image.mode)
+    if bpp is None:
+        api.SetImage(image)
+        return
+    w, h = image.size
+    api.SetImageBytes(image.tobytes(), w, h, bpp, w * bpp)
+
+
+def _tesserocr_image_to_data(image: "Image.Image", psm: int) -> dict:
+    """
+    Run OCR through tesserocr and return pytesseract-style word data.
+
+    Args:
+        image: PIL Image object
+        psm: Page segmentation mode
+
+    Returns:
+        Dict with text, conf, left, top, width and height lists, matching
+        pytesseract.image_to_data(output_type=Output.DICT)
+    """
+    with _tesserocr_lock:
+        api = _tesserocr_api(psm)
+        _set_tesserocr_image(api, image)
+        api.Recognize()
+        return _read_tesserocr_words(api, _new_word_data())
+
+
+# Environment variable naming a GPU OCR backend to use instead of
+# Tesseract: "paddleocr" or "easyocr". Tesseract is still used when the
+# package or a CUDA device is missing, or the backend fails on an image.
+OCR_BACKEND_ENV = "DESKTOP_CTL_OCR_BACKEND"
+
+# (backend name, loaded model) for the GPU backend, loaded on first use.
+# Inference goes through _gpu_lock; the models are not thread-safe.
+_gpu_backend: Optional[tuple] = None
+_gpu_load_attempted = False
+_gpu_lock = threading.Lock()
+
+
+def _get_gpu_backend() -> Optional[tuple]:
+    """
+    Load the GPU OCR backend named by OCR_BACKEND_ENV, once per process.
+
+    Returns:
+        (backend name, model), or None to use Tesseract
+    """
+    global _gpu_backend, _gpu_load_attempted
+    if _gpu_load_attempted:
+        return _gpu_backend
+
+    with _gpu_lock:
+        if _gpu_load_attempted:
+            return _gpu_backend
+        backend = os.environ.get(OCR_BACKEND_ENV, "tesseract").strip().lower()
+        try:
+            if backend == "paddleocr":
+                import paddle
+                from paddleocr import PaddleOCR
+                if paddle.device.is_compiled_with_cuda() and paddle.device.cuda.device_count():
+                    model = PaddleOCR(
+                        use_angle_cls=False, lang="en", use_gpu=True,
+                        precision="fp16", show_log=False
+                    )
+                    _gpu_backend = (backend, model)
+            elif backend == "easyocr":
+                import torch
+                import easyocr
+                if torch.cuda.is_available():
+                    model = easyocr.Reader(
+                        ["en"], gpu=True, cudnn_benchmark=True, verbose=False
+                    )
+                    _gpu_backend = (backend, model)
+        except Exception:
+            _gpu_backend = None
+        _gpu_load_attempted = True
+    return _gpu_backend
+
+
+def _split_line_words(
+    text: str,
+    points,
+    confidence: float
+) -> list[tuple[str, int, int, int, int, float]]:
+    """
+    Split a line read by a GPU backend into approximate word boxes.
+
+    Both backends box whole lines or phrases, while OCRResult holds
+    words. Each word gets the slice of the line's box that its
+    characters cover, assuming equal character widths.
+
+    Args:
+        text: Line text
+        points: Corner points of the line's box
+        confidence: Line confidence (0-100)
+
+    Returns:
+        (text, x, y, width, height, confidence) per word
+    """
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    left, top = min(xs), min(ys)
+    width, height = max(xs) - left, max(ys) - top
+    if not text:
+        return []
+
+    char_width = width / len(text)
+    words = []
+    for match in re.finditer(r"\S+", text):
+        x = left + match.start() * char_width
+        w = (match.end() - match.start()) * char_width
+        words.append((match.group(), int(x), int(top), int(w), int(height), confidence))
+    return words
+
+
+def _run_gpu_ocr(
+    backend: tuple,
+    image: "Image.Image",
+    min_confidence: float,
+    offset: tuple[int, int] = (0, 0)
+) -> Optional[list[OCRMatch]]:
+    """
+    OCR an image with the GPU backend.
+
+    The backends' detectors work on the unprocessed image, so no
+    thresholding or upscaling is done, and psm does not apply.
+
+    Args:
+        backend: (backend name, model) from _get_gpu_backend
+        image: PIL Image object
+        min_confidence: Minimum confidence threshold (0-100)
+        offset: (x, y) added to every word box, for cropped images
+
+    Returns:
+        List of OCRMatch objects in reading order, or None if the
+        backend failed
+    """
+    name, model = backend
+    arr = np.asarray(image.convert("RGB"))
+    lines = []
+    try:
+        with _gpu_lock:
+            if name == "paddleocr":
+                # PaddleOCR takes OpenCV-style BGR arrays
+                pages = model.ocr(np.ascontiguousarray(arr[:, :, ::-1]), cls=False)
+                for points, (text, score) in (pages[0] if pages else None) or []:
+                    lines.append((text, points, score * 100))
+            else:
+                for points, text, score in model.readtext(arr):
+                    lines.append((text, points, score * 100))
+    except Exception:
+        return None
+
+    words = []
+    for text, points, score in lines:
+        if score < min_confidence:
+            continue
+        for word, x, y, w, h, conf in _split_line_words(text.strip(), points, score):
+            words.append(OCRMatch(
+                text=word,
+                x=x + offset[0],
+                y=y + offset[1],
+                width=w,
+                height=h,
+                confidence=conf
+            ))
+    # Backends return lines in detection order; sort into reading order
+    words.sort(key=lambda w: (w.y, w.x))
+    return words
+
+
 def is_available() -> bool:
     """Check if OCR is available on this system."""
     if not TESSERACT_AVAILABLE:
@@ -84,13 +556,98 @@ def is_available() -> bool:
         return False
 
 
-def preprocess_image(image: "Image.Image", upscale: bool = True) -> "Image.Image":
+def _is_small(w: int, h: int) -> bool:
+    """Check if an image is small enough to be considered for upscaling."""
+    return w < 1000 or h < 500
+
+
+def _threshold(arr: "np.ndarray", in_place: bool = False) -> "np.ndarray":
+    """Apply an adaptive threshold for better contrast."""
+    return cv2.adaptiveThreshold(
+        arr,
+        255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY,
+        11,
+        2,
+        dst=arr if in_place else None
+    )
+
+
+def _text_height(binary: "np.ndarray") -> Optional[float]:
+    """
+    Estimate the height of the text in a thresholded image.
+
+    Takes the median height of the dark connected components of glyph
+    size: the letters themselves for dark text, or the dark outlines the
+    threshold leaves around light text.
+
+    Args:
+        binary: Thresholded uint8 array
+
+    Returns:
+        Height in pixels, or None if nothing looks like text
+    """
+    _, _, stats, _ = cv2.connectedComponentsWithStats(cv2.bitwise_not(binary), connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    glyphs = (heights >= 3) & (heights <= 100) & (widths <= 100)
+    if not glyphs.any():
+        return None
+    return float(np.median(heights[glyphs]))
+
+
+def _preprocess_array(image: "Image.Image", upscale: Union[bool, str]) -> "np.ndarray":
+    """
+    Grayscale, upscale and threshold an image as one uint8 array with cv2.
+
+    Args:
+        image: PIL Image object
+        upscale: Whether to upscale small images, or "auto" (see
+                 preprocess_image)
+
+    Returns:
+        Binarized grayscale array
+    """
+    gray = image if image.mode == "L" else image.convert("L")
+    arr = np.asarray(gray, dtype=np.uint8)
+
+    h, w = arr.shape
+    if upscale == "auto":
+        # Threshold at the original size first; that's the result unless
+        # the text turns out to be small
+        binary = _threshold(arr)
+        if not _is_small(w, h) or max(w, h) >= OCR_UPSCALE_MAX_SIZE:
+            return binary
+        height = _text_height(binary)
+        if height is None or height >= OCR_MIN_TEXT_HEIGHT:
+            return binary
+    elif not (upscale and _is_small(w, h)):
+        # asarray of a PIL image may be a read-only view, so not in place
+        return _threshold(arr)
+
+    scale = max(2, min(4, 2000 // w))
+    arr = cv2.resize(arr, (w * scale, h * scale), interpolation=cv2.INTER_CUBIC)
+    return _threshold(arr, in_place=True)
+
+
+def preprocess_image(
+    image: "Image.Image",
+    upscale: Union[bool, str] = "auto"
+) -> "Image.Image":
     """
     Preprocess image for better OCR results.
 
+    With OpenCV the whole chain runs on a single NumPy array and is
+    converted back to PIL once at the end. Without it, Pillow converts
+    and scales and a numba kernel thresholds, if numba is installed.
+
     Args:
         image: PIL Image object
-        upscale: Whether to upscale small images
+        upscale: Whether to upscale small images. "auto" upscales them
+                 only if their text is under OCR_MIN_TEXT_HEIGHT pixels
+                 (measured with OpenCV) and neither side reaches
+                 OCR_UPSCALE_MAX_SIZE
 
     Returns:
         Preprocessed PIL Image
@@ -98,88 +655,86 @@ def preprocess_image(image: "Image.Image", upscale: bool = True) -> "Image.Image
     if not TESSERACT_AVAILABLE:
         return image
 
-    # Convert to grayscale
-    if image.mode != "L":
-        gray = image.convert("L")
-    else:
-        gray = image.copy()
-
-    # Upscale if image is small
-    if upscale:
-        w, h = gray.size
-        if w < 1000 or h < 500:
-            scale = max(2, min(4, 2000 // w))
-            gray = gray.resize(
-                (w * scale, h * scale),
-                Image.Resampling.LANCZOS
-            )
-
-    # Apply adaptive threshold if OpenCV is available
     if CV2_AVAILABLE:
         try:
-            img_array = np.array(gray)
-
-            # Apply adaptive threshold for better contrast
-            thresh = cv2.adaptiveThreshold(
-                img_array,
-                255,
-                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY,
-                11,
-                2
-            )
-
-            return Image.fromarray(thresh)
+            return Image.fromarray(_preprocess_array(image, upscale))
         except Exception:
             pass
 
-    return gray
+    # Convert to grayscale; nothing below modifies the image in place
+    gray = image if image.mode == "L" else image.convert("L")
+
+    # Upscale if image is small (text height can't be measured here)
+    w, h = gray.size
+    if upscale == "auto":
+        upscale = max(w, h) < OCR_UPSCALE_MAX_SIZE
+    if upscale and _is_small(w, h):
+        scale = max(2, min(4, 2000 // w))
+        gray = gray.resize(
+            (w * scale, h * scale),
+            Image.Resampling.LANCZOS
+        )
 
+    # Threshold with the numba kernel if installed (mean rather than
+    # Gaussian weighting, same block size and offset)
+    try:
+        from ._threshold_kernel import mean_threshold
+    except ImportError:
+        return gray
+    try:
+        return Image.fromarray(mean_threshold(np.asarray(gray, dtype=np.uint8), 11, 2))
+    except Exception:
+        return gray
 
-def ocr_image(
+
+def _prepare_image(
     image: "Image.Image",
-    preprocess: bool = True,
-    psm: int = 11,
-    min_confidence: float = 30.0
-) -> OCRResult:
+    preprocess: bool
+) -> tuple["Image.Image", float, float]:
     """
-    Perform OCR on an image and return word-level results.
+    Downscale and preprocess an image for Tesseract.
 
     Args:
         image: PIL Image object
         preprocess: Whether to preprocess the image
-        psm: Page segmentation mode (11 = sparse text)
-        min_confidence: Minimum confidence threshold (0-100)
 
     Returns:
-        OCRResult with detected words
+        (image to OCR, x scale, y scale) where the scales map its
+        coordinates back to the original image
     """
-    if not TESSERACT_AVAILABLE:
-        return OCRResult()
+    processed = image
+    if image.width > OCR_MAX_WIDTH:
+        # reduce() is a box filter in C, much cheaper than resize()
+        processed = image.reduce(math.ceil(image.width / OCR_MAX_WIDTH))
 
     # Preprocess if requested
     if preprocess:
-        processed = preprocess_image(image)
-    else:
-        processed = image
+        processed = preprocess_image(processed)
 
     # Get scaling factor if image was resized
-    scale_x = image.width / processed.width
-    scale_y = image.height / processed.height
+    return processed, image.width / processed.width, image.height / processed.height
 
-    # Perform OCR with data output
-    try:
-        config = f"--psm {psm}"
-        data = pytesseract.image_to_data(
-            processed,
-            config=config,
-            output_type=pytesseract.Output.DICT
-        )
-    except Exception:
-        return OCRResult()
 
+def _collect_words(
+    data: dict,
+    scale: tuple[float, float],
+    offset: tuple[int, int],
+    min_confidence: float
+) -> list[OCRMatch]:
+    """
+    Turn pytesseract-style word data into confident OCRMatch objects.
+
+    Args:
+        data: Word data from Tesseract
+        scale: (x, y) factors back to the original image size
+        offset: (x, y) added to every word box, for cropped images
+        min_confidence: Minimum confidence threshold (0-100)
+
+    Returns:
+        List of OCRMatch objects in Tesseract's order
+    """
+    scale_x, scale_y = scale
     words = []
-    full_text_parts = []
 
     n_boxes = len(data["text"])
     for i in range(n_boxes):
@@ -192,8 +747,8 @@ def ocr_image(
             continue
 
         # Scale coordinates back to original image size
-        x = int(data["left"][i] * scale_x)
-        y = int(data["top"][i] * scale_y)
+        x = int(data["left"][i] * scale_x) + offset[0]
+        y = int(data["top"][i] * scale_y) + offset[1]
         w = int(data["width"][i] * scale_x)
         h = int(data["height"][i] * scale_y)
 
@@ -203,16 +758,532 @@ def ocr_image(
             y=y,
             width=w,
             height=h,
-            confidence=conf,
-            word_index=len(words)
+            confidence=conf
+        ))
+
+    return words
+
+
+def _run_tesseract(
+    image: "Image.Image",
+    preprocess: bool,
+    psm: int,
+    min_confidence: float,
+    offset: tuple[int, int] = (0, 0)
+) -> Optional[list[OCRMatch]]:
+    """
+    Run Tesseract on an image and collect confident words.
+
+    If a GPU backend is configured (see OCR_BACKEND_ENV), it reads the
+    image instead, with Tesseract as the fallback.
+
+    Args:
+        image: PIL Image object
+        preprocess: Whether to preprocess the image
+        psm: Page segmentation mode
+        min_confidence: Minimum confidence threshold (0-100)
+        offset: (x, y) added to every word box, for cropped images
+
+    Returns:
+        List of OCRMatch objects, or None if Tesseract failed
+    """
+    backend = _get_gpu_backend()
+    if backend is not None:
+        words = _run_gpu_ocr(backend, image, min_confidence, offset)
+        if words is not None:
+            return words
+
+    processed, scale_x, scale_y = _prepare_image(image, preprocess)
+
+    # Perform OCR with data output, in-process when tesserocr is installed
+    try:
+        if TESSEROCR_AVAILABLE:
+            data = _tesserocr_image_to_data(processed, psm)
+        else:
+            config = f"--psm {psm} --oem {OCR_ENGINE_MODE}" + "".join(
+                f" -c {name}={value}" for name, value in TESSERACT_VARIABLES.items()
+            )
+            tessdata = os.environ.get(TESSDATA_ENV)
+            if tessdata:
+                config += f' --tessdata-dir "{tessdata}"'
+            data = pytesseract.image_to_data(
+                processed,
+                config=config,
+                output_type=pytesseract.Output.DICT
+            )
+    except Exception:
+        return None
+
+    return _collect_words(data, (scale_x, scale_y), offset, min_confidence)
+
+
+def _get_tile_executor() -> ThreadPoolExecutor:
+    """Get or create the tile OCR executor."""
+    global _tile_executor
+    if _tile_executor is None:
+        _tile_executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1, thread_name_prefix="ocr-tile"
+        )
+    return _tile_executor
+
+
+def _iou(a: OCRMatch, b: OCRMatch) -> float:
+    """Intersection over union of two word boxes."""
+    inter_w = min(a.x + a.width, b.x + b.width) - max(a.x, b.x)
+    inter_h = min(a.y + a.height, b.y + b.height) - max(a.y, b.y)
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    return inter / (a.width * a.height + b.width * b.height - inter)
+
+
+def _run_tesseract_tiles(
+    image: "Image.Image",
+    tiles: tuple[tuple[int, int, int, int], ...],
+    preprocess: bool,
+    psm: int,
+    min_confidence: float
+) -> Optional[list[OCRMatch]]:
+    """
+    Run Tesseract on several crops of an image in parallel.
+
+    With tesserocr the shared API serializes the tiles, so the speedup
+    comes from the pytesseract path, which runs one process per tile.
+
+    Args:
+        image: PIL Image object
+        tiles: (left, top, right, bottom) boxes to read; may overlap
+        preprocess: Whether to preprocess the image
+        psm: Page segmentation mode
+        min_confidence: Minimum confidence threshold (0-100)
+
+    Returns:
+        Words from all tiles in tile order, with words read twice in
+        overlapping areas reduced to one, or None if Tesseract failed
+    """
+    executor = _get_tile_executor()
+    futures = [
+        executor.submit(
+            _run_tesseract, image.crop(tile), preprocess, psm, min_confidence,
+            (tile[0], tile[1])
+        )
+        for tile in tiles
+    ]
+    tile_words = [future.result() for future in futures]
+    if any(words is None for words in tile_words):
+        return None
+
+    words: list[OCRMatch] = []
+    for tile_index, found in enumerate(tile_words):
+        # Words within one tile never duplicate each other
+        earlier = len(words)
+        for word in found:
+            duplicate = None
+            if tile_index:
+                duplicate = next(
+                    (i for i in range(earlier) if _iou(words[i], word) > TILE_DEDUP_IOU),
+                    None
+                )
+            if duplicate is None:
+                words.append(word)
+            elif word.confidence > words[duplicate].confidence:
+                words[duplicate] = word
+    return words
+
+
+def _changed_grid(diff: "np.ndarray", cell: int) -> "np.ndarray":
+    """
+    Mark which cell x cell cells of a difference array have changed pixels.
+
+    Uses the numba kernel if installed, which scans the array once with
+    no temporaries.
+
+    Args:
+        diff: (H, W) or (H, W, C) array, nonzero where frames differ
+        cell: Cell size in pixels
+
+    Returns:
+        Bool array with one entry per cell, partial edge cells included
+    """
+    try:
+        from ._diff_kernel import changed_grid
+    except ImportError:
+        pass
+    else:
+        return changed_grid(diff if diff.ndim == 3 else diff[:, :, None], cell)
+
+    mask = diff.any(axis=2) if diff.ndim == 3 else diff != 0
+    h, w = mask.shape
+    mask = np.pad(mask, ((0, -h % cell), (0, -w % cell)))
+    return mask.reshape(mask.shape[0] // cell, cell, mask.shape[1] // cell, cell).any(axis=(1, 3))
+
+
+def _changed_cells(
+    diff: "Image.Image",
+    bbox: tuple[int, int, int, int]
+) -> list[tuple[int, int, int, int]]:
+    """
+    Split the changed pixels of a difference image into separate boxes.
+
+    Pixels are grouped into OCR_REGION_CELL cells and edge-adjacent
+    changed cells into one box.
+
+    Args:
+        diff: Difference between two frames
+        bbox: Bounding box of all changed pixels in diff
+
+    Returns:
+        (left, top, right, bottom) boxes covering every changed pixel
+    """
+    left, top, right, bottom = bbox
+    cell = OCR_REGION_CELL
+    grid = _changed_grid(np.asarray(diff.crop(bbox)), cell)
+
+    cells = {(int(r), int(c)) for r, c in zip(*np.nonzero(grid))}
+    boxes = []
+    while cells:
+        stack = [cells.pop()]
+        r0, c0 = r1, c1 = stack[0]
+        while stack:
+            r, c = stack.pop()
+            r0, r1, c0, c1 = min(r0, r), max(r1, r), min(c0, c), max(c1, c)
+            for neighbor in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if neighbor in cells:
+                    cells.remove(neighbor)
+                    stack.append(neighbor)
+        boxes.append((
+            left + c0 * cell,
+            top + r0 * cell,
+            min(left + (c1 + 1) * cell, right),
+            min(top + (r1 + 1) * cell, bottom),
         ))
+    return boxes
+
+
+def _grow_over_words(
+    box: tuple[int, int, int, int],
+    words: list[OCRMatch]
+) -> tuple[int, int, int, int]:
+    """Grow a box until it fully covers every word it touches."""
+    left, top, right, bottom = box
+
+    # Growing the box can touch further words, so repeat until stable
+    grown = True
+    while grown:
+        grown = False
+        for word in words:
+            if (word.x < right and word.x + word.width > left and
+                    word.y < bottom and word.y + word.height > top):
+                new_box = (
+                    min(left, word.x),
+                    min(top, word.y),
+                    max(right, word.x + word.width),
+                    max(bottom, word.y + word.height),
+                )
+                if new_box != (left, top, right, bottom):
+                    left, top, right, bottom = new_box
+                    grown = True
+    return (left, top, right, bottom)
+
+
+def _merge_touching(
+    boxes: list[tuple[int, int, int, int]]
+) -> list[tuple[int, int, int, int]]:
+    """Replace intersecting boxes by their union until none intersect."""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    boxes[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
+
+
+def _changed_regions(
+    image: "Image.Image",
+    previous: "Image.Image",
+    previous_words: list[OCRMatch]
+) -> Optional[list[tuple[int, int, int, int]]]:
+    """
+    Find the areas to re-OCR after small changes between two frames.
+
+    The bounding box of changed pixels (or, if that is too large, each
+    separate cluster of changed cells) is padded by OCR_REGION_MARGIN and
+    grown to cover any previously detected word it touches, so a word is
+    either re-read whole or kept whole. Regions that end up intersecting
+    are merged.
+
+    Args:
+        image: Current frame
+        previous: Frame the previous words were read from
+        previous_words: Words detected in the previous frame
+
+    Returns:
+        Disjoint (left, top, right, bottom) boxes, or None if a full OCR
+        pass is needed
+    """
+    if image.size != previous.size or image.mode != previous.mode:
+        return None
+    try:
+        diff = ImageChops.difference(image, previous)
+        bbox = diff.getbbox()
+    except ValueError:
+        return None
+    if bbox is None:
+        return None
+
+    margin = OCR_REGION_MARGIN
+    max_area = OCR_REGION_MAX_FRACTION * image.width * image.height
+
+    def settle(boxes):
+        boxes = [
+            (max(x1 - margin, 0), max(y1 - margin, 0),
+             min(x2 + margin, image.width), min(y2 + margin, image.height))
+            for x1, y1, x2, y2 in boxes
+        ]
+        while True:
+            grown = _merge_touching([_grow_over_words(box, previous_words) for box in boxes])
+            if grown == boxes:
+                return boxes
+            boxes = grown
+
+    def area(boxes):
+        return sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in boxes)
+
+    regions = settle([bbox])
+    if area(regions) >= max_area:
+        regions = settle(_changed_cells(diff, bbox))
+        if area(regions) >= max_area:
+            return None
+    return regions
+
+
+def _cached_result(
+    image: "Image.Image",
+    params: tuple
+) -> tuple[Optional[tuple], Optional[OCRResult]]:
+    """
+    Look up an earlier OCR result for an image and settings.
+
+    Args:
+        image: PIL Image object
+        params: OCR settings, as built by ocr_image
+
+    Returns:
+        (cache key or None if not computed, cached OCRResult or None)
+    """
+    global _last_ocr
+
+    # The same image object as last time (screenshot_to_pil shares one
+    # capture across a burst of lookups) needs no hashing at all
+    last = _last_ocr
+    if last is not None and last[0] is image and last[1] == params:
+        return None, last[2]
+
+    key = _frame_key(image, params)
+    with _ocr_cache_lock:
+        cached = _ocr_cache.get(key)
+        if cached is not None:
+            _ocr_cache.move_to_end(key)
+            _last_ocr = (image, params, cached)
+    return key, cached
 
-        full_text_parts.append(text)
 
-    return OCRResult(
+def ocr_image(
+    image: "Image.Image",
+    preprocess: bool = True,
+    psm: int = 11,
+    min_confidence: float = 30.0,
+    tiles: Optional[list[tuple[int, int, int, int]]] = None
+) -> OCRResult:
+    """
+    Perform OCR on an image and return word-level results.
+
+    Results are cached by a hash of the pixels, so a frame identical to
+    one of the last OCR_CACHE_SIZE frames (with the same settings) is not
+    OCR'd again; the image must not be modified in place afterwards. If
+    only small areas changed since the previous frame, just those areas
+    are OCR'd and merged with the previous words outside them.
+
+    Args:
+        image: PIL Image object
+        preprocess: Whether to preprocess the image
+        psm: Page segmentation mode (11 = sparse text)
+        min_confidence: Minimum confidence threshold (0-100)
+        tiles: Optional (left, top, right, bottom) boxes to OCR in
+               parallel instead of the whole image; overlap them by a
+               line height so no word is cut in every tile
+
+    Returns:
+        OCRResult with detected words
+    """
+    global _last_ocr
+
+    if not TESSERACT_AVAILABLE:
+        return OCRResult()
+
+    tiles = tuple(tuple(tile) for tile in tiles) if tiles else None
+    params = (preprocess, psm, min_confidence, tiles)
+    key, cached = _cached_result(image, params)
+    if cached is not None:
+        return cached
+
+    words = None
+    last = _last_ocr
+    if last is not None:
+        last_image, last_params, last_result = last
+        if last_params == params:
+            regions = _changed_regions(image, last_image, last_result.words)
+            if regions is not None:
+                words = last_result.words
+                for region in regions:
+                    words = _merge_region_words(
+                        image, region, words,
+                        preprocess, psm, min_confidence
+                    )
+                    if words is None:
+                        break
+
+    if words is None:
+        if tiles:
+            words = _run_tesseract_tiles(image, tiles, preprocess, psm, min_confidence)
+        else:
+            words = _run_tesseract(image, preprocess, psm, min_confidence)
+        if words is None:
+            return OCRResult()
+
+    for index, word in enumerate(words):
+        word.word_index = index
+
+    result = OCRResult(
         words=words,
-        full_text=" ".join(full_text_parts)
+        full_text=" ".join(w.text for w in words)
+    )
+    with _ocr_cache_lock:
+        _ocr_cache[key] = result
+        _ocr_cache.move_to_end(key)
+        if len(_ocr_cache) > OCR_CACHE_SIZE:
+            _ocr_cache.popitem(last=False)
+        _last_ocr = (image, params, result)
+    return result
+
+
+def ocr_images(
+    images: list["Image.Image"],
+    preprocess: bool = True,
+    psm: int = 11,
+    min_confidence: float = 30.0
+) -> list[OCRResult]:
+    """
+    Perform OCR on several images (crops, or successive frames).
+
+    The images share the loaded Tesseract model (with tesserocr) and the
+    frame cache, so repeated images are read once, and consecutive
+    frames that differ in a small area only re-read that area.
+
+    Args:
+        images: PIL Image objects
+        preprocess: Whether to preprocess the images
+        psm: Page segmentation mode (11 = sparse text)
+        min_confidence: Minimum confidence threshold (0-100)
+
+    Returns:
+        One OCRResult per image, in order
+    """
+    return [
+        ocr_image(image, preprocess=preprocess, psm=psm, min_confidence=min_confidence)
+        for image in images
+    ]
+
+
+def _merge_region_words(
+    image: "Image.Image",
+    region: tuple[int, int, int, int],
+    previous_words: list[OCRMatch],
+    preprocess: bool,
+    psm: int,
+    min_confidence: float
+) -> Optional[list[OCRMatch]]:
+    """
+    Re-OCR one region and splice the result into the previous words.
+
+    Args:
+        image: Current frame
+        region: (left, top, right, bottom) area to re-read
+        previous_words: Words detected in the previous frame
+        preprocess: Whether to preprocess the image
+        psm: Page segmentation mode
+        min_confidence: Minimum confidence threshold (0-100)
+
+    Returns:
+        Merged word list in reading order, or None if Tesseract failed
+    """
+    left, top, right, bottom = region
+    region_words = _run_tesseract(
+        image.crop(region), preprocess, psm, min_confidence,
+        offset=(left, top)
     )
+    if region_words is None:
+        return None
+
+    # Previous words are either fully inside or fully outside the region
+    kept = []
+    insert_at = None
+    for word in previous_words:
+        if (word.x >= left and word.x + word.width <= right and
+                word.y >= top and word.y + word.height <= bottom):
+            if insert_at is None:
+                insert_at = len(kept)
+            continue
+        kept.append(OCRMatch(
+            text=word.text,
+            x=word.x,
+            y=word.y,
+            width=word.width,
+            height=word.height,
+            confidence=word.confidence
+        ))
+
+    if insert_at is None:
+        # Nothing was replaced; place new words before the first word below
+        insert_at = next(
+            (i for i, w in enumerate(kept) if (w.y, w.x) > (top, left)),
+            len(kept)
+        )
+    return kept[:insert_at] + region_words + kept[insert_at:]
+
+
+def auto_psm(width: int, height: int) -> int:
+    """
+    Pick a page segmentation mode for an image of the given size.
+
+    Small crops hold a word or a line, which the single word (8) and
+    single line (7) modes read several times faster than sparse text
+    (11), and more accurately. Medium crops are read as one block (6).
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Returns:
+        Tesseract page segmentation mode
+    """
+    area = width * height
+    if area < PSM_WORD_MAX_AREA:
+        return 8
+    if height <= PSM_LINE_MAX_HEIGHT and width >= PSM_LINE_MIN_ASPECT * height:
+        return 7
+    if area < PSM_BLOCK_MAX_AREA:
+        return 6
+    return 11
 
 
 def find_text(
@@ -220,7 +1291,8 @@ def find_text(
     text: str,
     exact: bool = False,
     case_sensitive: bool = False,
-    min_confidence: float = 30.0
+    min_confidence: float = 30.0,
+    psm: Optional[int] = None
 ) -> list[OCRMatch]:
     """
     Find text on screen via OCR.
@@ -231,6 +1303,7 @@ def find_text(
         exact: Require exact match (vs. partial)
         case_sensitive: Case-sensitive matching
         min_confidence: Minimum OCR confidence
+        psm: Page segmentation mode (default: auto_psm for the image size)
 
     Returns:
         List of OCRMatch objects for found text
@@ -241,9 +1314,103 @@ def find_text(
     if not text or not text.strip():
         return []
 
+    if psm is None:
+        psm = auto_psm(*image.size)
+
     # Perform OCR
-    result = ocr_image(image, min_confidence=min_confidence)
+    result = ocr_image(image, psm=psm, min_confidence=min_confidence)
+    return find_text_in_result(result, text, exact, case_sensitive)
+
 
+def find_first_text(
+    image: "Image.Image",
+    text: str,
+    exact: bool = False,
+    case_sensitive: bool = False,
+    min_confidence: float = 30.0
+) -> Optional[OCRMatch]:
+    """
+    Find the first occurrence of text, stopping OCR once it is found.
+
+    With tesserocr, the page layout is analysed first and text lines are
+    recognized one at a time until the text turns up, so lines after the
+    match are never read. A frame that is already in the OCR cache, or a
+    crop small enough for auto_psm to pick a word, line or block mode, is
+    searched with find_text instead. The partial result is not cached.
+    Without tesserocr, or with a GPU backend, this is find_text(...)[0].
+
+    Args:
+        image: PIL Image object (screenshot)
+        text: Text to find
+        exact: Require exact match (vs. partial)
+        case_sensitive: Case-sensitive matching
+        min_confidence: Minimum OCR confidence
+
+    Returns:
+        First OCRMatch in reading order, or None if not found
+    """
+    if not TESSERACT_AVAILABLE or not text or not text.strip():
+        return None
+
+    psm = auto_psm(*image.size)
+    line_by_line = TESSEROCR_AVAILABLE and psm == 11 and _get_gpu_backend() is None
+    cached = None
+    if line_by_line:
+        _, cached = _cached_result(image, (True, psm, min_confidence, None))
+    if cached is not None or not line_by_line:
+        matches = find_text(
+            image, text, exact=exact, case_sensitive=case_sensitive,
+            min_confidence=min_confidence, psm=psm
+        )
+        return matches[0] if matches else None
+
+    processed, scale_x, scale_y = _prepare_image(image, True)
+    words: list[OCRMatch] = []
+    try:
+        with _tesserocr_lock:
+            api = _tesserocr_api(psm)
+            _set_tesserocr_image(api, processed)
+            lines = api.GetComponentImages(tesserocr.RIL.TEXTLINE, True)
+            for _, box, _, _ in lines:
+                api.SetRectangle(box["x"], box["y"], box["w"], box["h"])
+                api.Recognize()
+                data = _read_tesserocr_words(api, _new_word_data())
+                for word in _collect_words(data, (scale_x, scale_y), (0, 0), min_confidence):
+                    word.word_index = len(words)
+                    words.append(word)
+
+                # Search all words so far, since a phrase can continue on
+                # the next line; earlier windows are complete, so the
+                # first match found is the first in reading order
+                matches = find_text_in_result(OCRResult(words=words), text, exact, case_sensitive)
+                if matches:
+                    return matches[0]
+    except Exception:
+        return None
+    return None
+
+
+def find_text_in_result(
+    result: OCRResult,
+    text: str,
+    exact: bool = False,
+    case_sensitive: bool = False
+) -> list[OCRMatch]:
+    """
+    Find a word or phrase in an existing OCR result.
+
+    Lets several searches share one ocr_image call; find_text is this
+    applied to ocr_image(image).
+
+    Args:
+        result: OCR result to search
+        text: Text to find
+        exact: Require exact match (vs. partial)
+        case_sensitive: Case-sensitive matching
+
+    Returns:
+        List of OCRMatch objects, multi-word matches combined into one
+    """
     # Normalize search text
     search_text = text if case_sensitive else text.lower()
     search_words = search_text.split()
@@ -254,49 +1421,64 @@ def find_text(
 
     if len(search_words) == 1:
         # Single word search
-        for word in result.words:
-            word_text = word.text if case_sensitive else word.text.lower()
-
-            if exact:
-                if word_text == search_text:
-                    matches.append(word)
-            else:
-                if search_text in word_text:
-                    matches.append(word)
+        words = result.words
+        texts = result.texts(case_sensitive)
+        if exact:
+            matches = [words[i] for i, t in enumerate(texts) if t == search_text]
+        else:
+            matches = [words[i] for i, t in enumerate(texts) if search_text in t]
     else:
-        # Multi-word phrase search
-        # Look for consecutive words matching the phrase
-        for i in range(len(result.words) - len(search_words) + 1):
-            phrase_words = result.words[i:i + len(search_words)]
-            phrase_text = " ".join(
-                w.text if case_sensitive else w.text.lower()
-                for w in phrase_words
-            )
-
+        # Multi-word phrase search: find the phrase in the joined text,
+        # then map each occurrence to the windows of consecutive words
+        # whose joined text contains it (or equals it, if exact)
+        joined, starts, ends = result.phrase_index(case_sensitive)
+        count = len(search_words)
+        last_window = len(result.words) - count
+        windows = set()
+
+        pos = joined.find(search_text)
+        while pos != -1 and last_window >= 0:
+            end = pos + len(search_text)
             if exact:
-                match = phrase_text == search_text
+                i = bisect_left(starts, pos)
+                if i <= last_window and starts[i] == pos and ends[i + count - 1] == end:
+                    windows.add(i)
             else:
-                match = search_text in phrase_text
-
-            if match:
-                # Create a combined match spanning all words
-                first = phrase_words[0]
-                last = phrase_words[-1]
-
-                combined = OCRMatch(
-                    text=" ".join(w.text for w in phrase_words),
-                    x=first.x,
-                    y=min(w.y for w in phrase_words),
-                    width=last.x + last.width - first.x,
-                    height=max(w.y + w.height for w in phrase_words) - min(w.y for w in phrase_words),
-                    confidence=min(w.confidence for w in phrase_words),
-                    word_index=first.word_index
-                )
-                matches.append(combined)
+                first_window = max(bisect_left(ends, end) - count + 1, 0)
+                final_window = min(bisect_right(starts, pos) - 1, last_window)
+                windows.update(range(first_window, final_window + 1))
+            pos = joined.find(search_text, pos + 1)
+
+        for i in sorted(windows):
+            phrase_words = result.words[i:i + count]
+
+            # Create a combined match spanning all words
+            first = phrase_words[0]
+            last = phrase_words[-1]
+
+            combined = OCRMatch(
+                text=" ".join(w.text for w in phrase_words),
+                x=first.x,
+                y=min(w.y for w in phrase_words),
+                width=last.x + last.width - first.x,
+                height=max(w.y + w.height for w in phrase_words) - min(w.y for w in phrase_words),
+                confidence=min(w.confidence for w in phrase_words),
+                word_index=first.word_index
+            )
+            matches.append(combined)
 
     return matches
 
 
+@lru_cache(maxsize=128)
+def _compile_regex(pattern: str) -> Optional["re.Pattern"]:
+    """Compile a case-insensitive search pattern, or None if invalid."""
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        return None
+
+
 def find_text_regex(
     image: "Image.Image",
     pattern: str,
@@ -318,15 +1500,121 @@ def find_text_regex(
 
     result = ocr_image(image, min_confidence=min_confidence)
 
-    try:
-        regex = re.compile(pattern, re.IGNORECASE)
-    except re.error:
+    regex = _compile_regex(pattern)
+    if regex is None:
         return []
 
-    matches = []
-    for word in result.words:
-        if regex.search(word.text):
-            matches.append(word)
+    return [word for word in result.words if regex.search(word.text)]
+
+
+@lru_cache(maxsize=16)
+def _hyperscan_database(patterns: tuple[str, ...]):
+    """
+    Compile patterns into one Hyperscan database.
+
+    Args:
+        patterns: Regex patterns; a pattern's index is its match id
+
+    Returns:
+        hyperscan.Database, or None if Hyperscan rejects a pattern
+    """
+    flags = (
+        hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE |
+        hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+    )
+    database = hyperscan.Database()
+    try:
+        database.compile(
+            expressions=[p.encode() for p in patterns],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=[flags] * len(patterns)
+        )
+    except Exception:
+        return None
+    return database
+
+
+def _hyperscan_candidates(
+    words: list[OCRMatch],
+    patterns: tuple[str, ...]
+) -> Optional[list[set[int]]]:
+    """
+    Scan all words for all patterns in one Hyperscan pass.
+
+    The words are joined by newlines and each match's end offset is
+    mapped back to a word. A match can run across a newline, so the
+    result is a superset to be checked with re.
+
+    Args:
+        words: OCR words
+        patterns: Regex patterns
+
+    Returns:
+        Per pattern, the indices of words that may match, or None if
+        Hyperscan can't be used for these patterns
+    """
+    database = _hyperscan_database(patterns)
+    if database is None:
+        return None
+
+    encoded = [w.text.encode() for w in words]
+    starts = []
+    offset = 0
+    for data in encoded:
+        starts.append(offset)
+        offset += len(data) + 1
+
+    candidates: list[set[int]] = [set() for _ in patterns]
+
+    def on_match(pattern_id, start, end, flags, context):
+        candidates[pattern_id].add(bisect_right(starts, max(end - 1, 0)) - 1)
+
+    database.scan(b"\n".join(encoded), match_event_handler=on_match)
+    return candidates
+
+
+def find_text_regex_multi(
+    image: "Image.Image",
+    patterns: list[str],
+    min_confidence: float = 30.0
+) -> dict[str, list[OCRMatch]]:
+    """
+    Find text matching any of several regex patterns with one OCR pass.
+
+    With Hyperscan installed, all patterns are matched in a single scan
+    over the words and only the candidate words are checked with re.
+
+    Args:
+        image: PIL Image object (screenshot)
+        patterns: Regex patterns to match
+        min_confidence: Minimum OCR confidence
+
+    Returns:
+        Dict mapping each pattern to its matching OCRMatch objects, as
+        find_text_regex would return them (empty for invalid patterns)
+    """
+    matches: dict[str, list[OCRMatch]] = {pattern: [] for pattern in patterns}
+    if not TESSERACT_AVAILABLE:
+        return matches
+
+    result = ocr_image(image, min_confidence=min_confidence)
+
+    valid = tuple(p for p in matches if _compile_regex(p) is not None)
+    if not valid or not result.words:
+        return matches
+
+    candidates = None
+    if HYPERSCAN_AVAILABLE:
+        candidates = _hyperscan_candidates(result.words, valid)
+
+    for index, pattern in enumerate(valid):
+        regex = _compile_regex(pattern)
+        if candidates is None:
+            words = result.words
+        else:
+            words = [result.words[i] for i in sorted(candidates[index])]
+        matches[pattern] = [word for word in words if regex.search(word.text)]
 
     return matches
 
@@ -3,12 +3,66 @@ Screenshot capture functionality.
 """
 
 import base64
+import os
+import threading
 import time
 from pathlib import Path
 from typing import Optional
 
+from . import xshm
 from .core import run_cmd, get_display
 
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Reuse window for screenshot_to_pil, about one frame at 25 fps
+SCREENSHOT_TTL = 0.04
+
+# display -> (monotonic capture time, PIL Image)
+_recent_captures: dict = {}
+
+# mss is imported on first use: this module is loaded by every input
+# command, most of which never capture. None until tried.
+_mss = None
+
+# Per-thread display -> mss instance; mss instances aren't thread-safe
+_mss_local = threading.local()
+
+# Bumped by every invalidation, i.e. every mouse or keyboard action, so
+# other caches can tell whether the screen may have changed since
+_input_generation = 0
+
+
+def _capture_png(
+    display: str,
+    region: Optional[tuple[int, int, int, int]] = None
+) -> Optional[bytes]:
+    """
+    Capture the screen as PNG bytes without going through a temp file.
+
+    Tries scrot writing to stdout first, then ImageMagick's import.
+
+    Args:
+        display: X display to use
+        region: Optional (x, y, width, height) to capture specific area
+
+    Returns:
+        PNG data, or None if neither tool could stream a capture
+    """
+    scrot_cmd = ["scrot", "-o"]
+    import_cmd = ["import", "-window", "root"]
+    if region:
+        x, y, w, h = region
+        scrot_cmd.extend(["-a", f"{x},{y},{w},{h}"])
+        import_cmd.extend(["-crop", f"{w}x{h}+{x}+{y}", "+repage"])
+    scrot_cmd.append("/dev/stdout")
+    import_cmd.append("png:-")
+
+    for cmd in (scrot_cmd, import_cmd):
+        result = run_cmd(cmd, display, text=False)
+        if result.success and result.stdout.startswith(_PNG_SIGNATURE):
+            return result.stdout
+    return None
+
 
 def screenshot(
     output: Optional[str] = None,
@@ -27,6 +81,16 @@ def screenshot(
         Dict with path/size or base64/size, or error
     """
     disp = get_display(display)
+
+    if not output:
+        # Encode straight from memory when no file was requested
+        png = _capture_png(disp, region)
+        if png is not None:
+            return {
+                "size": len(png),
+                "base64": base64.b64encode(png).decode(),
+            }
+
     temp_path = output or f"/tmp/screenshot_{int(time.time())}.png"
 
     # Build scrot command
@@ -61,30 +125,128 @@ def screenshot(
     return response
 
 
-def screenshot_to_pil(display: Optional[str] = None):
+def invalidate_screenshot_cache(display: Optional[str] = None) -> None:
     """
-    Take a screenshot and return as PIL Image.
+    Drop recently captured screenshots.
 
     Args:
-        display: X display to use
+        display: Only drop captures for this display (all if None)
+    """
+    global _input_generation
+    _input_generation += 1
+
+    if display is None:
+        _recent_captures.clear()
+    else:
+        _recent_captures.pop(get_display(display), None)
+
+
+def input_generation() -> int:
+    """Get a counter that changes whenever input may have changed the screen."""
+    return _input_generation
+
+
+def _capture_mss(display: str):
+    """
+    Capture the screen through mss, if installed.
+
+    mss falls back to plain XGetImage where MIT-SHM is unavailable
+    (e.g. a remote X server), which still avoids a PNG round-trip.
 
     Returns:
-        PIL Image object or None on error
+        PIL Image, or None if mss or Pillow is missing or capture failed
     """
+    global _mss
+    if _mss is None:
+        try:
+            import mss
+            _mss = mss
+        except ImportError:
+            _mss = False
+    if not _mss:
+        return None
+
+    try:
+        from PIL import Image
+
+        instances = getattr(_mss_local, "instances", None)
+        if instances is None:
+            instances = _mss_local.instances = {}
+        sct = instances.get(display)
+        if sct is None:
+            sct = instances[display] = _mss.mss(display=display)
+        shot = sct.grab(sct.monitors[0])
+        return Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+    except Exception:
+        return None
+
+
+def _capture_pil(display: str):
+    """
+    Capture the screen into a loaded PIL Image.
+
+    Copies the framebuffer through MIT-SHM when possible, then tries mss,
+    and otherwise decodes a scrot/import PNG (streamed from memory, or
+    through a temp file as a last resort).
+    """
+    img = xshm.capture(display)
+    if img is not None:
+        return img
+
+    img = _capture_mss(display)
+    if img is not None:
+        return img
+
     try:
         from PIL import Image
         import io
 
-        result = screenshot(display=display)
+        png = _capture_png(display)
+        if png is not None:
+            img = Image.open(io.BytesIO(png))
+            # Decode now so a cached image is never lazily loaded twice
+            img.load()
+            return img
+
+        temp_path = f"/tmp/screenshot_{os.getpid()}_{time.time_ns()}.png"
+        result = screenshot(output=temp_path, display=display)
         if "error" in result:
             return None
-
-        if "base64" in result:
-            img_data = base64.b64decode(result["base64"])
-            return Image.open(io.BytesIO(img_data))
-
-        return Image.open(result["path"])
+        try:
+            with Image.open(temp_path) as img:
+                img.load()
+        finally:
+            os.unlink(temp_path)
+        return img
     except ImportError:
         return None
     except Exception:
         return None
+
+
+def screenshot_to_pil(display: Optional[str] = None):
+    """
+    Take a screenshot and return as PIL Image.
+
+    Captures requested within SCREENSHOT_TTL seconds on the same display
+    share one image, so bursts of lookups capture the screen once. Mouse
+    and keyboard actions invalidate the cache. Callers must not modify
+    the returned image in place.
+
+    Args:
+        display: X display to use
+
+    Returns:
+        PIL Image object or None on error
+    """
+    disp = get_display(display)
+
+    cached = _recent_captures.get(disp)
+    if cached is not None and time.monotonic() - cached[0] < SCREENSHOT_TTL:
+        return cached[1]
+
+    captured_at = time.monotonic()
+    img = _capture_pil(disp)
+    if img is not None:
+        _recent_captures[disp] = (captured_at, img)
+    return img
@@ -4,32 +4,53 @@ Wait-for-condition utilities with polling and exponential backoff.
 Provides reliable waiting for UI elements to appear or disappear.
 """
 
+import dataclasses
+import threading
 import time
 from typing import Optional, Callable, Any
 
+from . import atspi
 from .element import Element
 from .finder import ElementFinder
 
+# Longest a wait for AT-SPI events goes without checking for cancel()
+CANCEL_CHECK_INTERVAL = 0.1
+
 
 class WaitTimeout(Exception):
     """Raised when a wait operation times out."""
     pass
 
 
+class WaitCancelled(WaitTimeout):
+    """Raised when a wait operation is cancelled with Waiter.cancel()."""
+    pass
+
+
 class Waiter:
     """
     Wait for UI conditions with configurable polling.
 
-    Uses exponential backoff to balance responsiveness with CPU usage.
+    Polls rapidly for a short burst so conditions met right away are seen
+    quickly, then uses exponential backoff to balance responsiveness with
+    CPU usage on long waits. When the finder uses AT-SPI, the waits
+    between checks end early on accessibility tree changes, so a check
+    follows each UI change instead of the next poll tick. Events come
+    from the whole desktop, so after the burst, checks they trigger stay
+    at least event_interval apart.
     """
 
     def __init__(
         self,
         finder: Optional[ElementFinder] = None,
         display: Optional[str] = None,
-        initial_interval: float = 0.5,
-        max_interval: float = 2.0,
-        backoff_factor: float = 1.5
+        initial_interval: float = 0.05,
+        max_interval: float = 0.5,
+        backoff_factor: float = 1.5,
+        burst_interval: float = 0.02,
+        burst_duration: float = 0.2,
+        watch_events: bool = True,
+        event_interval: float = 0.2
     ):
         """
         Initialize the waiter.
@@ -37,14 +58,33 @@ class Waiter:
         Args:
             finder: ElementFinder to use (creates one if not provided)
             display: X display for screenshots
-            initial_interval: Starting poll interval in seconds
+            initial_interval: Poll interval in seconds once the burst ends
             max_interval: Maximum poll interval in seconds
             backoff_factor: Multiplier for interval after each poll
+            burst_interval: Poll interval during the initial burst
+            burst_duration: Length of the initial burst in seconds
+            watch_events: Wake up on AT-SPI tree change events
+            event_interval: Minimum time between checks woken by events
+                once the burst ends
         """
         self.finder = finder or ElementFinder(display=display)
         self.initial_interval = initial_interval
         self.max_interval = max_interval
         self.backoff_factor = backoff_factor
+        self.burst_interval = burst_interval
+        self.burst_duration = burst_duration
+        self.watch_events = watch_events
+        self.event_interval = event_interval
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        """
+        Abort the wait in progress, from another thread.
+
+        The wait raises WaitCancelled. A wait woken by AT-SPI events
+        notices within CANCEL_CHECK_INTERVAL.
+        """
+        self._cancel.set()
 
     def wait_for_element(
         self,
@@ -93,7 +133,9 @@ class Waiter:
         """
         Wait for text to appear on screen.
 
-        Uses OCR to find the text.
+        Uses OCR to find the text. OCR results are cached on a digest of
+        the frame, so while the screen is unchanged a poll costs one
+        capture and hash rather than another OCR pass.
 
         Args:
             text: Text to find
@@ -129,6 +171,12 @@ class Waiter:
 
         Useful for waiting for popups to close or loading indicators
         to disappear.
+        When the finder uses AT-SPI, each wait between checks ends on
+        the first tree change event, which includes the children-changed
+        and defunct state events sent when an element is destroyed, so
+        removal is seen right away rather than on the next backoff tick.
+        Text polls of an unchanged screen reuse the cached OCR result,
+        as in wait_for_text().
 
         Args:
             name: Element name (AT-SPI with OCR fallback)
@@ -168,6 +216,10 @@ class Waiter:
         """
         Wait for any of the specified elements to appear.
 
+        Each poll walks the AT-SPI tree once and OCRs one screenshot
+        once for all specs (see ElementFinder.find_any), rather than once
+        per spec. Earlier specs win when several are present.
+
         Args:
             elements: List of element specs, each a dict with keys:
                       name, role, app (same as find() parameters)
@@ -180,15 +232,7 @@ class Waiter:
             WaitTimeout: If no element appears within timeout
         """
         def condition():
-            for i, spec in enumerate(elements):
-                elem = self.finder.find(
-                    name=spec.get("name"),
-                    role=spec.get("role"),
-                    app=spec.get("app")
-                )
-                if elem:
-                    return (i, elem)
-            return None
+            return self.finder.find_any(elements)
 
         result = self._poll_until(condition, timeout)
         if result is None:
@@ -210,6 +254,10 @@ class Waiter:
         change for stability_time seconds. Useful for waiting for
         animations to complete.
 
+        Once an AT-SPI element is found, later checks re-read only its
+        bounds instead of searching the tree again; the search is
+        repeated if the element goes away.
+
         Args:
             name: Element name
             role: Element role
@@ -222,12 +270,20 @@ class Waiter:
         Raises:
             WaitTimeout: If element doesn't stabilize within timeout
         """
-        start_time = time.time()
+        self._cancel.clear()
+        deadline = time.monotonic() + timeout
         last_pos = None
         stable_since = None
-
-        while time.time() - start_time < timeout:
-            elem = self.finder.find(name=name, role=role)
+        elem = None
+        handle = None
+
+        while time.monotonic() < deadline:
+            bounds = atspi.get_bounds(handle) if handle is not None else None
+            if bounds is not None:
+                x, y, width, height = bounds
+                elem = dataclasses.replace(elem, x=x, y=y, width=width, height=height)
+            else:
+                elem, handle = self.finder.find_tracked(name=name, role=role)
 
             if elem:
                 current_pos = (elem.x, elem.y)
@@ -235,19 +291,20 @@ class Waiter:
                 if last_pos == current_pos:
                     # Position unchanged
                     if stable_since is None:
-                        stable_since = time.time()
-                    elif time.time() - stable_since >= stability_time:
+                        stable_since = time.monotonic()
+                    elif time.monotonic() - stable_since >= stability_time:
                         return elem
                 else:
                     # Position changed, reset stability timer
                     last_pos = current_pos
-                    stable_since = time.time()
+                    stable_since = time.monotonic()
             else:
                 # Element not found, reset
                 last_pos = None
                 stable_since = None
 
-            time.sleep(self.initial_interval)
+            if self._cancel.wait(self.initial_interval):
+                raise WaitCancelled("Wait cancelled")
 
         raise WaitTimeout(
             f"Element didn't stabilize within {timeout}s "
@@ -286,7 +343,17 @@ class Waiter:
         """
         Poll a condition until it returns a truthy value or timeout.
 
-        Uses exponential backoff for polling interval.
+        Polls every burst_interval for the first burst_duration seconds,
+        then backs off exponentially from initial_interval. Intervals run
+        from the start of one check to the start of the next, so a slow
+        check (a full AT-SPI walk or OCR pass) eats into the wait instead
+        of adding to it. With AT-SPI change events, each wait ends as
+        soon as the tree changes, but checks stay at least burst_interval
+        apart (event_interval after the burst) so a stream of events from
+        a busy desktop doesn't turn into a busy loop.
+
+        All timing is against a monotonic deadline fixed at the start, so
+        clock changes and early wakeups can't stretch the total wait.
 
         Args:
             condition: Function to poll
@@ -294,23 +361,63 @@ class Waiter:
 
         Returns:
             Result of condition when truthy, None on timeout
+
+        Raises:
+            WaitCancelled: If cancel() was called during the wait
         """
-        start_time = time.time()
+        self._cancel.clear()
+        start_time = time.monotonic()
+        deadline = start_time + timeout
         interval = self.initial_interval
+        events = (
+            self.watch_events
+            and getattr(self.finder, "use_atspi", False)
+            and atspi.watch_tree_changes()
+        )
+
+        def wait(seconds: float, check_time: float, min_interval: float) -> None:
+            if not events:
+                cancelled = self._cancel.wait(seconds)
+            else:
+                floor = min(seconds, max(0.0, min_interval - check_time))
+                cancelled = self._cancel.wait(floor)
+                # The event wait can't see cancel(), so wait in slices
+                wait_end = time.monotonic() + seconds - floor
+                while not cancelled:
+                    left = wait_end - time.monotonic()
+                    if left <= 0:
+                        break
+                    changed = atspi.wait_for_tree_change(min(left, CANCEL_CHECK_INTERVAL))
+                    cancelled = self._cancel.is_set()
+                    if changed:
+                        break
+            if cancelled:
+                raise WaitCancelled("Wait cancelled")
 
         while True:
+            poll_start = time.monotonic()
             result = condition()
             if result:
                 return result
 
-            elapsed = time.time() - start_time
-            if elapsed >= timeout:
+            now = time.monotonic()
+            remaining = deadline - now
+            if remaining <= 0:
                 return None
 
+            elapsed = now - start_time
+            check_time = now - poll_start
+            if elapsed < self.burst_duration:
+                # Burst phase: catch conditions that resolve almost at once
+                wait(
+                    max(0.0, min(self.burst_interval - check_time, remaining)),
+                    check_time, self.burst_interval
+                )
+                continue
+
             # Sleep with exponential backoff
-            remaining = timeout - elapsed
-            sleep_time = min(interval, remaining, self.max_interval)
-            time.sleep(sleep_time)
+            sleep_time = min(interval, self.max_interval) - check_time
+            wait(max(0.0, min(sleep_time, remaining)), check_time, self.event_interval)
 
             # Increase interval for next iteration
             interval = min(interval * self.backoff_factor, self.max_interval)
@@ -1,9 +1,144 @@
 """
 Mouse and keyboard control via xdotool.
+
+Clicks, drags, typing, key presses, pointer moves and screen/pointer
+queries go through libxdo in-process when it is installed, and fall back
+to the xdotool command otherwise.
 """
 
+import re
+import time
 from typing import Optional
-from .core import run_cmd, get_display
+from . import libxdo
+from .core import run_cmd, get_display, CommandResult
+from .screenshot import invalidate_screenshot_cache
+
+# KEY=value lines printed by xdotool's --shell output
+_SHELL_VAR_RE = re.compile(r"^(\w+)=(.*)$", re.MULTILINE)
+
+# Integer values, including negative window positions
+_INT_RE = re.compile(r"-?\d+")
+
+# Button name -> xdotool button number
+_BUTTON_MAP = {"left": "1", "middle": "2", "right": "3"}
+
+# Keys printed for each window by getwindowgeometry --shell
+_GEOMETRY_KEYS = frozenset(("WINDOW", "X", "Y", "WIDTH", "HEIGHT", "SCREEN"))
+
+# How long a screen size read with the xdotool command is reused. The
+# libxdo query needs no process and is never cached.
+SCREEN_SIZE_TTL = 30.0
+
+# display -> (monotonic time read, (width, height))
+_screen_size_cache: dict[str, tuple[float, tuple[int, int]]] = {}
+
+
+def _parse_shell_vars(output: str) -> dict:
+    """Parse xdotool --shell output into a dict with lowercase keys."""
+    return {
+        k.lower(): int(v) if _INT_RE.fullmatch(v) else v
+        for k, v in _SHELL_VAR_RE.findall(output)
+    }
+
+
+def _run_script(lines: list[str], display: str) -> CommandResult:
+    """
+    Run several xdotool commands in a single process.
+
+    xdotool reads a newline-delimited script from stdin when invoked
+    with "-", so a batch costs one fork/exec instead of one per command.
+    The script is executed once stdin is closed, so this batches work
+    but cannot keep a session open between calls; a persistent
+    connection is what the libxdo path provides.
+
+    Script arguments are split on whitespace: only pass commands whose
+    arguments never contain spaces (coordinates, buttons, window IDs).
+
+    Args:
+        lines: xdotool commands, one per line, without the "xdotool" prefix
+        display: X display to use
+
+    Returns:
+        CommandResult with the unstripped combined output of all commands
+    """
+    return run_cmd(
+        ["xdotool", "-"],
+        display,
+        input="\n".join(lines) + "\n",
+        strip=False
+    )
+
+
+def _get_window_names(window_ids: list[str], display: str) -> list[str]:
+    """
+    Get the names of several windows, in order.
+
+    Uses one batched xdotool process and falls back to one call per
+    window if the batch fails (e.g. a window closed mid-way) or its
+    output doesn't line up with the requested IDs.
+    """
+    if not window_ids:
+        return []
+
+    result = _run_script([f"getwindowname {wid}" for wid in window_ids], display)
+    if result.success:
+        names = result.stdout.split("\n")
+        # Output ends with a newline, leaving one empty trailing item
+        if len(names) == len(window_ids) + 1 and names[-1] == "":
+            return names[:-1]
+
+    names = []
+    for wid in window_ids:
+        name_result = run_cmd(["xdotool", "getwindowname", wid], display)
+        names.append(name_result.stdout if name_result.success else "")
+    return names
+
+
+def _search_windows(name: str, display: str) -> Optional[list[tuple[str, str]]]:
+    """
+    Search windows by name and get their IDs and names in one process.
+
+    A chained search only prints through the commands after it, so the
+    IDs come from the WINDOW= lines of getwindowgeometry --shell %@ and
+    the names from getwindowname %@, which follows with one name per
+    line in the same order.
+
+    Args:
+        name: Window name to search for (partial match)
+        display: X display to use
+
+    Returns:
+        List of (window_id, name), or None if the output couldn't be
+        split up (e.g. a window closed mid-way, or a name spans lines)
+        and the caller should look the windows up separately
+    """
+    result = run_cmd(
+        ["xdotool", "search", "--name", name,
+         "getwindowgeometry", "--shell", "%@",
+         "getwindowname", "%@"],
+        display,
+        strip=False
+    )
+    if not result.success:
+        # An empty search fails silently; other errors go to stderr
+        return [] if not result.stderr.strip() else None
+
+    lines = result.stdout.split("\n")
+    window_ids = []
+    i = 0
+    while i < len(lines):
+        key, sep, value = lines[i].partition("=")
+        if not sep or key not in _GEOMETRY_KEYS:
+            break
+        if key == "WINDOW":
+            window_ids.append(value)
+        i += 1
+
+    # Output ends with a newline, leaving one empty trailing item
+    names = lines[i:]
+    if len(names) != len(window_ids) + 1 or names[-1] != "":
+        return None
+    return list(zip(window_ids, names[:-1]))
 
 
 def click(
@@ -27,49 +162,80 @@ def click(
         Dict with click info or error
     """
     disp = get_display(display)
-
-    # Move to position first
-    result = run_cmd(["xdotool", "mousemove", "--sync", str(x), str(y)], disp)
-    if not result.success:
-        return {"error": f"Mouse move failed: {result.stderr}"}
-
-    # Map button name to xdotool button number
-    button_map = {"left": "1", "middle": "2", "right": "3"}
-    btn = button_map.get(button, "1")
-
+    # Library callers may pass float coordinates
+    x, y = int(x), int(y)
+
+    btn = _BUTTON_MAP.get(button, "1")
+    clicked = {"clicked": {"x": x, "y": y, "button": button, "double": double}}
+
+    # In-process through libxdo when available
+    moved = libxdo.move_mouse(x, y, disp, sync=False)
+    if moved is not None:
+        ok = moved and libxdo.click(int(btn), disp, repeat=2 if double else 1)
+        invalidate_screenshot_cache(disp)
+        if not ok:
+            return {"error": "Click failed: libxdo could not move or click"}
+        return clicked
+
+    # Chain move and click so both run in one xdotool process. No --sync:
+    # the X server applies the pointer warp before the click events that
+    # follow on the same connection. move() keeps --sync because control
+    # returns to Python, which may act on the new position next.
+    cmd = ["xdotool", "mousemove", str(x), str(y), "click"]
     if double:
-        cmd = ["xdotool", "click", "--repeat", "2", "--delay", "100", btn]
-    else:
-        cmd = ["xdotool", "click", btn]
+        cmd.extend(["--repeat", "2", "--delay", "100"])
+    cmd.append(btn)
 
     result = run_cmd(cmd, disp)
+    invalidate_screenshot_cache(disp)
     if not result.success:
-        return {"error": f"Click failed: {result.stderr}"}
+        return {"error": f"Click failed: {result.stderr.strip()}"}
 
-    return {"clicked": {"x": x, "y": y, "button": button, "double": double}}
+    return clicked
 
 
 def type_text(
     text: str,
     delay: int = 12,
-    display: Optional[str] = None
+    display: Optional[str] = None,
+    fast: bool = False
 ) -> dict:
     """
     Type text using keyboard simulation.
 
+    The whole text, newlines included, goes out in one libxdo call or
+    one xdotool process, which paces the keystrokes itself.
+
     Args:
         text: Text to type
         delay: Milliseconds between keystrokes
         display: X display to use
+        fast: Send keystrokes back to back, ignoring delay. For fields
+              that don't need human-paced input; 200 characters take
+              2.4s at the default delay.
 
     Returns:
         Dict with typed text or error
     """
     disp = get_display(display)
+    if fast:
+        delay = 0
+
+    typed = libxdo.enter_text(text, disp, delay_ms=delay)
+    if typed is not None:
+        invalidate_screenshot_cache(disp)
+        if not typed:
+            return {"error": "Type failed: libxdo could not type the text"}
+        return {"typed": text}
+
+    # Pass the text on stdin rather than argv, which avoids ARG_MAX limits
+    # and copying long strings into the argument vector
     result = run_cmd(
-        ["xdotool", "type", "--delay", str(delay), "--", text],
-        disp
+        ["xdotool", "type", "--delay", str(delay), "--file", "-"],
+        disp,
+        input=text
     )
+    invalidate_screenshot_cache(disp)
     if not result.success:
         return {"error": f"Type failed: {result.stderr}"}
     return {"typed": text}
@@ -87,12 +253,49 @@ def key(keys: str, display: Optional[str] = None) -> dict:
         Dict with pressed keys or error
     """
     disp = get_display(display)
+
+    pressed = libxdo.send_keysequence(keys, disp)
+    if pressed is not None:
+        invalidate_screenshot_cache(disp)
+        if not pressed:
+            return {"error": f"Key press failed: libxdo could not send '{keys}'"}
+        return {"pressed": keys}
+
     result = run_cmd(["xdotool", "key", "--", keys], disp)
+    invalidate_screenshot_cache(disp)
     if not result.success:
         return {"error": f"Key press failed: {result.stderr}"}
     return {"pressed": keys}
 
 
+def keys(seq: list[str], display: Optional[str] = None) -> dict:
+    """
+    Press a sequence of keys or key combinations in one xdotool call.
+
+    Args:
+        seq: Keys to press in order (e.g., ["Tab", "Tab", "Return"])
+        display: X display to use
+
+    Returns:
+        Dict with pressed keys or error
+    """
+    disp = get_display(display)
+
+    if libxdo.is_available(disp):
+        for k in seq:
+            if not libxdo.send_keysequence(k, disp):
+                invalidate_screenshot_cache(disp)
+                return {"error": f"Key press failed: libxdo could not send '{k}'"}
+        invalidate_screenshot_cache(disp)
+        return {"pressed": list(seq)}
+
+    result = run_cmd(["xdotool", "key", "--"] + list(seq), disp)
+    invalidate_screenshot_cache(disp)
+    if not result.success:
+        return {"error": f"Key press failed: {result.stderr}"}
+    return {"pressed": list(seq)}
+
+
 def move(x: int, y: int, display: Optional[str] = None) -> dict:
     """
     Move mouse to coordinates without clicking.
@@ -106,7 +309,17 @@ def move(x: int, y: int, display: Optional[str] = None) -> dict:
         Dict with new position or error
     """
     disp = get_display(display)
+    x, y = int(x), int(y)
+
+    moved = libxdo.move_mouse(x, y, disp, sync=True)
+    if moved is not None:
+        invalidate_screenshot_cache(disp)
+        if not moved:
+            return {"error": "Mouse move failed: libxdo could not move the pointer"}
+        return {"moved": {"x": x, "y": y}}
+
     result = run_cmd(["xdotool", "mousemove", "--sync", str(x), str(y)], disp)
+    invalidate_screenshot_cache(disp)
     if not result.success:
         return {"error": f"Mouse move failed: {result.stderr}"}
     return {"moved": {"x": x, "y": y}}
@@ -120,16 +333,16 @@ def get_mouse_position(display: Optional[str] = None) -> dict:
         Dict with position {x, y} or error
     """
     disp = get_display(display)
-    result = run_cmd(["xdotool", "getmouselocation", "--shell"], disp)
-    if not result.success:
-        return {"error": f"Get position failed: {result.stderr}"}
 
-    pos = {}
-    for line in result.stdout.split("\n"):
-        if "=" in line:
-            k, v = line.split("=", 1)
-            pos[k.lower()] = int(v) if v.isdigit() else v
+    location = libxdo.get_mouse_location(disp)
+    if location is not None:
+        return {"position": {"x": location[0], "y": location[1]}}
+
+    result = run_cmd(["xdotool", "getmouselocation", "--shell"], disp, strip=False)
+    if not result.success:
+        return {"error": f"Get position failed: {result.stderr.strip()}"}
 
+    pos = _parse_shell_vars(result.stdout)
     return {"position": {"x": pos.get("x", 0), "y": pos.get("y", 0)}}
 
 
@@ -141,31 +354,34 @@ def get_active_window(display: Optional[str] = None) -> dict:
         Dict with window_id, name, and geometry
     """
     disp = get_display(display)
-    result = run_cmd(["xdotool", "getactivewindow"], disp)
-    if not result.success:
-        return {"error": f"Get active window failed: {result.stderr}"}
-
-    window_id = result.stdout
 
-    # Get window name
-    name_result = run_cmd(["xdotool", "getwindowname", window_id], disp)
-    name = name_result.stdout if name_result.success else ""
+    active = libxdo.get_active_window(disp)
+    if active is not None:
+        name, geometry = active
+        return {
+            "window_id": str(geometry["window"]),
+            "name": name,
+            "geometry": geometry
+        }
 
-    # Get window geometry
-    geom_result = run_cmd(
-        ["xdotool", "getwindowgeometry", "--shell", window_id],
-        disp
+    # Name and geometry come from one chained xdotool process: the name
+    # on the first line, followed by KEY=value geometry lines.
+    result = run_cmd(
+        ["xdotool", "getactivewindow",
+         "getwindowname", "%1",
+         "getwindowgeometry", "--shell", "%1"],
+        disp,
+        strip=False
     )
+    if not result.success:
+        return {"error": f"Get active window failed: {result.stderr.strip()}"}
+
+    name, _, geom_output = result.stdout.partition("\n")
 
-    geometry = {}
-    if geom_result.success:
-        for line in geom_result.stdout.split("\n"):
-            if "=" in line:
-                k, v = line.split("=", 1)
-                geometry[k.lower()] = int(v) if v.isdigit() else v
+    geometry = _parse_shell_vars(geom_output)
 
     return {
-        "window_id": window_id,
+        "window_id": str(geometry.get("window", "")),
         "name": name,
         "geometry": geometry
     }
@@ -182,18 +398,19 @@ def find_window(name: str, display: Optional[str] = None) -> dict:
         Dict with list of matching windows
     """
     disp = get_display(display)
-    result = run_cmd(["xdotool", "search", "--name", name], disp)
-    if not result.success or not result.stdout:
+    found = _search_windows(name, disp)
+    if found is None:
+        # Raw output: split() drops the trailing newline without a strip copy
+        result = run_cmd(["xdotool", "search", "--name", name], disp, strip=False)
+        window_ids = result.stdout.split() if result.success else []
+        found = list(zip(window_ids, _get_window_names(window_ids, disp)))
+    if not found:
         return {"error": f"No windows found matching '{name}'", "windows": []}
 
-    windows = []
-    for wid in result.stdout.split("\n"):
-        if wid:
-            name_result = run_cmd(["xdotool", "getwindowname", wid], disp)
-            windows.append({
-                "window_id": wid,
-                "name": name_result.stdout if name_result.success else ""
-            })
+    windows = [
+        {"window_id": wid, "name": name}
+        for wid, name in found
+    ]
 
     return {"windows": windows}
 
@@ -209,17 +426,25 @@ def focus_window(name: str, display: Optional[str] = None) -> dict:
         Dict with focused window_id or error
     """
     disp = get_display(display)
-    result = run_cmd(["xdotool", "search", "--name", name], disp)
-    if not result.success or not result.stdout:
-        return {"error": f"No window found matching '{name}'"}
 
-    # Take first match
-    wid = result.stdout.split("\n")[0]
-    focus_result = run_cmd(["xdotool", "windowactivate", "--sync", wid], disp)
-    if not focus_result.success:
-        return {"error": f"Focus failed: {focus_result.stderr}"}
+    # Search, activate the first match and report the now-active window
+    # in a single xdotool process.
+    result = run_cmd(
+        ["xdotool", "search", "--name", name,
+         "windowactivate", "--sync", "%1",
+         "getactivewindow"],
+        disp
+    )
+    invalidate_screenshot_cache(disp)
+    if not result.success:
+        # An empty search fails silently; activation errors go to stderr
+        if not result.stderr:
+            return {"error": f"No window found matching '{name}'"}
+        return {"error": f"Focus failed: {result.stderr}"}
+    if not result.stdout:
+        return {"error": f"No window found matching '{name}'"}
 
-    return {"focused": wid}
+    return {"focused": result.stdout.split("\n")[0]}
 
 
 def list_windows(display: Optional[str] = None) -> dict:
@@ -230,19 +455,19 @@ def list_windows(display: Optional[str] = None) -> dict:
         Dict with list of all windows
     """
     disp = get_display(display)
-    result = run_cmd(["xdotool", "search", "--name", ""], disp)
-    if not result.success:
-        return {"error": f"List windows failed: {result.stderr}"}
-
-    windows = []
-    for wid in result.stdout.split("\n"):
-        if wid:
-            name_result = run_cmd(["xdotool", "getwindowname", wid], disp)
-            if name_result.stdout:  # Skip windows without names
-                windows.append({
-                    "window_id": wid,
-                    "name": name_result.stdout
-                })
+    found = _search_windows("", disp)
+    if found is None:
+        result = run_cmd(["xdotool", "search", "--name", ""], disp, strip=False)
+        if not result.success:
+            return {"error": f"List windows failed: {result.stderr.strip()}"}
+        window_ids = result.stdout.split()
+        found = zip(window_ids, _get_window_names(window_ids, disp))
+
+    windows = [
+        {"window_id": wid, "name": name}
+        for wid, name in found
+        if name  # Skip windows without names
+    ]
 
     return {"windows": windows}
 
@@ -251,6 +476,9 @@ def get_screen_size(display: Optional[str] = None) -> tuple[int, int]:
     """
     Get the screen dimensions.
 
+    Without libxdo, the size read from xdotool is reused for
+    SCREEN_SIZE_TTL seconds (see invalidate_screen_size).
+
     Args:
         display: X display to use
 
@@ -258,15 +486,39 @@ def get_screen_size(display: Optional[str] = None) -> tuple[int, int]:
         Tuple of (width, height) in pixels, or (0, 0) on error
     """
     disp = get_display(display)
-    result = run_cmd(["xdotool", "getdisplaygeometry"], disp)
+
+    size = libxdo.get_viewport_dimensions(disp)
+    if size is not None:
+        return size
+
+    cached = _screen_size_cache.get(disp)
+    if cached is not None and 0.0 <= time.monotonic() - cached[0] < SCREEN_SIZE_TTL:
+        return cached[1]
+
+    result = run_cmd(["xdotool", "getdisplaygeometry"], disp, strip=False)
     if not result.success:
         return (0, 0)
 
     try:
         parts = result.stdout.split()
-        return (int(parts[0]), int(parts[1]))
+        size = (int(parts[0]), int(parts[1]))
     except (ValueError, IndexError):
         return (0, 0)
+    _screen_size_cache[disp] = (time.monotonic(), size)
+    return size
+
+
+def invalidate_screen_size(display: Optional[str] = None) -> None:
+    """
+    Forget the cached screen size, e.g. after an xrandr change.
+
+    Args:
+        display: X display to forget (default: all displays)
+    """
+    if display is None:
+        _screen_size_cache.clear()
+    else:
+        _screen_size_cache.pop(get_display(display), None)
 
 
 def click_percent(
@@ -357,37 +609,49 @@ def drag(
         Dict with drag info or error
     """
     disp = get_display(display)
+    start_x, start_y, end_x, end_y = int(start_x), int(start_y), int(end_x), int(end_y)
 
-    # Map button name to xdotool button number
-    button_map = {"left": "1", "middle": "2", "right": "3"}
-    btn = button_map.get(button, "1")
-
-    # Move to start position
-    result = run_cmd(["xdotool", "mousemove", "--sync", str(start_x), str(start_y)], disp)
-    if not result.success:
-        return {"error": f"Move to start failed: {result.stderr}"}
-
-    # Press mouse button
-    result = run_cmd(["xdotool", "mousedown", btn], disp)
-    if not result.success:
-        return {"error": f"Mouse down failed: {result.stderr}"}
-
-    # Move to end position
-    result = run_cmd(["xdotool", "mousemove", "--sync", str(end_x), str(end_y)], disp)
-    if not result.success:
-        # Try to release button even if move failed
-        run_cmd(["xdotool", "mouseup", btn], disp)
-        return {"error": f"Move to end failed: {result.stderr}"}
-
-    # Release mouse button
-    result = run_cmd(["xdotool", "mouseup", btn], disp)
-    if not result.success:
-        return {"error": f"Mouse up failed: {result.stderr}"}
-
-    return {
+    btn = _BUTTON_MAP.get(button, "1")
+    dragged = {
         "dragged": {
             "start": {"x": start_x, "y": start_y},
             "end": {"x": end_x, "y": end_y},
             "button": button
         }
     }
+
+    # The press follows the start move on the same X connection, so the
+    # server has applied the warp by then and the move needs no sync.
+    # The end move keeps it so the release lands after the pointer has
+    # arrived.
+
+    # In-process through libxdo when available
+    ok = libxdo.move_mouse(start_x, start_y, disp, sync=False)
+    if ok is not None:
+        pressed = ok and libxdo.mouse_down(int(btn), disp)
+        ok = pressed and libxdo.move_mouse(end_x, end_y, disp)
+        if pressed:
+            # Release even if the move failed, so the button isn't left held
+            ok = libxdo.mouse_up(int(btn), disp) and ok
+        invalidate_screenshot_cache(disp)
+        if not ok:
+            return {"error": "Drag failed: libxdo could not complete the drag"}
+        return dragged
+
+    # One chained xdotool process for the whole press-move-release
+    result = run_cmd(
+        ["xdotool",
+         "mousemove", str(start_x), str(start_y),
+         "mousedown", btn,
+         "mousemove", "--sync", str(end_x), str(end_y),
+         "mouseup", btn],
+        disp
+    )
+    invalidate_screenshot_cache(disp)
+    if not result.success:
+        # xdotool stops at the failing command; make sure the button
+        # isn't left held down
+        run_cmd(["xdotool", "mouseup", btn], disp)
+        return {"error": f"Drag failed: {result.stderr}"}
+
+    return dragged
@@ -0,0 +1,374 @@
+"""
+In-process screen capture through the X MIT-SHM extension.
+
+Binds libX11 and libXext with ctypes and copies the root window into a
+shared-memory XImage, skipping the scrot process, its PNG encode and the
+PNG decode on our side. One X connection and shared segment is kept per
+display for the life of the process. Xlib isn't initialised for threads
+(no XInitThreads), so each display's connection and segment are only
+used under that display's lock.
+
+capture() returns None when MIT-SHM can't be used (library missing,
+remote or SHM-less X server, unusual pixel format), in which case
+callers fall back to scrot. A display where setup failed is retried
+after SHM_RETRY_INTERVAL seconds.
+"""
+
+import contextlib
+import ctypes
+import ctypes.util
+import threading
+import time
+from typing import Optional
+
+# ZPixmap image format and "all planes" mask for XShmGetImage
+Z_PIXMAP = 2
+ALL_PLANES = ctypes.c_ulong(-1).value
+
+# Seconds before MIT-SHM setup is tried again on a display where it failed
+SHM_RETRY_INTERVAL = 60.0
+
+# shmget/shmctl constants
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class XImage(ctypes.Structure):
+    # Leading fields only; instances are always allocated by Xlib
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+    ]
+
+
+class XWindowAttributes(ctypes.Structure):
+    # Leading fields only; XGetWindowAttributes writes the full struct,
+    # so it is padded out below
+    _fields_ = [
+        ("x", ctypes.c_int),
+        ("y", ctypes.c_int),
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("_rest", ctypes.c_byte * 256),
+    ]
+
+
+class _Capture:
+    """Per-display X connection and shared-memory image."""
+
+    def __init__(self, dpy: int, root: int):
+        self.dpy = dpy
+        self.root = root
+        self.image = None
+        self.shminfo = XShmSegmentInfo()
+        self.size = (0, 0)
+
+
+_x11 = None
+_xext = None
+_libc = None
+_load_attempted = False
+
+# Set by the X error handler; Xlib's default handler exits the process.
+# The handler is process-wide, so it is only installed around our SHM
+# requests, under _x_error_lock.
+_x_error = False
+_x_error_lock = threading.Lock()
+
+# display -> _Capture for displays set up for MIT-SHM
+_captures: dict[str, _Capture] = {}
+
+# display -> time.monotonic() when MIT-SHM setup last failed there
+_unavailable: dict[str, float] = {}
+
+# display -> lock held while its connection and segment are in use;
+# _lock guards this dict and library loading
+_display_locks: dict[str, threading.Lock] = {}
+_lock = threading.Lock()
+
+_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+
+@_ERROR_HANDLER
+def _on_x_error(dpy, event):
+    global _x_error
+    _x_error = True
+    return 0
+
+
+@contextlib.contextmanager
+def _trap_x_errors():
+    """
+    Record X errors in _x_error, instead of exiting, during the block.
+
+    The previous error handler is restored afterwards. Requests in the
+    block must end in a round trip (XSync or a reply) so their errors
+    have arrived by then.
+    """
+    global _x_error
+    with _x_error_lock:
+        _x_error = False
+        previous = _x11.XSetErrorHandler(ctypes.cast(_on_x_error, ctypes.c_void_p))
+        try:
+            yield
+        finally:
+            _x11.XSetErrorHandler(previous)
+
+
+def _display_lock(display: str) -> threading.Lock:
+    """Get the lock serialising captures on a display."""
+    with _lock:
+        return _display_locks.setdefault(display, threading.Lock())
+
+
+def _load():
+    """Load libX11, libXext and libc and declare the functions used."""
+    with _lock:
+        return _load_locked()
+
+
+def _load_locked():
+    """_load() with _lock held."""
+    global _x11, _xext, _libc, _load_attempted
+    if _load_attempted:
+        return _xext
+    _load_attempted = True
+
+    try:
+        x11 = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+        xext = ctypes.CDLL(ctypes.util.find_library("Xext") or "libXext.so.6")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    except OSError:
+        return None
+
+    dpy_p = ctypes.c_void_p
+    image_p = ctypes.POINTER(XImage)
+    shminfo_p = ctypes.POINTER(XShmSegmentInfo)
+
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = dpy_p
+    x11.XCloseDisplay.argtypes = [dpy_p]
+    x11.XCloseDisplay.restype = ctypes.c_int
+    x11.XDefaultScreen.argtypes = [dpy_p]
+    x11.XDefaultScreen.restype = ctypes.c_int
+    x11.XRootWindow.argtypes = [dpy_p, ctypes.c_int]
+    x11.XRootWindow.restype = ctypes.c_ulong
+    x11.XDefaultVisual.argtypes = [dpy_p, ctypes.c_int]
+    x11.XDefaultVisual.restype = ctypes.c_void_p
+    x11.XDefaultDepth.argtypes = [dpy_p, ctypes.c_int]
+    x11.XDefaultDepth.restype = ctypes.c_int
+    x11.XGetWindowAttributes.argtypes = [
+        dpy_p, ctypes.c_ulong, ctypes.POINTER(XWindowAttributes)
+    ]
+    x11.XGetWindowAttributes.restype = ctypes.c_int
+    x11.XSync.argtypes = [dpy_p, ctypes.c_int]
+    x11.XSync.restype = ctypes.c_int
+    x11.XFree.argtypes = [ctypes.c_void_p]
+    x11.XFree.restype = ctypes.c_int
+    x11.XSetErrorHandler.argtypes = [ctypes.c_void_p]
+    x11.XSetErrorHandler.restype = ctypes.c_void_p
+
+    try:
+        xext.XShmQueryExtension.argtypes = [dpy_p]
+        xext.XShmQueryExtension.restype = ctypes.c_int
+        xext.XShmCreateImage.argtypes = [
+            dpy_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+            ctypes.c_void_p, shminfo_p, ctypes.c_uint, ctypes.c_uint
+        ]
+        xext.XShmCreateImage.restype = image_p
+        xext.XShmAttach.argtypes = [dpy_p, shminfo_p]
+        xext.XShmAttach.restype = ctypes.c_int
+        xext.XShmDetach.argtypes = [dpy_p, shminfo_p]
+        xext.XShmDetach.restype = ctypes.c_int
+        xext.XShmGetImage.argtypes = [
+            dpy_p, ctypes.c_ulong, image_p, ctypes.c_int, ctypes.c_int, ctypes.c_ulong
+        ]
+        xext.XShmGetImage.restype = ctypes.c_int
+    except AttributeError:
+        return None
+
+    libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+    libc.shmget.restype = ctypes.c_int
+    libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+    libc.shmat.restype = ctypes.c_void_p
+    libc.shmdt.argtypes = [ctypes.c_void_p]
+    libc.shmdt.restype = ctypes.c_int
+    libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+    libc.shmctl.restype = ctypes.c_int
+
+    _x11, _xext, _libc = x11, xext, libc
+    return _xext
+
+
+def _release_image(capture: _Capture) -> None:
+    """Detach and free the capture's shared-memory image, if any."""
+    if capture.image is None:
+        return
+    with _trap_x_errors():
+        _xext.XShmDetach(capture.dpy, ctypes.byref(capture.shminfo))
+        _x11.XSync(capture.dpy, 0)
+    _libc.shmdt(capture.shminfo.shmaddr)
+    _x11.XFree(capture.image)
+    capture.image = None
+    capture.size = (0, 0)
+
+
+def _create_image(capture: _Capture, width: int, height: int) -> bool:
+    """Create a shared-memory image of the given size and attach it."""
+    screen = _x11.XDefaultScreen(capture.dpy)
+    image = _xext.XShmCreateImage(
+        capture.dpy,
+        _x11.XDefaultVisual(capture.dpy, screen),
+        _x11.XDefaultDepth(capture.dpy, screen),
+        Z_PIXMAP, None, ctypes.byref(capture.shminfo), width, height
+    )
+    if not image:
+        return False
+
+    info = image.contents
+    if info.bits_per_pixel != 32 or info.byte_order != 0:
+        # Only little-endian 32-bit pixels map onto Pillow's BGRX mode
+        _x11.XFree(image)
+        return False
+
+    size = info.bytes_per_line * info.height
+    shmid = _libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+    if shmid < 0:
+        _x11.XFree(image)
+        return False
+
+    addr = _libc.shmat(shmid, None, 0)
+    if addr is None or addr == ctypes.c_void_p(-1).value:
+        _libc.shmctl(shmid, IPC_RMID, None)
+        _x11.XFree(image)
+        return False
+
+    capture.shminfo.shmid = shmid
+    capture.shminfo.shmaddr = addr
+    capture.shminfo.readOnly = 0
+    info.data = addr
+
+    with _trap_x_errors():
+        attached = _xext.XShmAttach(capture.dpy, ctypes.byref(capture.shminfo))
+        _x11.XSync(capture.dpy, 0)
+        failed = not attached or _x_error
+    # Mark for removal now; it lives until both sides detach
+    _libc.shmctl(shmid, IPC_RMID, None)
+    if failed:
+        _libc.shmdt(addr)
+        _x11.XFree(image)
+        return False
+
+    capture.image = image
+    capture.size = (width, height)
+    return True
+
+
+def _get_capture(display: str) -> Optional[_Capture]:
+    """
+    Get the capture state for a display, connecting on first use.
+
+    Must be called with the display's lock held.
+    """
+    capture = _captures.get(display)
+    if capture is not None:
+        return capture
+    failed_at = _unavailable.get(display)
+    if failed_at is not None and time.monotonic() - failed_at < SHM_RETRY_INTERVAL:
+        return None
+
+    if _load() is not None:
+        dpy = _x11.XOpenDisplay(display.encode())
+        if dpy and _xext.XShmQueryExtension(dpy):
+            capture = _Capture(dpy, _x11.XRootWindow(dpy, _x11.XDefaultScreen(dpy)))
+        elif dpy:
+            _x11.XCloseDisplay(dpy)
+    if capture is None:
+        _unavailable[display] = time.monotonic()
+        return None
+    _unavailable.pop(display, None)
+    _captures[display] = capture
+    return capture
+
+
+def _disable(display: str, capture: _Capture) -> None:
+    """Close a display's connection after SHM setup failed there."""
+    _release_image(capture)
+    _x11.XCloseDisplay(capture.dpy)
+    del _captures[display]
+    _unavailable[display] = time.monotonic()
+
+
+def capture(display: str):
+    """
+    Capture the whole screen as an RGB PIL Image.
+
+    Safe to call from several threads; captures of the same display run
+    one at a time.
+
+    Args:
+        display: X display to use
+
+    Returns:
+        PIL Image, or None if MIT-SHM capture is unavailable
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    with _display_lock(display):
+        return _capture_locked(display, Image)
+
+
+def _capture_locked(display: str, Image):
+    """capture() with the display's lock held."""
+    state = _get_capture(display)
+    if state is None:
+        return None
+
+    # Screen size can change (xrandr), so check it per capture
+    attrs = XWindowAttributes()
+    if not _x11.XGetWindowAttributes(state.dpy, state.root, ctypes.byref(attrs)):
+        return None
+    size = (attrs.width, attrs.height)
+    if size != state.size:
+        _release_image(state)
+        if not _create_image(state, *size):
+            _disable(display, state)
+            return None
+
+    with _trap_x_errors():
+        ok = _xext.XShmGetImage(state.dpy, state.root, state.image, 0, 0, ALL_PLANES)
+        ok = ok and not _x_error
+    if not ok:
+        return None
+
+    info = state.image.contents
+    data = (ctypes.c_char * (info.bytes_per_line * info.height)).from_address(info.data)
+    # frombytes copies out of the shared segment, which the next capture
+    # reuses, before the lock is released
+    return Image.frombytes("RGB", size, memoryview(data), "raw", "BGRX", info.bytes_per_line, 1)
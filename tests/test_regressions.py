@@ -1,27 +1,139 @@
+import collections
+import contextlib
+import copy
+import ctypes
+import importlib.machinery
 import importlib.util
+import io
+import itertools
+import os
 import pathlib
 import sys
+import tempfile
+import threading
+import time
 import unittest
 from argparse import Namespace
 from types import SimpleNamespace
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
-sys.path.insert(0, str(ROOT / "src"))
+SRC = str(ROOT / "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
 
-from desktop_control import atspi, ocr
+from desktop_control import annotate, atspi, cache, core, daemon, finder, libxdo, ocr, screenshot, waiter, xdotool
+from desktop_control.core import CommandResult
+from desktop_control import element as element_module
 from desktop_control.element import Element, ElementSource
 
 SCRIPT_PATH = ROOT / "scripts" / "desktop.py"
 
-_SPEC = importlib.util.spec_from_file_location("desktop_cli", SCRIPT_PATH)
-desktop = importlib.util.module_from_spec(_SPEC)
-_SPEC.loader.exec_module(desktop)
+
+def _load_desktop():
+    """Load the CLI script as a module, once per process."""
+    module = sys.modules.get("desktop_cli")
+    if module is not None:
+        return module
+    spec = importlib.util.spec_from_file_location("desktop_cli", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["desktop_cli"] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules["desktop_cli"]
+        raise
+    return module
+
+
+# Tests touch no shared files or sockets (only temporary directories)
+# and restore everything they patch, so they can run in any order or in
+# parallel worker processes, e.g. pytest -n auto with pytest-xdist
+desktop = _load_desktop()
+
+
+# Read-only fixtures shared across tests; copy before modifying
+UNNAMED_BUTTON = Element(
+    name="",
+    x=10,
+    y=20,
+    width=40,
+    height=20,
+    source=ElementSource.ATSPI,
+    role_name="push button",
+    states=["visible", "showing"],
+    actions=["click"],
+)
+ATSPI_SUBMIT = atspi.ATSPIElement(
+    name="Submit",
+    role="",
+    role_name="push button",
+    description="",
+    x=0,
+    y=0,
+    width=10,
+    height=10,
+    states=["visible", "showing"],
+    actions=["press"],
+    app_name="Demo",
+)
+
+
+@contextlib.contextmanager
+def attr_swap(obj, name, value):
+    """Set an attribute for a with block; patch.object without the mock."""
+    old = getattr(obj, name)
+    setattr(obj, name, value)
+    try:
+        yield value
+    finally:
+        setattr(obj, name, old)
 
 
 class CliValidationTests(unittest.TestCase):
-    def test_click_rejects_partial_percent_coordinates(self):
-        args = Namespace(
+    # Argument defaults shared by the click-element and wait-for tests
+    CLICK_ELEMENT_ARGS = dict(
+        name=None,
+        role=None,
+        app=None,
+        right=False,
+        double=False,
+        verify=False,
+        display=":10.0",
+    )
+    WAIT_FOR_ARGS = dict(
+        name=None,
+        role=None,
+        app=None,
+        text=None,
+        exact=False,
+        gone=False,
+        timeout=1.0,
+        poll_interval_min=0.05,
+        display=":10.0",
+    )
+
+    # CLI handlers under test, bound once
+    _cmd_click = staticmethod(desktop.cmd_click)
+    _cmd_click_element = staticmethod(desktop.cmd_click_element)
+    _cmd_wait_for = staticmethod(desktop.cmd_wait_for)
+    _cmd_click_id = staticmethod(desktop.cmd_click_id)
+
+    @classmethod
+    def setUpClass(cls):
+        # Stands in for cached element maps; reset per test rather than
+        # rebuilt, since only its calls are checked
+        cls._cached_elements = MagicMock()
+
+    def setUp(self):
+        self._cached_elements.reset_mock()
+
+    @staticmethod
+    def _args(defaults, **overrides):
+        return Namespace(**{**defaults, **overrides})
+
+    def test_cli_validation_errors(self):
+        click_args = Namespace(
             right=False,
             middle=False,
             x_percent=0.5,
@@ -31,109 +143,100 @@ class CliValidationTests(unittest.TestCase):
             y=0,
             display=":10.0",
         )
-        result = desktop.cmd_click(args)
-        self.assertIn("error", result)
-        self.assertIn("Both --x-percent and --y-percent", result["error"])
+        cases = [
+            (self._cmd_click, click_args, "Both --x-percent and --y-percent"),
+            (self._cmd_click_element, self._args(self.CLICK_ELEMENT_ARGS), "requires at least one selector"),
+            (
+                self._cmd_wait_for,
+                self._args(self.WAIT_FOR_ARGS, name="Confirm", text="Confirm"),
+                "either --text or element selectors",
+            ),
+            (self._cmd_wait_for, self._args(self.WAIT_FOR_ARGS), "requires --text"),
+        ]
+        for command, args, message in cases:
+            with self.subTest(command=command.__name__, message=message):
+                # A result without an "error" key fails too
+                self.assertIn(message, command(args).get("error", ""))
+
+    def test_click_element_verify_requires_non_empty_text(self):
+        args = self._args(self.CLICK_ELEMENT_ARGS, role="button", verify=True)
+
+        fake_finder = SimpleNamespace(find=lambda *a, **k: UNNAMED_BUTTON)
+        with attr_swap(finder, "ElementFinder", lambda *a, **k: fake_finder), attr_swap(
+            ocr, "is_available", lambda: True
+        ):
+            result = self._cmd_click_element(args)
 
-    def test_click_element_requires_selector(self):
-        args = Namespace(
-            name=None,
-            role=None,
-            app=None,
-            right=False,
-            double=False,
-            verify=False,
-            display=":10.0",
-        )
-        result = desktop.cmd_click_element(args)
         self.assertIn("error", result)
-        self.assertIn("requires at least one selector", result["error"])
+        self.assertIn("verification requires text", result["error"].lower())
 
-    def test_click_element_verify_requires_non_empty_text(self):
+    def test_click_element_verify_ocrs_only_around_element(self):
         fake_element = Element(
-            name="",
-            x=10,
+            name="Next step",
+            x=100,
             y=20,
-            width=40,
-            height=20,
+            width=80,
+            height=30,
             source=ElementSource.ATSPI,
             role_name="push button",
-            states=["visible", "showing"],
-            actions=["click"],
-        )
-        args = Namespace(
-            name=None,
-            role="button",
-            app=None,
-            right=False,
-            double=False,
-            verify=True,
-            display=":10.0",
         )
+        args = self._args(self.CLICK_ELEMENT_ARGS, name="Next", verify=True)
+        screen = SimpleNamespace(size=(1920, 1080), crop=lambda box: ("crop", box))
 
-        with patch.object(desktop, "ElementFinder") as finder_cls, patch.object(
-            desktop.ocr, "is_available", return_value=True
-        ):
+        with patch.object(finder, "ElementFinder") as finder_cls, patch.object(
+            ocr, "is_available", return_value=True
+        ), patch.object(desktop.screenshot_module, "screenshot_to_pil", return_value=screen), patch.object(
+            ocr, "find_text", return_value=[]
+        ) as find_text:
             finder_cls.return_value.find.return_value = fake_element
-            result = desktop.cmd_click_element(args)
+            result = self._cmd_click_element(args)
 
-        self.assertIn("error", result)
-        self.assertIn("verification requires text", result["error"].lower())
+        self.assertIn("text not found", result["error"])
+        find_text.assert_called_once_with(("crop", (20, 0, 260, 82)), "Next")
 
-    def test_wait_for_rejects_ambiguous_text_and_element_selectors(self):
-        args = Namespace(
-            name="Confirm",
-            role=None,
-            app=None,
-            text="Confirm",
-            exact=False,
-            gone=False,
-            timeout=1.0,
-            display=":10.0",
-        )
-        result = desktop.cmd_wait_for(args)
-        self.assertIn("error", result)
-        self.assertIn("either --text or element selectors", result["error"])
+    def test_click_element_verify_ocrs_whole_screen_for_off_screen_element(self):
+        for x, y in [(2500, 20), (-400, 20), (100, -300)]:
+            with self.subTest(x=x, y=y):
+                element = Element(name="Next", x=x, y=y, width=80, height=30, source=ElementSource.OCR)
+                self.assertEqual(desktop._verify_region(element, (1920, 1080)), (0, 0, 1920, 1080))
 
-    def test_wait_for_requires_selectors(self):
-        args = Namespace(
-            name=None,
-            role=None,
-            app=None,
-            text=None,
-            exact=False,
-            gone=False,
-            timeout=1.0,
-            display=":10.0",
+    def test_click_element_verify_trusts_exact_atspi_button_match(self):
+        fake_element = Element(
+            name="Next",
+            x=100,
+            y=20,
+            width=80,
+            height=30,
+            source=ElementSource.ATSPI,
+            role_name="push button",
         )
-        result = desktop.cmd_wait_for(args)
-        self.assertIn("error", result)
-        self.assertIn("requires --text", result["error"])
+        args = self._args(self.CLICK_ELEMENT_ARGS, name="next", verify=True)
+
+        with patch.object(finder, "ElementFinder") as finder_cls, patch.object(
+            ocr, "is_available", return_value=True
+        ), patch.object(desktop.xdotool, "get_screen_size", return_value=(1920, 1080)), patch.object(
+            desktop.screenshot_module, "screenshot_to_pil", side_effect=AssertionError("OCR should be skipped")
+        ), patch.object(desktop.xdotool, "click", return_value={"clicked": {"x": 140, "y": 35}}) as click:
+            finder_cls.return_value.find.return_value = fake_element
+            result = self._cmd_click_element(args)
+
+        click.assert_called_once()
+        self.assertEqual(result["clicked"]["x"], 140)
 
     def test_wait_for_gone_text_uses_disappearance_path(self):
         calls = []
 
-        class FakeWaiter:
-            def wait_for_text(self, *args, **kwargs):
-                raise AssertionError("wait_for_text should not be called for --gone")
-
-            def wait_until_gone(self, **kwargs):
-                calls.append(kwargs)
-                return True
+        def wait_for_text(*args, **kwargs):
+            raise AssertionError("wait_for_text should not be called for --gone")
 
-        args = Namespace(
-            name=None,
-            role=None,
-            app=None,
-            text="Loading",
-            exact=True,
-            gone=True,
-            timeout=2.0,
-            display=":10.0",
+        fake_waiter = SimpleNamespace(
+            wait_for_text=wait_for_text,
+            wait_until_gone=lambda **kwargs: calls.append(kwargs) or True,
         )
+        args = self._args(self.WAIT_FOR_ARGS, text="Loading", exact=True, gone=True, timeout=2.0)
 
-        with patch.object(desktop, "Waiter", return_value=FakeWaiter()):
-            result = desktop.cmd_wait_for(args)
+        with attr_swap(waiter, "Waiter", lambda *a, **k: fake_waiter):
+            result = self._cmd_wait_for(args)
 
         self.assertEqual(result["gone"], True)
         self.assertEqual(len(calls), 1)
@@ -141,9 +244,11 @@ class CliValidationTests(unittest.TestCase):
         self.assertEqual(calls[0]["exact"], True)
 
     def test_click_id_rejects_cache_when_screen_size_changed(self):
+        cached = self._cached_elements
         fake_cache = SimpleNamespace(
             screen_size=(100, 100),
             check_screen_size=lambda _: False,
+            snapshot=lambda: (cached, True),
         )
         args = Namespace(
             element_id=1,
@@ -152,45 +257,343 @@ class CliValidationTests(unittest.TestCase):
             display=":10.0",
         )
 
-        with patch.object(desktop.element_cache, "is_cache_valid", return_value=True), patch.object(
-            desktop.element_cache, "get_cache", return_value=fake_cache
-        ), patch.object(desktop.xdotool, "get_screen_size", return_value=(200, 200)), patch.object(
-            desktop.element_cache, "get_element"
-        ) as get_element:
-            result = desktop.cmd_click_id(args)
+        cache_module = SimpleNamespace(get_cache=lambda: fake_cache)
+        with attr_swap(desktop, "element_cache", cache_module), attr_swap(
+            desktop.xdotool, "get_screen_size", lambda *a, **k: (200, 200)
+        ):
+            result = self._cmd_click_id(args)
 
         self.assertIn("error", result)
         self.assertEqual(result["cache_valid"], False)
         self.assertEqual(result["expected_screen_size"]["width"], 100)
         self.assertEqual(result["current_screen_size"]["width"], 200)
-        get_element.assert_not_called()
+        cached.get.assert_not_called()
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_screenshot_annotated_overlaps_capture_and_saves_both_images(self):
+        elements = [
+            Element(name="OK", x=100, y=50, width=40, height=20, source=ElementSource.ATSPI),
+        ]
+        args = Namespace(
+            display=":10.0",
+            output=None,
+            app=None,
+            role=None,
+            include_hidden=False,
+            max_elements=10,
+            max_width=None,
+            max_height=None,
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            args.output = str(pathlib.Path(tmp) / "shot")
+            with patch.object(
+                desktop.screenshot_module, "screenshot_to_pil", return_value=ocr.Image.new("RGB", (400, 200))
+            ), patch.object(finder, "ElementFinder") as finder_cls, patch.object(
+                desktop.element_cache, "store_elements"
+            ) as store:
+                finder_cls.return_value.list_interactive.return_value = elements
+                result = desktop.cmd_screenshot_annotated(args)
+
+            self.assertTrue(pathlib.Path(result["screenshot_path"]).exists())
+            self.assertTrue(pathlib.Path(result["annotated_path"]).exists())
+
+        store.assert_called_once_with(elements, (400, 200))
+        self.assertEqual(result["elements"][0]["x_percent"], 0.3)
+        self.assertEqual(result["elements"][0]["y_percent"], 0.3)
+
+    def test_write_result_compact_output_is_single_line(self):
+        out = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        with patch.object(desktop.sys, "stdout", out):
+            desktop.write_result({"clicked": {"x": 1, "y": 2}}, compact=True)
+
+        self.assertEqual(out.buffer.getvalue(), b'{"clicked":{"x":1,"y":2}}\n')
+
+    def test_fast_args_match_argparse(self):
+        parser = desktop.build_parser()
+        for argv in (
+            ["click", "10", "20"], ["move", "1", "2"], ["key", "ctrl+a"], ["type", "hello world"],
+            ["screen-size"], ["position"], ["active"], ["windows"],
+        ):
+            with self.subTest(argv=argv):
+                self.assertEqual(desktop.parse_fast_args(argv), parser.parse_args(argv))
+
+        self.assertIsNone(desktop.parse_fast_args(["click", "10", "20", "--right"]))
+        self.assertIsNone(desktop.parse_fast_args(["type", "-n"]))
+        self.assertIsNone(desktop.parse_fast_args(["key", "--seq", "Tab", "Return"]))
+        self.assertIsNone(desktop.parse_fast_args(["windows", "extra"]))
+
+    def test_cli_script_loads_through_bytecode_cache(self):
+        # SourceFileLoader reads and writes __pycache__, so later test
+        # processes unmarshal the script instead of compiling it
+        self.assertIsInstance(desktop.__spec__.loader, importlib.machinery.SourceFileLoader)
+        self.assertTrue(desktop.__spec__.cached.endswith(".pyc"))
+
+    def test_daemon_runs_commands_sent_over_socket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sock_path = str(pathlib.Path(tmp) / "ctl.sock")
+            self.assertIsNone(daemon.request(["position"], False, sock_path))
+
+            ready = threading.Event()
+            server = threading.Thread(
+                target=daemon.serve,
+                args=(sock_path, desktop.handle_daemon_request, ready),
+                daemon=True,
+            )
+            with patch.object(desktop.xdotool, "move", return_value={"moved": {"x": 5, "y": 6}}) as move:
+                server.start()
+                self.assertTrue(ready.wait(5))
+                reply = daemon.request(["move", "5", "6"], False, sock_path, timeout=5)
+                bad = daemon.request(["move", "x"], True, sock_path, timeout=5)
+
+        self.assertEqual(reply, {"result": {"moved": {"x": 5, "y": 6}}, "compact": True})
+        move.assert_called_once_with(5, 6, display=desktop.DEFAULT_DISPLAY)
+        self.assertIn("invalid int value", bad["result"]["error"])
+
+
+    def test_daemon_requests_reread_screen_size(self):
+        sizes = iter([CommandResult(0, "1920 1080\n", ""), CommandResult(0, "1280 720\n", "")])
+        xdotool.invalidate_screen_size()
+        with patch.object(xdotool, "run_cmd", side_effect=lambda *a, **k: next(sizes)):
+            first = desktop.handle_daemon_request(["screen-size"], False)
+            second = desktop.handle_daemon_request(["screen-size"], False)
+        xdotool.invalidate_screen_size()
+
+        self.assertEqual(first["result"]["width"], 1920)
+        self.assertEqual(second["result"]["width"], 1280)
 
+    def test_daemon_socket_defaults_to_private_locations(self):
+        with patch.dict(os.environ, {"XDG_RUNTIME_DIR": "/run/user/1000"}, clear=True):
+            self.assertEqual(daemon.default_socket_path(), "/run/user/1000/desktop-control.sock")
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(
+                daemon.default_socket_path(), f"/tmp/desktop-control-{os.getuid()}/daemon.sock"
+            )
+        with tempfile.TemporaryDirectory() as tmp:
+            shared = pathlib.Path(tmp) / "shared"
+            shared.mkdir()
+            shared.chmod(0o755)
+            with self.assertRaises(PermissionError):
+                daemon._make_private_dir(str(shared))
+            private = pathlib.Path(tmp) / "private"
+            daemon._make_private_dir(str(private))
+            self.assertEqual(private.stat().st_mode & 0o777, 0o700)
+
+    def test_daemon_request_skips_socket_owned_by_another_user(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sock_path = str(pathlib.Path(tmp) / "ctl.sock")
+            handler = MagicMock(return_value={"result": {}})
+            ready = threading.Event()
+            threading.Thread(target=daemon.serve, args=(sock_path, handler, ready), daemon=True).start()
+            self.assertTrue(ready.wait(5))
+            with patch.object(daemon, "_peer_uid", return_value=os.getuid() + 1):
+                self.assertIsNone(daemon.request(["move", "5", "6"], False, sock_path, timeout=5))
+
+        handler.assert_not_called()
 
 class CoreBehaviorTests(unittest.TestCase):
+    def setUp(self):
+        # Exercise the xdotool command path even where libxdo is installed
+        patcher = patch.object(libxdo, "_handle", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_run_cmd_resolves_executable_once_and_keeps_fds_open(self):
+        completed = SimpleNamespace(returncode=0, stdout=b"", stderr=b"")
+        with patch.dict(core._executable_cache, clear=True), \
+             patch.object(core.shutil, "which", return_value="/usr/bin/xdotool") as which, \
+             patch.object(core.subprocess, "run", return_value=completed) as run:
+            core.run_cmd(["xdotool", "key", "a"])
+            core.run_cmd(["xdotool", "key", "b"])
+
+        which.assert_called_once_with("xdotool")
+        self.assertEqual(run.call_args.args[0], ["/usr/bin/xdotool", "key", "b"])
+        self.assertIs(run.call_args.kwargs["close_fds"], False)
+
+    @unittest.skipUnless(
+        getattr(core.subprocess, "_USE_POSIX_SPAWN", False), "posix_spawn not used here"
+    )
+    def test_run_cmd_starts_children_with_posix_spawn(self):
+        with patch.object(os, "posix_spawn", wraps=os.posix_spawn) as spawn:
+            result = core.run_cmd([sys.executable, "-c", "print('ok')"], display=":99")
+
+        self.assertEqual(result.stdout, "ok")
+        spawn.assert_called_once()
+
+    @unittest.skipUnless(sys.version_info >= (3, 10), "slotted dataclasses need Python 3.10")
+    def test_element_records_are_slotted(self):
+        for record in (UNNAMED_BUTTON, ATSPI_SUBMIT, CommandResult(0, "", "")):
+            with self.subTest(type=type(record).__name__):
+                self.assertFalse(hasattr(record, "__dict__"))
+
+    def test_merge_elements_batch_overlap_matches_pairwise(self):
+        atspi_elems = [
+            atspi.ATSPIElement(
+                name="OK", role="", role_name="push button", description="",
+                x=100, y=100, width=80, height=30, states=[], actions=[],
+                app_name="",
+            ),
+            atspi.ATSPIElement(
+                name="Empty", role="", role_name="filler", description="",
+                x=0, y=0, width=0, height=0, states=[], actions=[],
+                app_name="",
+            ),
+        ]
+        ocr_matches = [
+            ocr.OCRMatch(text="OK", x=110, y=105, width=20, height=12, confidence=95),
+            ocr.OCRMatch(text="Edge", x=178, y=100, width=40, height=30, confidence=90),
+            ocr.OCRMatch(text="Cancel", x=300, y=100, width=60, height=20, confidence=90),
+            ocr.OCRMatch(text="Cancel", x=305, y=102, width=50, height=16, confidence=80),
+        ]
+
+        merged = element_module.merge_elements(atspi_elems, ocr_matches)
+        with patch.object(element_module, "_overlap_any", return_value=None):
+            pairwise = element_module.merge_elements(atspi_elems, ocr_matches)
+
+        self.assertEqual(merged, pairwise)
+        self.assertEqual([e.name for e in merged], ["OK", "Empty", "Edge", "Cancel"])
+
+    def test_box_grid_keeps_screen_sized_boxes_out_of_cells(self):
+        screen = Element(name="Desktop", x=0, y=0, width=3840, height=2160, source=ElementSource.ATSPI)
+        button = Element(name="OK", x=100, y=100, width=80, height=30, source=ElementSource.ATSPI)
+        far = Element(name="Far", x=3000, y=2000, width=80, height=30, source=ElementSource.ATSPI)
+        grid = element_module._BoxGrid([screen, button, far])
+
+        self.assertLessEqual(len(grid._cells), 2 * element_module._BoxGrid.MAX_CELLS)
+        self.assertEqual(grid.candidates(button), [screen, button])
+        self.assertEqual(grid.candidates(screen), [screen, button, far])
+
     def test_atspi_clickable_filter_accepts_press_action(self):
-        elem = atspi.ATSPIElement(
-            name="Submit",
-            role="",
-            role_name="push button",
-            description="",
-            x=0,
-            y=0,
-            width=10,
-            height=10,
-            states=["visible", "showing"],
-            actions=["press"],
-            app_name="Demo",
-        )
+        # Renamed below, so work on a copy of the shared fixture
+        elem = copy.copy(ATSPI_SUBMIT)
 
-        def fake_traverse_tree(*, app_filter=None, filter_fn=None):
+        def fake_traverse_tree(
+            *, app_filter=None, filter_fn=None, role_filter=None, prefilter_fn=None, node_filter=None
+        ):
+            if prefilter_fn is not None and not prefilter_fn(elem):
+                return
             if filter_fn is None or filter_fn(elem):
                 yield elem
 
-        with patch.object(atspi, "traverse_tree", side_effect=fake_traverse_tree):
+        with attr_swap(atspi, "traverse_tree", fake_traverse_tree):
             results = atspi.find_elements(clickable_only=True, max_results=5)
+            self.assertEqual(atspi.find_elements(name="SUBMIT"), [elem])
+            self.assertEqual(atspi.find_elements(name="Cancel"), [])
+            elem.name = "Straße"
+            self.assertEqual(atspi.find_elements(name="STRASSE"), [elem])
 
         self.assertEqual(len(results), 1)
-        self.assertEqual(results[0].name, "Submit")
+        self.assertIs(results[0], elem)
+
+    def test_list_windows_batches_name_lookups(self):
+        calls = []
+
+        def fake_run_cmd(cmd, display=None, timeout=None, input=None, strip=True):
+            calls.append(cmd)
+            if "getwindowgeometry" in cmd:
+                # A window closed between the search and the lookups
+                return CommandResult(1, "", "X Error of failed request: BadWindow")
+            if cmd[:2] == ["xdotool", "search"]:
+                return CommandResult(0, "11\n22\n33", "")
+            self.assertEqual(cmd, ["xdotool", "-"])
+            self.assertEqual(input, "getwindowname 11\ngetwindowname 22\ngetwindowname 33\n")
+            return CommandResult(0, "\nFirefox\n\n", "")
+
+        with patch.object(xdotool, "run_cmd", side_effect=fake_run_cmd):
+            result = xdotool.list_windows(display=":10.0")
+
+        self.assertEqual(result["windows"], [{"window_id": "22", "name": "Firefox"}])
+        self.assertEqual(len(calls), 3)
+
+    def test_find_window_gets_ids_and_names_from_one_chained_search(self):
+        geometry = "".join(
+            f"WINDOW={wid}\nX=0\nY=0\nWIDTH=640\nHEIGHT=480\nSCREEN=0\n" for wid in (11, 22)
+        )
+        output = geometry + "Terminal\nX=1 editor\n"
+
+        with patch.object(
+            xdotool, "run_cmd", return_value=CommandResult(0, output, "")
+        ) as run_cmd:
+            result = xdotool.find_window("e", display=":10.0")
+        run_cmd.assert_called_once()
+        self.assertEqual(
+            result["windows"],
+            [{"window_id": "11", "name": "Terminal"}, {"window_id": "22", "name": "X=1 editor"}],
+        )
+
+        with patch.object(xdotool, "run_cmd", return_value=CommandResult(1, "", "")) as run_cmd:
+            result = xdotool.find_window("nothing", display=":10.0")
+        run_cmd.assert_called_once()
+        self.assertEqual(result["windows"], [])
+
+    def test_get_active_window_parses_chained_output(self):
+        output = "\nWINDOW=4194311\nX=-10\nY=20\nWIDTH=800\nHEIGHT=600\nSCREEN=0\n"
+
+        with patch.object(
+            xdotool, "run_cmd", return_value=CommandResult(0, output, "")
+        ) as run_cmd:
+            result = xdotool.get_active_window(display=":10.0")
+
+        # One process for ID, name and geometry
+        run_cmd.assert_called_once()
+        self.assertEqual(
+            run_cmd.call_args.args[0],
+            ["xdotool", "getactivewindow", "getwindowname", "%1",
+             "getwindowgeometry", "--shell", "%1"],
+        )
+        self.assertEqual(result["window_id"], "4194311")
+        self.assertEqual(result["name"], "")
+        self.assertEqual(result["geometry"]["width"], 800)
+        # Windows partly off-screen to the left have negative positions
+        self.assertEqual(result["geometry"]["x"], -10)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_downsample_draft_keeps_scale_relative_to_original(self):
+        from PIL import Image
+
+        data = io.BytesIO()
+        Image.new("RGB", (2560, 1440), "white").save(data, "JPEG")
+        data.seek(0)
+
+        img = Image.open(data)
+        small, scale = annotate.downsample_image(img, 1000, 1000, draft=True)
+
+        self.assertEqual(img.size, (1280, 720))
+        self.assertEqual(small.size, (1000, 562))
+        self.assertEqual(scale, 1000 / 2560)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_annotate_screenshot_draws_on_downsampled_image_only(self):
+        from PIL import Image
+
+        element = Element(name="OK", x=100, y=100, width=40, height=20, source=ElementSource.ATSPI)
+
+        small = Image.new("RGB", (640, 480), "white")
+        original, annotated, scale = annotate.annotate_screenshot(small, [element])
+        self.assertIsNot(annotated, small)
+        self.assertEqual(small.getpixel((120, 110)), (255, 255, 255))
+
+        large = Image.new("RGB", (2560, 1440), "white")
+        with patch.object(Image.Image, "copy", side_effect=AssertionError("unexpected copy")):
+            original, annotated, scale = annotate.annotate_screenshot(large, [element])
+        self.assertIs(original, large)
+        self.assertEqual(annotated.size, (1280, 720))
+        self.assertEqual(large.getpixel((120, 110)), (255, 255, 255))
+
+    def test_screenshot_to_pil_reuses_recent_capture_until_input(self):
+        screenshot.invalidate_screenshot_cache()
+        frames = iter(["frame-1", "frame-2"])
+
+        with patch.object(screenshot, "_capture_pil", side_effect=lambda _: next(frames)), patch.object(
+            xdotool, "run_cmd", return_value=CommandResult(0, "", "")
+        ):
+            first = screenshot.screenshot_to_pil(":10.0")
+            second = screenshot.screenshot_to_pil(":10.0")
+            xdotool.key("Return", display=":10.0")
+            third = screenshot.screenshot_to_pil(":10.0")
+
+        screenshot.invalidate_screenshot_cache()
+        self.assertEqual((first, second, third), ("frame-1", "frame-1", "frame-2"))
 
     def test_ocr_find_text_empty_query_returns_empty(self):
         with patch.object(ocr, "TESSERACT_AVAILABLE", True), patch.object(
@@ -198,6 +601,1602 @@ class CoreBehaviorTests(unittest.TestCase):
         ):
             self.assertEqual(ocr.find_text(image=None, text="   "), [])
 
+    def test_ocr_find_text_matches_word_by_word_scan(self):
+        texts = ["File", "Save", "As", "save", "as", "copy", "Save", "Save", "As"]
+        words = [
+            ocr.OCRMatch(text=t, x=i * 50, y=10, width=40, height=12, confidence=90.0, word_index=i)
+            for i, t in enumerate(texts)
+        ]
+        result = ocr.OCRResult(words=words, full_text=" ".join(texts))
+
+        def scan(query, exact, case_sensitive):
+            # Reference: join every window of consecutive words
+            search = query if case_sensitive else query.lower()
+            count = len(search.split())
+            found = []
+            for i in range(len(words) - count + 1):
+                joined = " ".join(w.text if case_sensitive else w.text.lower() for w in words[i:i + count])
+                if (joined == search) if exact else (search in joined):
+                    found.append(i)
+            return found
+
+        queries = [
+            "save", "Sav", "as", "save as", "ave a", "Save As", "e save",
+            "as copy save", "s s", "save  as", "copy nope",
+        ]
+        with patch.object(ocr, "TESSERACT_AVAILABLE", True), patch.object(ocr, "ocr_image", return_value=result):
+            for query in queries:
+                for exact in (False, True):
+                    for case_sensitive in (False, True):
+                        with self.subTest(query=query, exact=exact, case_sensitive=case_sensitive):
+                            matches = ocr.find_text(
+                                None, query, exact=exact, case_sensitive=case_sensitive, psm=11
+                            )
+                            self.assertEqual(
+                                [m.word_index for m in matches], scan(query, exact, case_sensitive)
+                            )
+
+    def test_ocr_find_text_regex_multi_matches_each_pattern_with_one_ocr_pass(self):
+        words = [
+            ocr.OCRMatch(text=t, x=i * 50, y=10, width=40, height=12, confidence=90.0, word_index=i)
+            for i, t in enumerate(["File", "Save", "Save-As", "Close"])
+        ]
+        result = ocr.OCRResult(words=words, full_text="File Save Save-As Close")
+        patterns = [r"^save$", r"as\b", r"(unclosed", r"^c"]
+
+        with patch.object(ocr, "TESSERACT_AVAILABLE", True), patch.object(
+            ocr, "ocr_image", return_value=result
+        ) as ocr_image:
+            found = ocr.find_text_regex_multi(None, patterns)
+            single = {p: ocr.find_text_regex(None, p) for p in patterns}
+
+        self.assertEqual(ocr_image.call_count, 1 + len(patterns))
+        self.assertEqual(found, single)
+        self.assertEqual([w.text for w in found[r"as\b"]], ["Save-As"])
+        self.assertEqual(found[r"(unclosed"], [])
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_ocr_find_first_text_stops_recognizing_after_matching_line(self):
+        lines = [["File", "Edit"], ["Save", "As"], ["Close"]]
+
+        class FakeWord:
+            def __init__(self, text, x, y):
+                self.text, self.box = text, (x, y, x + 30, y + 10)
+
+            def BoundingBox(self, level):
+                return self.box
+
+            def GetUTF8Text(self, level):
+                return self.text
+
+            def Confidence(self, level):
+                return 90.0
+
+        class FakeAPI:
+            recognized = 0
+
+            def SetImageBytes(self, data, width, height, bpp, bpl):
+                self.image = (len(data), width, height, bpp, bpl)
+
+            def GetComponentImages(self, level, text_only):
+                return [(None, {"x": 0, "y": 20 * i, "w": 200, "h": 15}, 0, 0) for i in range(len(lines))]
+
+            def SetRectangle(self, x, y, w, h):
+                self.line = y // 20
+
+            def Recognize(self):
+                self.recognized += 1
+
+            def GetIterator(self):
+                return [FakeWord(t, 40 * i, 20 * self.line) for i, t in enumerate(lines[self.line])]
+
+        api = FakeAPI()
+        fake_tesserocr = SimpleNamespace(
+            RIL=SimpleNamespace(TEXTLINE=2, WORD=3),
+            iterate_level=lambda iterator, level: iter(iterator),
+        )
+        frame = ocr.Image.new("RGB", (1200, 600), "white")
+
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        with patch.object(ocr, "TESSEROCR_AVAILABLE", True), patch.object(
+            ocr, "tesserocr", fake_tesserocr
+        ), patch.object(ocr, "_tesserocr_api", return_value=api):
+            match = ocr.find_first_text(frame, "edit save")
+
+        self.assertEqual((match.text, match.word_index, match.x, match.y), ("Edit Save", 1, 40, 0))
+        self.assertEqual(api.recognized, 2)
+        # The thresholded frame goes in as raw 8-bit pixels, not an encoded image
+        self.assertEqual(api.image, (1200 * 600, 1200, 600, 1, 1200))
+        self.assertIsNone(ocr._last_ocr)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_ocr_image_skips_tesseract_for_unchanged_frame(self):
+        data = {"text": ["Save"], "conf": ["90"], "left": [1], "top": [2], "width": [3], "height": [4]}
+        frame = ocr.Image.new("RGB", (40, 20), "white")
+        changed = frame.copy()
+        changed.putpixel((5, 5), (0, 0, 0))
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+
+        with patch.object(ocr.pytesseract, "image_to_data", return_value=data) as image_to_data:
+            first = ocr.ocr_image(frame, preprocess=False)
+            second = ocr.ocr_image(frame.copy(), preprocess=False)
+            ocr.ocr_image(changed, preprocess=False)
+            third = ocr.ocr_image(frame, preprocess=False)
+            with patch.object(ocr, "_frame_key", side_effect=AssertionError("same image rehashed")):
+                fourth = ocr.ocr_image(frame, preprocess=False)
+
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        self.assertIs(first, second)
+        self.assertIs(first, third)
+        self.assertIs(first, fourth)
+        self.assertEqual(image_to_data.call_count, 2)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_ocr_cache_survives_concurrent_callers(self):
+        frames = [ocr.Image.new("RGB", (8, 8), (i, 0, 0)) for i in range(40)]
+        errors = []
+
+        def worker(offset):
+            try:
+                for i in range(50):
+                    ocr.ocr_image(frames[(i * 3 + offset) % len(frames)], preprocess=False)
+            except Exception as e:
+                errors.append(e)
+
+        class SlowCache(collections.OrderedDict):
+            # Widens the gap between a lookup and the LRU update after it
+            def get(self, key, default=None):
+                value = super().get(key, default)
+                time.sleep(0.0005)
+                return value
+
+        cache = SlowCache()
+        ocr._last_ocr = None
+        with patch.object(ocr, "_ocr_cache", cache), patch.object(ocr, "OCR_CACHE_SIZE", 4), patch.object(
+            ocr, "_run_tesseract", return_value=[]
+        ), patch.object(ocr, "_changed_regions", return_value=None):
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+        ocr._last_ocr = None
+        cache_size = len(cache)
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(cache_size, 4)
+
+    def test_ocr_thread_limit_only_reaches_tesseract(self):
+        with patch.dict(os.environ, {"DISPLAY": ":10.0"}):
+            os.environ.pop("OMP_THREAD_LIMIT", None)
+            env = dict(ocr._TesseractEnv())
+            self.assertEqual((env["OMP_THREAD_LIMIT"], env["DISPLAY"]), ("1", ":10.0"))
+            self.assertNotIn("OMP_THREAD_LIMIT", os.environ)
+            os.environ["OMP_THREAD_LIMIT"] = "4"
+            self.assertEqual(ocr._TesseractEnv()["OMP_THREAD_LIMIT"], "4")
+        if ocr.TESSERACT_AVAILABLE:
+            self.assertIsInstance(ocr.pytesseract.pytesseract.environ, ocr._TesseractEnv)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_ocr_uses_lstm_engine_and_configured_tessdata(self):
+        data = {"text": [], "conf": [], "left": [], "top": [], "width": [], "height": []}
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        with patch.dict(ocr.os.environ, {ocr.TESSDATA_ENV: "/opt/tessdata_fast"}), patch.object(
+            ocr, "TESSEROCR_AVAILABLE", False
+        ), patch.object(ocr.pytesseract, "image_to_data", return_value=data) as image_to_data:
+            ocr.ocr_image(ocr.Image.new("RGB", (40, 20), "white"), preprocess=False)
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+
+        self.assertEqual(
+            image_to_data.call_args.kwargs["config"],
+            '--psm 11 --oem 1 -c load_system_dawg=0 -c load_freq_dawg=0 '
+            '-c preserve_interword_spaces=1 --tessdata-dir "/opt/tessdata_fast"',
+        )
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_ocr_gpu_backend_lines_split_into_words_with_tesseract_fallback(self):
+        class FakeReader:
+            fail = False
+
+            def readtext(self, arr):
+                if self.fail:
+                    raise RuntimeError("CUDA out of memory")
+                return [
+                    ([[100, 40], [190, 40], [190, 60], [100, 60]], "Save As", 0.9),
+                    ([[10, 10], [50, 10], [50, 30], [10, 30]], "File", 0.95),
+                    ([[10, 80], [50, 80], [50, 95], [10, 95]], "noise", 0.1),
+                ]
+
+        reader = FakeReader()
+        data = {"text": ["Edit"], "conf": ["90"], "left": [1], "top": [2], "width": [3], "height": [4]}
+        frame = ocr.Image.new("RGB", (200, 100), "white")
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        with patch.object(ocr, "_get_gpu_backend", return_value=("easyocr", reader)), patch.object(
+            ocr.pytesseract, "image_to_data", return_value=data
+        ) as image_to_data:
+            gpu = ocr.ocr_image(frame, preprocess=False)
+            reader.fail = True
+            ocr._last_ocr = None
+            ocr._ocr_cache.clear()
+            fallback = ocr.ocr_image(frame, preprocess=False)
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+
+        self.assertEqual(
+            [(w.text, w.x, w.y, w.width, w.confidence) for w in gpu.words],
+            [("File", 10, 10, 40, 95.0), ("Save", 100, 40, 51, 90.0), ("As", 164, 40, 25, 90.0)],
+        )
+        self.assertEqual([w.text for w in fallback.words], ["Edit"])
+        self.assertEqual(image_to_data.call_count, 1)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_ocr_find_text_picks_psm_from_crop_size(self):
+        self.assertEqual(ocr.auto_psm(80, 30), 8)
+        self.assertEqual(ocr.auto_psm(400, 30), 7)
+        self.assertEqual(ocr.auto_psm(300, 150), 6)
+        self.assertEqual(ocr.auto_psm(1920, 1080), 11)
+
+        with patch.object(ocr, "ocr_image", return_value=ocr.OCRResult()) as ocr_image:
+            ocr.find_text(ocr.Image.new("RGB", (400, 30), "white"), "Save")
+            ocr.find_text(ocr.Image.new("RGB", (400, 30), "white"), "Save", psm=11)
+        self.assertEqual([c.kwargs["psm"] for c in ocr_image.call_args_list], [7, 11])
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_ocr_image_rereads_only_changed_region(self):
+        def data(*words):
+            return {
+                "text": [w[0] for w in words],
+                "conf": ["90"] * len(words),
+                "left": [w[1] for w in words],
+                "top": [w[2] for w in words],
+                "width": [20] * len(words),
+                "height": [8] * len(words),
+            }
+
+        frame = ocr.Image.new("RGB", (200, 100), "white")
+        changed = frame.copy()
+        changed.putpixel((150, 50), (0, 0, 0))
+        sizes = []
+
+        def fake_image_to_data(image, config, output_type):
+            sizes.append(image.size)
+            if len(sizes) == 1:
+                return data(("Save", 10, 10), ("Open", 145, 46))
+            return data(("Close", 3, 4))
+
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        with patch.object(ocr.pytesseract, "image_to_data", side_effect=fake_image_to_data):
+            ocr.ocr_image(frame, preprocess=False)
+            result = ocr.ocr_image(changed, preprocess=False)
+
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        self.assertEqual(sizes[0], (200, 100))
+        self.assertLess(sizes[1][0] * sizes[1][1], 200 * 100 // 4)
+        self.assertEqual(result.full_text, "Save Close")
+        self.assertEqual((result.words[1].x, result.words[1].y), (145, 46))
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_ocr_image_tiles_offset_words_and_drop_overlap_duplicates(self):
+        def fake_image_to_data(image, config, output_type):
+            # Both tiles read "Split" from the overlap; the right one better
+            if image.size == (120, 50):
+                words = [("Left", 10, 10, "90"), ("Split", 95, 20, "60")]
+            else:
+                words = [("Split", 15, 21, "85"), ("Right", 60, 10, "90")]
+            return {
+                "text": [w[0] for w in words],
+                "conf": [w[3] for w in words],
+                "left": [w[1] for w in words],
+                "top": [w[2] for w in words],
+                "width": [20] * len(words),
+                "height": [8] * len(words),
+            }
+
+        frame = ocr.Image.new("RGB", (200, 50), "white")
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        with patch.object(ocr.pytesseract, "image_to_data", side_effect=fake_image_to_data):
+            result = ocr.ocr_image(
+                frame, preprocess=False, tiles=[(0, 0, 120, 50), (80, 0, 190, 50)]
+            )
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+
+        self.assertEqual(result.full_text, "Left Split Right")
+        self.assertEqual((result.words[1].x, result.words[1].confidence), (95, 85.0))
+        self.assertEqual(result.words[2].x, 140)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE and ocr.CV2_AVAILABLE, "OpenCV not installed")
+    def test_ocr_preprocess_upscales_and_binarizes_in_one_array(self):
+        small = ocr.Image.new("RGB", (300, 100), "white")
+        small.paste((0, 0, 0), (50, 40, 120, 60))
+        large = ocr.Image.new("L", (1200, 600), 200)
+
+        upscaled = ocr.preprocess_image(small, upscale=True)
+        unscaled = ocr.preprocess_image(large, upscale=True)
+
+        self.assertEqual((upscaled.mode, upscaled.size), ("L", (1200, 400)))
+        self.assertEqual(sorted(c for _, c in upscaled.getcolors()), [0, 255])
+        self.assertEqual(unscaled.size, (1200, 600))
+
+    @unittest.skipUnless(
+        ocr.TESSERACT_AVAILABLE and ocr.CV2_AVAILABLE and importlib.util.find_spec("numba"),
+        "OpenCV or numba not installed",
+    )
+    def test_ocr_numba_threshold_matches_opencv_mean_threshold(self):
+        from desktop_control._threshold_kernel import mean_threshold
+
+        gray = ocr.np.random.default_rng(0).integers(0, 256, (40, 50), dtype=ocr.np.uint8)
+        expected = ocr.cv2.adaptiveThreshold(
+            gray, 255, ocr.cv2.ADAPTIVE_THRESH_MEAN_C, ocr.cv2.THRESH_BINARY, 11, 2
+        )
+        actual = mean_threshold(gray, 11, 2)
+
+        # OpenCV rounds the mean, so ties can differ; edges are replicated
+        # the same way, so they are held to the same bound
+        self.assertLess((actual != expected).mean(), 0.01)
+        self.assertLess((actual[:5] != expected[:5]).mean(), 0.02)
+        self.assertLess((actual[:, :5] != expected[:, :5]).mean(), 0.02)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE and ocr.CV2_AVAILABLE, "OpenCV not installed")
+    def test_ocr_preprocess_auto_upscales_only_small_text(self):
+        def glyphs(height):
+            image = ocr.Image.new("L", (300, 100), 255)
+            for x in range(20, 280, 12):
+                image.paste(0, (x, 30, x + 6, 30 + height))
+            return image
+
+        self.assertEqual(ocr.preprocess_image(glyphs(7)).size, (1200, 400))
+        self.assertEqual(ocr.preprocess_image(glyphs(24)).size, (300, 100))
+        self.assertEqual(ocr.preprocess_image(ocr.Image.new("L", (1700, 400), 255)).size, (1700, 400))
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_ocr_image_rereads_separate_changes_as_separate_regions(self):
+        frame = ocr.Image.new("RGB", (400, 200), "white")
+        changed = frame.copy()
+        changed.putpixel((5, 5), (0, 0, 0))
+        changed.putpixel((390, 190), (0, 0, 0))
+        sizes = []
+
+        def fake_image_to_data(image, config, output_type):
+            sizes.append(image.size)
+            if len(sizes) == 1:
+                words = [("Clock", 0, 0), ("Title", 200, 100), ("Caret", 380, 185)]
+            else:
+                words = [("New", 0, 0)]
+            return {
+                "text": [w[0] for w in words],
+                "conf": ["90"] * len(words),
+                "left": [w[1] for w in words],
+                "top": [w[2] for w in words],
+                "width": [20] * len(words),
+                "height": [10] * len(words),
+            }
+
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        with patch.object(ocr.pytesseract, "image_to_data", side_effect=fake_image_to_data):
+            ocr.ocr_image(frame, preprocess=False)
+            result = ocr.ocr_image(changed, preprocess=False)
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+
+        self.assertEqual(len(sizes), 3)
+        self.assertTrue(all(w * h < 400 * 200 // 10 for w, h in sizes[1:]))
+        self.assertEqual(result.full_text, "New Title New")
+        self.assertEqual([(w.x, w.y) for w in result.words], [(0, 0), (200, 100), (380, 157)])
+
+    def test_waiter_bursts_then_backs_off(self):
+        clock = [0.0]
+        sleeps = []
+
+        def fake_sleep(seconds):
+            sleeps.append(round(seconds, 4))
+            clock[0] += seconds
+
+        poller = waiter.Waiter(finder=object())
+        with patch("desktop_control.waiter.time.monotonic", side_effect=lambda: clock[0]), patch.object(
+            poller._cancel, "wait", side_effect=fake_sleep
+        ):
+            result = poller._poll_until(lambda: None, timeout=1.0)
+
+        self.assertIsNone(result)
+        burst = len(sleeps) - len(list(itertools.dropwhile(lambda s: s == 0.02, sleeps)))
+        self.assertIn(burst, (10, 11))
+        self.assertEqual(sleeps[burst:burst + 3], [0.05, 0.075, 0.1125])
+        self.assertLessEqual(max(sleeps), 0.5)
+
+    def test_waiter_counts_check_time_toward_interval(self):
+        clock = [0.0]
+        sleeps = []
+
+        def fake_sleep(seconds):
+            sleeps.append(round(seconds, 4))
+            clock[0] += seconds
+
+        def slow_check():
+            clock[0] += 0.04
+            return None
+
+        poller = waiter.Waiter(finder=object(), burst_duration=0)
+        with patch("desktop_control.waiter.time.monotonic", side_effect=lambda: clock[0]), patch.object(
+            poller._cancel, "wait", side_effect=fake_sleep
+        ):
+            poller._poll_until(slow_check, timeout=0.5)
+
+        self.assertEqual(sleeps[:3], [0.01, 0.035, 0.0725])
+
+    def test_waiter_cancel_aborts_wait_from_another_thread(self):
+        poller = waiter.Waiter(finder=object())
+        checked = threading.Event()
+
+        def condition():
+            checked.set()
+            return None
+
+        timer = threading.Thread(target=lambda: checked.wait(5) and poller.cancel())
+        timer.start()
+        started = time.monotonic()
+        with self.assertRaises(waiter.WaitCancelled):
+            poller.wait_with_callback(condition, timeout=30)
+        timer.join()
+
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_wait_for_stable_rereads_bounds_without_searching_again(self):
+        searches = []
+        handle = object()
+        found = Element(name="OK", x=10, y=20, width=30, height=40, source=ElementSource.ATSPI)
+
+        class FakeFinder:
+            def find_tracked(self, name=None, role=None):
+                searches.append(name)
+                return found, handle
+
+        poller = waiter.Waiter(finder=FakeFinder())
+        with patch.object(waiter.atspi, "get_bounds", return_value=(15, 20, 30, 40)) as bounds, \
+             patch.object(poller._cancel, "wait", return_value=False):
+            elem = poller.wait_for_stable(name="OK", stability_time=0)
+
+        self.assertEqual(searches, ["OK"])
+        bounds.assert_called_with(handle)
+        self.assertEqual((elem.x, elem.y, elem.name), (15, 20, "OK"))
+
+    def test_waiter_wakes_on_atspi_tree_change_instead_of_sleeping_out_interval(self):
+        clock = [0.0]
+        waits = []
+        checks = []
+
+        def fake_sleep(seconds):
+            clock[0] += seconds
+
+        def fake_wait_for_change(timeout):
+            # The tree changes 0.01s into the first long wait
+            waits.append(round(timeout, 4))
+            clock[0] += 0.01
+            return True
+
+        def condition():
+            checks.append(clock[0])
+            return "found" if len(waits) == 1 else None
+
+        poller = waiter.Waiter(finder=SimpleNamespace(use_atspi=True), burst_duration=0, event_interval=0.02)
+        with patch("desktop_control.waiter.time.monotonic", side_effect=lambda: clock[0]), patch.object(
+            poller._cancel, "wait", side_effect=fake_sleep
+        ), patch.object(waiter.atspi, "watch_tree_changes", return_value=True), patch.object(
+            waiter.atspi, "wait_for_tree_change", side_effect=fake_wait_for_change
+        ):
+            result = poller._poll_until(condition, timeout=5.0)
+
+        self.assertEqual(result, "found")
+        # Throttled by event_interval, then woken by the event, not the 0.05s tick
+        self.assertEqual(waits, [0.03])
+        self.assertAlmostEqual(checks[1], 0.03)
+
+    def test_waiter_throttles_checks_woken_by_busy_desktop_events(self):
+        clock = [0.0]
+        checks = []
+
+        def fake_sleep(seconds):
+            clock[0] += seconds
+
+        def fake_wait_for_change(timeout):
+            # Some other app changes its tree every millisecond
+            clock[0] += min(timeout, 0.001)
+            return True
+
+        def condition():
+            checks.append(clock[0])
+            return None
+
+        poller = waiter.Waiter(finder=SimpleNamespace(use_atspi=True), max_interval=2.0)
+        with patch("desktop_control.waiter.time.monotonic", side_effect=lambda: clock[0]), patch.object(
+            poller._cancel, "wait", side_effect=fake_sleep
+        ), patch.object(waiter.atspi, "watch_tree_changes", return_value=True), patch.object(
+            waiter.atspi, "wait_for_tree_change", side_effect=fake_wait_for_change
+        ):
+            self.assertIsNone(poller._poll_until(condition, timeout=3.0))
+
+        after_burst = [t for t in checks if t >= poller.burst_duration]
+        gaps = [b - a for a, b in zip(after_burst, after_burst[1:])]
+        # Never sooner than the backoff, nor event_interval once that is
+        # longer (except the last check, at the deadline)
+        self.assertGreaterEqual(min(gaps), poller.initial_interval - 1e-9)
+        self.assertTrue(all(gap >= poller.event_interval - 1e-9 for gap in gaps[4:-1]))
+        self.assertLessEqual(len(after_burst), 3.0 / poller.event_interval + 4)
+
+    def test_waiter_cancel_interrupts_atspi_event_wait(self):
+        slices = []
+
+        def fake_wait_for_change(timeout):
+            slices.append(timeout)
+            time.sleep(timeout)
+            return False
+
+        poller = waiter.Waiter(
+            finder=SimpleNamespace(use_atspi=True), burst_duration=0,
+            initial_interval=30.0, max_interval=30.0, event_interval=0,
+        )
+        with patch.object(waiter.atspi, "watch_tree_changes", return_value=True), patch.object(
+            waiter.atspi, "wait_for_tree_change", side_effect=fake_wait_for_change
+        ):
+            threading.Timer(0.2, poller.cancel).start()
+            start = time.monotonic()
+            with self.assertRaises(waiter.WaitCancelled):
+                poller._poll_until(lambda: None, timeout=30.0)
+
+        self.assertLess(time.monotonic() - start, 2.0)
+        self.assertLessEqual(max(slices), waiter.CANCEL_CHECK_INTERVAL)
+
+    def test_wait_until_gone_rechecks_on_tree_change_event(self):
+        present = [True]
+        waits = []
+
+        def fake_wait_for_change(timeout):
+            waits.append(timeout)
+            present[0] = False
+            return True
+
+        fake_finder = SimpleNamespace(
+            use_atspi=True,
+            find=lambda **kwargs: Element(name="Loading", x=0, y=0, width=1, height=1, source=ElementSource.ATSPI)
+            if present[0] else None,
+        )
+        poller = waiter.Waiter(finder=fake_finder, burst_duration=0, event_interval=0.02)
+        with patch.object(poller._cancel, "wait", return_value=False), patch.object(
+            waiter.atspi, "watch_tree_changes", return_value=True
+        ), patch.object(waiter.atspi, "wait_for_tree_change", side_effect=fake_wait_for_change):
+            self.assertTrue(poller.wait_until_gone(name="Loading", timeout=5))
+
+        self.assertIn("object:state-changed", atspi.TREE_CHANGE_EVENTS)
+        self.assertIn("object:children-changed", atspi.TREE_CHANGE_EVENTS)
+        self.assertEqual(len(waits), 1)
+
+    def test_atspi_role_filter_skips_full_fetch_for_other_roles(self):
+        fetched = []
+        actions_fetched = []
+
+        class FakeAccessible:
+            def __init__(self, name, role_name, children=()):
+                self.name = name
+                self.role_name = role_name
+                self.children = list(children)
+
+            def get_name(self):
+                return self.name
+
+            def get_role(self):
+                return self.role_name
+
+            def get_role_name(self):
+                return self.role_name
+
+            def get_description(self):
+                fetched.append(self.name)
+                return ""
+
+            def get_action_iface(self):
+                actions_fetched.append(self.name)
+                return None
+
+            def get_child_count(self):
+                return len(self.children)
+
+            def get_child_at_index(self, i):
+                return self.children[i]
+
+        button = FakeAccessible("OK", "push button")
+        root = FakeAccessible("", "desktop frame", [
+            FakeAccessible("Demo", "application", [FakeAccessible("Panel", "panel", [button])])
+        ])
+
+        with patch.object(atspi, "ATSPI_AVAILABLE", True):
+            results = list(atspi.traverse_tree(
+                root=root, role_filter=lambda role_name: "button" in role_name
+            ))
+            prefiltered = list(atspi.traverse_tree(
+                root=root, prefilter_fn=lambda elem: elem.name == "Panel"
+            ))
+            self.assertEqual(actions_fetched, ["OK", "Panel"])
+            with patch.object(atspi, "_is_hidden_subtree", side_effect=lambda acc: acc.name == "Panel"):
+                pruned = list(atspi.traverse_tree(root=root, prune_hidden=True))
+
+        self.assertEqual([e.name for e in results], ["OK"])
+        self.assertEqual(results[0].app_name, "Demo")
+        self.assertEqual(fetched[0], "OK")
+        self.assertEqual([e.name for e in prefiltered], ["Panel"])
+        self.assertEqual([e.name for e in pruned], ["", "Demo"])
+
+    def test_atspi_traversal_skips_only_the_node_that_fails(self):
+        class FakeAccessible:
+            def __init__(self, name, role_name, children=()):
+                self.name = name
+                self.role_name = role_name
+                self.children = list(children)
+
+            def get_name(self):
+                return self.name
+
+            def get_role_name(self):
+                if self.role_name is None:
+                    raise RuntimeError("transient D-Bus error")
+                return self.role_name
+
+            def get_child_count(self):
+                return len(self.children)
+
+            def get_child_at_index(self, i):
+                return self.children[i]
+
+        button = FakeAccessible("OK", "push button")
+        root = FakeAccessible("", "desktop frame", [
+            FakeAccessible("Demo", "application", [FakeAccessible("Panel", None, [button])])
+        ])
+
+        with patch.object(atspi, "ATSPI_AVAILABLE", True), patch.object(
+            atspi, "_accessible_to_element",
+            side_effect=lambda acc, app_name, path, role_name=None, prefilter_fn=None: SimpleNamespace(
+                name=acc.name
+            ),
+        ):
+            results = list(atspi.traverse_tree(root=root, role_filter=lambda role_name: "button" in role_name))
+
+        self.assertEqual([e.name for e in results], ["OK"])
+
+    def test_atspi_prunes_unshown_nodes_only_without_screen_area(self):
+        state_type = SimpleNamespace(DEFUNCT=0, VISIBLE=1, SHOWING=2)
+
+        def accessible(states, extents):
+            return SimpleNamespace(
+                get_state_set=lambda: SimpleNamespace(contains=lambda state: state in states),
+                get_component_iface=lambda: SimpleNamespace(
+                    get_extents=lambda coord_type: SimpleNamespace(
+                        x=0, y=0, width=extents[0], height=extents[1]
+                    )
+                ),
+            )
+
+        cases = [
+            ({1, 2}, (0, 0), False),
+            ({0, 1, 2}, (100, 50), True),
+            ({1}, (100, 50), False),
+            ({2}, (100, 50), False),
+            ({1}, (0, 0), True),
+            (set(), (100, 0), True),
+        ]
+        with patch.object(atspi, "ATSPI_AVAILABLE", True), patch.object(
+            atspi, "Atspi", SimpleNamespace(StateType=state_type, CoordType=SimpleNamespace(SCREEN=0)),
+            create=True,
+        ):
+            for states, extents, hidden in cases:
+                with self.subTest(states=states, extents=extents):
+                    self.assertEqual(atspi._is_hidden_subtree(accessible(states, extents)), hidden)
+
+    def test_atspi_list_interactive_skips_actionless_nodes_before_fetching(self):
+        fetched = []
+
+        class FakeAccessible:
+            def __init__(self, name, role_name, has_actions=False, children=()):
+                self.name = name
+                self.role_name = role_name
+                self.has_actions = has_actions
+                self.children = list(children)
+
+            def get_name(self):
+                return self.name
+
+            def get_role(self):
+                return self.role_name
+
+            def get_role_name(self):
+                return self.role_name
+
+            def get_description(self):
+                fetched.append(self.name)
+                return ""
+
+            def get_action_iface(self):
+                if not self.has_actions:
+                    return None
+                return MagicMock(get_n_actions=lambda: 1, get_action_name=lambda i: "click")
+
+            def get_child_count(self):
+                return len(self.children)
+
+            def get_child_at_index(self, i):
+                return self.children[i]
+
+        root = FakeAccessible("", "desktop frame", children=[
+            FakeAccessible("Demo", "application", children=[
+                FakeAccessible("Panel", "panel", children=[
+                    FakeAccessible("OK", "push button"),
+                    FakeAccessible("Label", "label"),
+                    FakeAccessible("Icon", "icon", has_actions=True),
+                ])
+            ])
+        ])
+
+        with patch.object(atspi, "ATSPI_AVAILABLE", True), patch.object(
+            atspi, "get_desktop", return_value=root
+        ), patch.object(atspi, "_tree_listener", None):
+            results = atspi.list_interactive_elements(visible_only=False)
+
+        self.assertEqual([e.name for e in results], ["OK", "Icon"])
+        self.assertEqual(fetched, ["OK", "Icon"])
+
+    def test_atspi_app_filter_skips_other_application_subtrees(self):
+        visited = []
+
+        class FakeAccessible:
+            def __init__(self, name, children=()):
+                self.name = name
+                self.children = list(children)
+
+            def get_name(self):
+                visited.append(self.name)
+                return self.name
+
+            def get_role(self):
+                return "panel"
+
+            def get_role_name(self):
+                return "panel"
+
+            def get_description(self):
+                return ""
+
+            def get_child_count(self):
+                return len(self.children)
+
+            def get_child_at_index(self, i):
+                return self.children[i]
+
+        root = FakeAccessible("", [
+            FakeAccessible("Firefox", [FakeAccessible("Tab")]),
+            FakeAccessible("gedit", [FakeAccessible("Save")]),
+        ])
+
+        with patch.object(atspi, "ATSPI_AVAILABLE", True):
+            names = [e.name for e in atspi.traverse_tree(root=root, app_filter="EDIT")]
+
+        self.assertEqual(names, ["", "gedit", "Save"])
+        self.assertNotIn("Tab", visited)
+
+        # Deeper than the recursion limit: the walk keeps its own stack
+        deep = FakeAccessible("leaf")
+        for _ in range(sys.getrecursionlimit() + 100):
+            deep = FakeAccessible("node", [deep])
+        with patch.object(atspi, "ATSPI_AVAILABLE", True):
+            last = list(atspi.traverse_tree(root=deep, max_depth=10**6))[-1]
+        self.assertEqual(last.name, "leaf")
+
+    def test_atspi_interactive_roles_match_substrings_once_per_name(self):
+        atspi._interactive_role_names.clear()
+
+        self.assertTrue(atspi._is_interactive_role("check menu item"))
+        self.assertTrue(atspi._is_interactive_role("Password Text"))
+        self.assertFalse(atspi._is_interactive_role("panel"))
+        self.assertFalse(atspi._is_interactive_role("panel"))
+        self.assertEqual(
+            atspi._interactive_role_names,
+            {"check menu item": True, "Password Text": True, "panel": False},
+        )
+
+    def test_atspi_states_decoded_from_one_get_states_call(self):
+        state_type = SimpleNamespace(**{attr: i for i, (_, attr) in enumerate(atspi.STATE_NAMES)})
+        calls = []
+
+        class FakeStateSet:
+            def get_states(self):
+                calls.append("get_states")
+                return [state_type.FOCUSED, state_type.VISIBLE, state_type.ENABLED]
+
+            def contains(self, state):
+                raise AssertionError("contains should not be called")
+
+        accessible = SimpleNamespace(get_state_set=FakeStateSet)
+
+        with patch.object(atspi, "ATSPI_AVAILABLE", True), patch.object(
+            atspi, "Atspi", SimpleNamespace(StateType=state_type), create=True
+        ), patch.object(atspi, "_state_types", None):
+            states = atspi._get_element_states(accessible)
+
+        self.assertEqual(states, ["visible", "enabled", "focused"])
+        self.assertEqual(calls, ["get_states"])
+
+    def test_interactive_element_list_cached_until_tree_or_input_changes(self):
+        walks = []
+
+        def fake_traverse(**kwargs):
+            walks.append(kwargs["app_filter"])
+            yield atspi.ATSPIElement("OK", "button", "push button", "", 0, 0, 10, 10)
+
+        with patch.object(atspi, "_tree_listener", object()), patch.object(
+            atspi, "_dispatch_pending_events"
+        ), patch.object(atspi, "traverse_tree", side_effect=fake_traverse), patch.dict(atspi._tree_cache, clear=True):
+            first = atspi.list_interactive_elements(app="Demo")
+            second = atspi.list_interactive_elements(app="Demo")
+            self.assertEqual(len(walks), 1)
+            self.assertEqual([e.name for e in second], [e.name for e in first])
+
+            atspi._on_tree_change(None)
+            atspi.list_interactive_elements(app="Demo")
+            screenshot.invalidate_screenshot_cache()
+            atspi.list_interactive_elements(app="Demo")
+
+        self.assertEqual(len(walks), 3)
+
+    def test_element_cache_is_shared_through_its_file(self):
+        element = Element(
+            name="Sign In",
+            x=10,
+            y=20,
+            width=80,
+            height=24,
+            source=ElementSource.ATSPI,
+            role_name="push button",
+            states=["visible", "showing"],
+            actions=["click"],
+            app_name="Firefox",
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(pathlib.Path(tmp) / "elements.bin")
+            cache.ElementCache(path=path).store([element], (1920, 1080))
+
+            other = cache.ElementCache(path=path)
+            other.refresh()
+            self.assertEqual(other.get(1), element)
+            self.assertEqual(other.screen_size, (1920, 1080))
+            self.assertEqual(other.element_at(50, 30), 1)
+            self.assertIsNone(other.element_at(90, 30))
+
+            other.invalidate()
+            self.assertIsNone(other.element_at(50, 30))
+            self.assertFalse(pathlib.Path(path).exists())
+
+    def test_element_cache_treats_garbled_file_as_empty(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / "elements.bin"
+            for meta in [b"5", b"null", b"{}", b'"abcdefghi"', b"[1, 2"]:
+                with self.subTest(meta=meta):
+                    path.write_bytes(
+                        cache._HEADER.pack(cache.CACHE_MAGIC, cache.CACHE_VERSION, 1, 1920, 1080, time.time())
+                        + cache._RECORD.pack(10, 20, 80, 24, 0, len(meta))
+                        + meta
+                    )
+                    element_cache = cache.ElementCache(path=str(path))
+                    element_cache.refresh()
+                    self.assertIsNone(element_cache.get(1))
+
+    def test_element_cache_hit_test_prefers_innermost_element(self):
+        window = Element(name="Dialog", x=0, y=0, width=400, height=300, source=ElementSource.ATSPI)
+        button = Element(name="OK", x=300, y=250, width=80, height=30, source=ElementSource.ATSPI)
+        element_cache = cache.ElementCache()
+        element_cache.store([window, button], (1920, 1080))
+
+        self.assertEqual(element_cache.element_at(310, 260), 2)
+        self.assertEqual(element_cache.element_at(10, 10), 1)
+        self.assertIsNone(element_cache.element_at(500, 10))
+        self.assertEqual(element_cache.elements_in_rect(250, 200, 400, 300), [2])
+        self.assertEqual(element_cache.elements_in_rect(0, 0, 400, 300), [1, 2])
+        self.assertEqual(element_cache.elements_in_rect(0, 0, 399, 300), [2])
+
+    def test_element_cache_view_is_read_only_and_rejects_pre_reboot_timestamps(self):
+        element = Element(name="OK", x=0, y=0, width=10, height=10, source=ElementSource.OCR)
+        element_cache = cache.ElementCache()
+        element_cache.store([element], (1920, 1080))
+
+        view = element_cache.get_all()
+        self.assertIs(view, element_cache.get_all())
+        with self.assertRaises(TypeError):
+            view[2] = element
+
+        self.assertEqual(element_cache.snapshot(), (view, True))
+
+        with patch.object(cache.time, "monotonic", return_value=element_cache._timestamp - 100):
+            self.assertFalse(element_cache.is_valid())
+            self.assertEqual(element_cache.snapshot(), ({}, False))
+
+    def test_click_moves_and_clicks_in_one_xdotool_call(self):
+        with patch.object(
+            xdotool, "run_cmd", return_value=CommandResult(0, "", "")
+        ) as run_cmd:
+            result = xdotool.click(10, 20, button="right", double=True, display=":10.0")
+
+        run_cmd.assert_called_once_with(
+            ["xdotool", "mousemove", "10", "20",
+             "click", "--repeat", "2", "--delay", "100", "3"],
+            ":10.0",
+        )
+        self.assertEqual(result["clicked"]["button"], "right")
+
+    def test_pointer_commands_accept_float_coordinates(self):
+        with patch.object(
+            xdotool, "run_cmd", return_value=CommandResult(0, "", "")
+        ) as run_cmd:
+            clicked = xdotool.click(10.6, 20.2, display=":10.0")
+            moved = xdotool.move(5.0, 6.9, display=":10.0")
+            dragged = xdotool.drag(1.5, 2.0, 30.0, 40.9, display=":10.0")
+
+        commands = [c.args[0] for c in run_cmd.call_args_list]
+        self.assertEqual(commands[0][2:4], ["10", "20"])
+        self.assertEqual(commands[1][3:5], ["5", "6"])
+        self.assertEqual(commands[2][2:4] + commands[2][8:10], ["1", "2", "30", "40"])
+        self.assertEqual((clicked["clicked"]["x"], moved["moved"]["y"]), (10, 6))
+        self.assertEqual(dragged["dragged"]["end"], {"x": 30, "y": 40})
+
+    def test_get_screen_size_reuses_xdotool_result_until_invalidated(self):
+        xdotool.invalidate_screen_size()
+        with patch.object(
+            xdotool, "run_cmd", return_value=CommandResult(0, "1920 1080\n", "")
+        ) as run_cmd:
+            sizes = [xdotool.get_screen_size(":10.0") for _ in range(3)]
+            xdotool.invalidate_screen_size(":10.0")
+            sizes.append(xdotool.get_screen_size(":10.0"))
+        xdotool.invalidate_screen_size()
+
+        self.assertEqual(sizes, [(1920, 1080)] * 4)
+        self.assertEqual(run_cmd.call_count, 2)
+
+    def test_drag_runs_as_one_xdotool_chain_and_releases_on_failure(self):
+        with patch.object(
+            xdotool, "run_cmd", return_value=CommandResult(0, "", "")
+        ) as run_cmd:
+            result = xdotool.drag(1, 2, 30, 40, display=":10.0")
+
+        run_cmd.assert_called_once_with(
+            ["xdotool", "mousemove", "1", "2", "mousedown", "1",
+             "mousemove", "--sync", "30", "40", "mouseup", "1"],
+            ":10.0",
+        )
+        self.assertEqual(result["dragged"]["end"], {"x": 30, "y": 40})
+
+        with patch.object(
+            xdotool, "run_cmd", return_value=CommandResult(1, "", "BadWindow")
+        ) as run_cmd:
+            result = xdotool.drag(1, 2, 30, 40, button="right", display=":10.0")
+
+        self.assertEqual(run_cmd.call_args.args[0], ["xdotool", "mouseup", "3"])
+        self.assertEqual(result, {"error": "Drag failed: BadWindow"})
+
+    def test_run_cmd_reuses_environment_per_display(self):
+        core.clear_env_cache()
+        envs = []
+
+        def fake_run(cmd, **kwargs):
+            envs.append(kwargs["env"])
+            return SimpleNamespace(returncode=0, stdout="", stderr="")
+
+        with patch.dict(core.os.environ, {"DISPLAY": ":0"}), patch.object(
+            core.subprocess, "run", side_effect=fake_run
+        ):
+            core.run_cmd(["true"], ":10.0")
+            core.run_cmd(["true"], ":10.0")
+            core.run_cmd(["true"], ":0")
+            atspi.setup_environment()
+            core.run_cmd(["true"], ":10.0")
+            core.run_cmd(["true"])
+
+        core.clear_env_cache()
+        self.assertIs(envs[0], envs[1])
+        self.assertEqual(envs[0]["DISPLAY"], ":10.0")
+        self.assertIsNone(envs[2])
+        self.assertIn("GTK_MODULES", envs[3])
+        self.assertIsNone(envs[4])
+
+    def test_finder_runs_ocr_fallback_during_atspi_lookup_after_a_miss(self):
+        match = ocr.OCRMatch(text="Save", x=1, y=2, width=3, height=4, confidence=90.0)
+        captured = []
+        ocr_runs = threading.Semaphore(0)
+        lookups = []
+
+        frame = SimpleNamespace(size=(1920, 1080))
+
+        def fake_capture(display):
+            captured.append(display)
+            return frame
+
+        def fake_ocr_image(*args, **kwargs):
+            ocr_runs.release()
+            return ocr.OCRResult(words=[match])
+
+        def fake_find_element(**kwargs):
+            # The first lookup misses; the repeat only returns once OCR has
+            # run again while the tree walk is in progress
+            lookups.append(kwargs)
+            if len(lookups) == 2:
+                self.assertTrue(ocr_runs.acquire(timeout=5))
+                self.assertTrue(ocr_runs.acquire(timeout=5))
+            return None
+
+        finder_obj = finder.ElementFinder(display=":10.0")
+        finder_obj.use_atspi = True
+        finder_obj.use_ocr = True
+        with patch.object(finder, "screenshot_to_pil", side_effect=fake_capture), patch.object(
+            finder.atspi, "find_element", side_effect=fake_find_element
+        ), patch.object(finder.ocr, "TESSERACT_AVAILABLE", True), patch.object(
+            finder.ocr, "ocr_image", side_effect=fake_ocr_image
+        ) as ocr_image:
+            first = finder_obj.find(name="Save")
+            element = finder_obj.find(name="Save")
+
+        self.assertEqual(captured, [":10.0", ":10.0"])
+        self.assertIs(ocr_image.call_args[0][0], frame)
+        self.assertEqual((first.name, element.name), ("Save", "Save"))
+
+    def test_finder_atspi_hit_leaves_no_ocr_running(self):
+        atspi_elem = ATSPI_SUBMIT
+        capture_released = threading.Event()
+        hits = iter([None, atspi_elem, atspi_elem])
+
+        def fake_capture(display):
+            capture_released.wait(5)
+            return SimpleNamespace(size=(1920, 1080))
+
+        def join_background():
+            capture_released.set()
+            for thread in threading.enumerate():
+                if thread.name == "finder":
+                    thread.join(5)
+            capture_released.clear()
+
+        finder_obj = finder.ElementFinder(display=":10.0")
+        finder_obj.use_atspi = True
+        finder_obj.use_ocr = True
+        with patch.object(finder, "screenshot_to_pil", side_effect=fake_capture), patch.object(
+            finder.atspi, "find_element", side_effect=lambda **kwargs: next(hits)
+        ), patch.object(finder.ocr, "TESSERACT_AVAILABLE", True), patch.object(
+            finder.ocr, "ocr_image", return_value=ocr.OCRResult(words=[])
+        ) as ocr_image:
+            # A miss OCRs after the walk
+            capture_released.set()
+            self.assertIsNone(finder_obj.find(name="Submit"))
+            self.assertEqual(ocr_image.call_count, 1)
+            capture_released.clear()
+
+            # The repeat speculates, but the hit lands during the capture
+            self.assertEqual(finder_obj.find(name="Submit").name, "Submit")
+            join_background()
+            # Not speculative after a hit: capture only
+            self.assertEqual(finder_obj.find(name="Submit").name, "Submit")
+            join_background()
+
+        self.assertEqual(ocr_image.call_count, 1)
+
+    def test_wait_for_any_matches_all_specs_in_one_walk_and_one_ocr_pass(self):
+        def elem(name, role_name, app_name="gedit"):
+            return atspi.ATSPIElement(
+                name=name, role="", role_name=role_name, description="",
+                x=0, y=0, width=10, height=10, states=["visible", "showing"],
+                actions=[], app_name=app_name,
+            )
+
+        tree = [elem("OK", "push button"), elem("Save", "label"), elem("Save", "push button")]
+        walks = []
+
+        def fake_traverse_tree(**kwargs):
+            walks.append(kwargs)
+            for e in tree:
+                if kwargs["prefilter_fn"](e) and (
+                    kwargs["role_filter"] is None or kwargs["role_filter"](e.role_name)
+                ):
+                    yield e
+
+        specs = [{"name": "Save", "role": "button"}, {"name": "OK"}, {"name": "Apply"}]
+        with patch.object(atspi, "traverse_tree", side_effect=fake_traverse_tree):
+            self.assertEqual(atspi.find_first_of(specs), (0, tree[2]))
+            self.assertEqual(atspi.find_first_of(specs[1:]), (0, tree[0]))
+            self.assertEqual(atspi.find_first_of(specs[2:] + specs[1:2]), (1, tree[0]))
+        self.assertEqual(len(walks), 3)
+
+        # OCR finds a spec listed before the one AT-SPI found
+        match = ocr.OCRMatch(text="Apply", x=300, y=40, width=40, height=12, confidence=90.0)
+        finder_obj = finder.ElementFinder(display=":10.0")
+        finder_obj.use_atspi = True
+        finder_obj.use_ocr = True
+        with patch.object(
+            finder, "screenshot_to_pil", return_value=SimpleNamespace(size=(1920, 1080))
+        ) as capture, patch.object(atspi, "traverse_tree", side_effect=fake_traverse_tree), patch.object(
+            finder.ocr, "ocr_image", return_value=ocr.OCRResult(words=[match])
+        ) as ocr_image:
+            poller = waiter.Waiter(finder=finder_obj, watch_events=False)
+            index, found = poller.wait_for_any(specs[2:] + specs[1:2], timeout=1)
+
+        self.assertEqual((index, found.source, found.x), (0, ElementSource.OCR, 300))
+        self.assertEqual((capture.call_count, ocr_image.call_count, len(walks)), (1, 1, 4))
+
+    def test_find_any_looks_up_each_app_area_once(self):
+        finder_obj = finder.ElementFinder(display=":10.0")
+        finder_obj.use_atspi = True
+        finder_obj.use_ocr = True
+        specs = [{"name": "Save", "app": "gedit"}, {"name": "OK", "app": "gedit"}, {"name": "Quit"}]
+        with patch.object(atspi, "find_first_of", return_value=None), patch.object(
+            atspi, "get_app_bounds", return_value=(0, 0, 800, 600)
+        ) as bounds, patch.object(
+            finder, "screenshot_to_pil", return_value=SimpleNamespace(size=(1920, 1080))
+        ), patch.object(finder.ocr, "ocr_image", return_value=ocr.OCRResult(words=[])):
+            self.assertIsNone(finder_obj.find_any(specs))
+
+        bounds.assert_called_once_with("gedit")
+
+    def test_find_any_only_ocrs_during_walk_after_a_miss(self):
+        finder_obj = finder.ElementFinder(display=":10.0")
+        finder_obj.use_atspi = True
+        finder_obj.use_ocr = True
+        specs = [{"name": "Submit"}, {"name": "Cancel"}]
+        ocr_runs = threading.Semaphore(0)
+        walks = []
+
+        def fake_ocr_image(*args, **kwargs):
+            ocr_runs.release()
+            return ocr.OCRResult(words=[])
+
+        def fake_find_first_of(specs, visible_only=True):
+            walks.append(specs)
+            if len(walks) == 1:
+                return 0, ATSPI_SUBMIT
+            if len(walks) == 3:
+                # Repeat of a miss: OCR runs while the tree is walked
+                self.assertTrue(ocr_runs.acquire(timeout=5))
+                self.assertTrue(ocr_runs.acquire(timeout=5))
+            return None
+
+        with patch.object(
+            finder, "screenshot_to_pil", return_value=SimpleNamespace(size=(1920, 1080))
+        ), patch.object(atspi, "find_first_of", side_effect=fake_find_first_of), patch.object(
+            finder.ocr, "ocr_image", side_effect=fake_ocr_image
+        ) as ocr_image:
+            self.assertEqual(finder_obj.find_any(specs)[0], 0)
+            for thread in threading.enumerate():
+                if thread.name == "finder":
+                    thread.join(5)
+            self.assertEqual(ocr_image.call_count, 0)
+
+            self.assertIsNone(finder_obj.find_any(specs))
+            self.assertIsNone(finder_obj.find_any(specs))
+
+        self.assertEqual(ocr_image.call_count, 2)
+
+    def test_finder_find_all_drops_ocr_matches_covered_by_atspi_results(self):
+        button = atspi.ATSPIElement(
+            name="Save", role="", role_name="push button", description="",
+            x=100, y=100, width=80, height=30, states=[], actions=[], app_name="",
+        )
+        matches = [
+            ocr.OCRMatch(text="Save", x=110, y=105, width=30, height=12, confidence=90.0),
+            ocr.OCRMatch(text="Save", x=400, y=100, width=30, height=12, confidence=90.0),
+            ocr.OCRMatch(text="Save", x=402, y=101, width=30, height=12, confidence=80.0),
+        ]
+
+        finder_obj = finder.ElementFinder(display=":10.0")
+        finder_obj.use_atspi = True
+        finder_obj.use_ocr = True
+        with patch.object(
+            finder, "screenshot_to_pil", return_value=SimpleNamespace(size=(1920, 1080))
+        ), patch.object(finder.atspi, "find_elements", return_value=[button]), patch.object(
+            finder.ocr, "ocr_image", return_value=ocr.OCRResult(words=matches)
+        ):
+            elements = finder_obj.find_all(name="Save")
+
+        self.assertEqual(
+            [(e.source, e.x) for e in elements],
+            [(ElementSource.ATSPI, 100), (ElementSource.OCR, 400)],
+        )
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_wait_for_text_skips_ocr_while_screen_is_unchanged(self):
+        data = {"text": ["Loading"], "conf": ["90"], "left": [10], "top": [5], "width": [30], "height": [8]}
+        frame = ocr.Image.new("RGB", (1200, 600), "white")
+
+        finder_obj = finder.ElementFinder(display=":10.0", use_atspi=False)
+        finder_obj.use_ocr = True
+        poller = waiter.Waiter(finder=finder_obj)
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        with patch.object(
+            finder, "screenshot_to_pil", side_effect=lambda display: frame.copy()
+        ) as capture, patch.object(ocr.pytesseract, "image_to_data", return_value=data) as image_to_data:
+            with self.assertRaises(waiter.WaitTimeout):
+                poller.wait_for_text("Done", timeout=0.1)
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+
+        self.assertGreater(capture.call_count, 1)
+        self.assertEqual(image_to_data.call_count, 1)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_wait_for_text_rereads_only_the_changed_area_between_polls(self):
+        loading = {"text": ["Loading"], "conf": ["90"], "left": [10], "top": [5], "width": [60], "height": [8]}
+        done = {"text": ["Done"], "conf": ["90"], "left": [4], "top": [4], "width": [30], "height": [8]}
+        first = ocr.Image.new("RGB", (1200, 600), "white")
+        second = first.copy()
+        second.paste((0, 0, 0), (600, 300, 640, 312))
+        frames = iter([first, second])
+        sizes = []
+
+        def fake_image_to_data(image, config, output_type):
+            sizes.append(image.size)
+            return loading if len(sizes) == 1 else done
+
+        finder_obj = finder.ElementFinder(display=":10.0", use_atspi=False)
+        finder_obj.use_ocr = True
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        with patch.object(finder, "screenshot_to_pil", side_effect=lambda display: next(frames)), patch.object(
+            ocr.pytesseract, "image_to_data", side_effect=fake_image_to_data
+        ):
+            element = waiter.Waiter(finder=finder_obj).wait_for_text("Done", timeout=5)
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+
+        self.assertEqual(sizes[0], (1200, 600))
+        # The second poll only OCRs a padded box around the changed pixels
+        self.assertLess(sizes[1][0] * sizes[1][1], 1200 * 600 // 50)
+        self.assertGreater(element.x, 580)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_ocr_result_reused_across_finders_for_identical_captures(self):
+        data = {"text": ["Save"], "conf": ["90"], "left": [10], "top": [5], "width": [30], "height": [8]}
+        frame = ocr.Image.new("RGB", (1200, 600), "white")
+        captures = iter([frame, frame.copy()])
+
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        with patch.object(finder, "screenshot_to_pil", side_effect=lambda display: next(captures)), patch.object(
+            ocr.pytesseract, "image_to_data", return_value=data
+        ) as image_to_data:
+            for _ in range(2):
+                finder_obj = finder.ElementFinder(display=":10.0", use_atspi=False)
+                finder_obj.use_ocr = True
+                self.assertEqual(finder_obj.find_text("save").x, 10)
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+
+        self.assertEqual(image_to_data.call_count, 1)
+
+    def test_finder_ocr_fallback_crops_to_app_windows(self):
+        match = ocr.OCRMatch(text="Save", x=5, y=6, width=30, height=10, confidence=90.0)
+        crops = []
+        cropped = SimpleNamespace(size=(300, 180))
+
+        class FakeImage:
+            width, height = 1920, 1080
+
+            def crop(self, box):
+                crops.append(box)
+                return cropped
+
+        finder_obj = finder.ElementFinder(display=":10.0")
+        finder_obj.use_atspi = True
+        finder_obj.use_ocr = True
+        with patch.object(finder, "screenshot_to_pil", return_value=FakeImage()), patch.object(
+            finder.atspi, "find_element", return_value=None
+        ), patch.object(finder.atspi, "get_app_bounds", return_value=(100, -20, 300, 200)), patch.object(
+            finder.ocr, "TESSERACT_AVAILABLE", True
+        ), patch.object(
+            finder.ocr, "ocr_image", return_value=ocr.OCRResult(words=[match])
+        ) as ocr_image:
+            element = finder_obj.find(name="Save", app="gedit")
+
+        self.assertEqual(crops, [(100, 0, 400, 180)])
+        self.assertIs(ocr_image.call_args[0][0], cropped)
+        self.assertEqual((element.x, element.y), (105, 6))
+        self.assertEqual((match.x, match.y), (5, 6))
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_finder_find_all_texts_runs_one_capture_and_ocr_pass(self):
+        data = {
+            "text": ["Save", "Open", "Save"], "conf": ["90"] * 3,
+            "left": [10, 60, 110], "top": [5] * 3, "width": [30] * 3, "height": [8] * 3,
+        }
+        # Large enough that preprocessing doesn't upscale
+        frame = ocr.Image.new("RGB", (1200, 600), "white")
+
+        finder_obj = finder.ElementFinder(display=":10.0")
+        finder_obj.use_ocr = True
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        with patch.object(finder, "screenshot_to_pil", return_value=frame) as capture, patch.object(
+            ocr.pytesseract, "image_to_data", return_value=data
+        ) as image_to_data:
+            found = finder_obj.find_all_texts(["save", "open", "close"])
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+
+        self.assertEqual(capture.call_count, 1)
+        self.assertEqual(image_to_data.call_count, 1)
+        self.assertEqual([e.x for e in found["save"]], [10, 110])
+        self.assertEqual([e.name for e in found["open"]], ["Open"])
+        self.assertEqual(found["close"], [])
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_ocr_image_downscales_wide_screens(self):
+        data = {"text": ["Save"], "conf": ["90"], "left": [10], "top": [5], "width": [20], "height": [8]}
+        sizes = []
+
+        def fake_image_to_data(image, config, output_type):
+            sizes.append(image.size)
+            return data
+
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        with patch.object(ocr.pytesseract, "image_to_data", side_effect=fake_image_to_data):
+            result = ocr.ocr_image(ocr.Image.new("RGB", (3840, 2160), "white"), preprocess=False)
+
+        ocr._last_ocr = None
+        ocr._ocr_cache.clear()
+        self.assertEqual(sizes, [(1920, 1080)])
+        self.assertEqual((result.words[0].x, result.words[0].y, result.words[0].width), (20, 10, 40))
+
+    def test_type_text_passes_text_on_stdin(self):
+        with patch.object(
+            xdotool, "run_cmd", return_value=CommandResult(0, "", "")
+        ) as run_cmd:
+            xdotool.type_text("-- not an option", display=":10.0")
+
+        args, kwargs = run_cmd.call_args
+        self.assertEqual(args[0], ["xdotool", "type", "--delay", "12", "--file", "-"])
+        self.assertEqual(kwargs["input"], "-- not an option")
+
+    def test_type_text_fast_drops_keystroke_delay(self):
+        with patch.object(
+            xdotool, "run_cmd", return_value=CommandResult(0, "", "")
+        ) as run_cmd:
+            xdotool.type_text("hello", delay=40, display=":10.0", fast=True)
+
+        self.assertEqual(run_cmd.call_args.args[0], ["xdotool", "type", "--delay", "0", "--file", "-"])
+
+    def test_click_uses_libxdo_when_available(self):
+        calls = []
+
+        class FakeLib:
+            def xdo_move_mouse(self, xdo, x, y, screen):
+                calls.append(("move", x, y))
+                return 0
+
+            def xdo_click_window_multiple(self, xdo, window, button, repeat, delay):
+                calls.append(("click", button, repeat, delay))
+                return 0
+
+        with patch.object(libxdo, "_handle", return_value=1), patch.object(
+            libxdo, "_lib", FakeLib()
+        ), patch.object(xdotool, "run_cmd", side_effect=AssertionError("xdotool should not run")):
+            result = xdotool.click(5, 6, button="middle", double=True, display=":10.0")
+
+        self.assertEqual(calls, [("move", 5, 6), ("click", 2, 2, 100000)])
+        self.assertEqual(result["clicked"]["x"], 5)
+
+    def test_drag_uses_libxdo_and_releases_button_if_move_fails(self):
+        calls = []
+
+        class FakeLib:
+            fail_at = None
+
+            def xdo_move_mouse(self, xdo, x, y, screen):
+                calls.append(("move", x, y))
+                return 1 if (x, y) == self.fail_at else 0
+
+            def xdo_wait_for_mouse_move_to(self, xdo, x, y):
+                return 0
+
+            def xdo_mouse_down(self, xdo, window, button):
+                calls.append(("down", button))
+                return 0
+
+            def xdo_mouse_up(self, xdo, window, button):
+                calls.append(("up", button))
+                return 0
+
+        lib = FakeLib()
+        with patch.object(libxdo, "_handle", return_value=1), patch.object(
+            libxdo, "_lib", lib
+        ), patch.object(xdotool, "run_cmd", side_effect=AssertionError("xdotool should not run")):
+            result = xdotool.drag(1, 2, 30, 40, button="right", display=":10.0")
+            self.assertEqual(calls, [("move", 1, 2), ("down", 3), ("move", 30, 40), ("up", 3)])
+            self.assertEqual(result["dragged"]["end"], {"x": 30, "y": 40})
+
+            calls.clear()
+            lib.fail_at = (30, 40)
+            result = xdotool.drag(1, 2, 30, 40, display=":10.0")
+
+        self.assertEqual(calls, [("move", 1, 2), ("down", 1), ("move", 30, 40), ("up", 1)])
+        self.assertIn("error", result)
+
+    def test_libxdo_is_skipped_when_cli_is_forced(self):
+        with patch.dict(libxdo.os.environ, {libxdo.XDOTOOL_CLI_ENV: "1"}), \
+             patch.object(libxdo, "_load_attempted", False), \
+             patch.object(libxdo, "_lib", None), \
+             patch.object(libxdo.ctypes, "CDLL", side_effect=AssertionError("libxdo should not load")):
+            self.assertIsNone(libxdo._load())
+
+    def test_get_active_window_uses_libxdo_when_available(self):
+        title = ctypes.create_string_buffer("Café".encode())
+        freed = []
+
+        class FakeLib:
+            def xdo_get_active_window(self, xdo, wid):
+                wid._obj.value = 4194311
+                return 0
+
+            def xdo_get_window_name(self, xdo, wid, name, length, kind):
+                name._obj.value = ctypes.addressof(title)
+                length._obj.value = len("Café".encode())
+                return 0
+
+            def xdo_get_window_location(self, xdo, wid, x, y, screen):
+                x._obj.value, y._obj.value = 10, 20
+                return 0
+
+            def xdo_get_window_size(self, xdo, wid, width, height):
+                width._obj.value, height._obj.value = 800, 600
+                return 0
+
+        fake_x11 = SimpleNamespace(XFree=lambda ptr: freed.append(ptr.value), XScreenNumberOfScreen=None)
+        with patch.object(libxdo, "_handle", return_value=1), patch.object(
+            libxdo, "_lib", FakeLib()
+        ), patch.object(libxdo, "_x11", fake_x11), patch.object(
+            xdotool, "run_cmd", side_effect=AssertionError("xdotool should not run")
+        ):
+            result = xdotool.get_active_window(display=":10.0")
+
+        self.assertEqual(result["window_id"], "4194311")
+        self.assertEqual(result["name"], "Café")
+        self.assertEqual(
+            result["geometry"],
+            {"window": 4194311, "x": 10, "y": 20, "width": 800, "height": 600, "screen": 0},
+        )
+        self.assertEqual(freed, [ctypes.addressof(title)])
+
+    def test_type_text_sends_whole_text_in_one_libxdo_call(self):
+        calls = []
+
+        class FakeLib:
+            def xdo_enter_text_window(self, xdo, window, text, delay):
+                calls.append((text, delay))
+                return 0
+
+        with patch.object(libxdo, "_handle", return_value=1), patch.object(
+            libxdo, "_lib", FakeLib()
+        ), patch.object(xdotool, "run_cmd", side_effect=AssertionError("xdotool should not run")):
+            result = xdotool.type_text("-n first\nsecond", delay=5, display=":10.0")
+
+        self.assertEqual(calls, [(b"-n first\nsecond", 5000)])
+        self.assertEqual(result, {"typed": "-n first\nsecond"})
+
+    def test_capture_pil_prefers_shared_memory_capture(self):
+        frame = object()
+        with patch.object(screenshot.xshm, "capture", return_value=frame), patch.object(
+            screenshot, "run_cmd", side_effect=AssertionError("scrot should not run")
+        ):
+            self.assertIs(screenshot._capture_pil(":10.0"), frame)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_shm_captures_of_one_display_do_not_overlap(self):
+        active = []
+        overlapped = []
+
+        def fake_get_capture(display):
+            active.append(display)
+            overlapped.append(len(active) > 1)
+            time.sleep(0.05)
+            active.remove(display)
+            return None
+
+        with patch.object(screenshot.xshm, "_get_capture", side_effect=fake_get_capture):
+            threads = [
+                threading.Thread(target=screenshot.xshm.capture, args=(":10.0",))
+                for _ in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(overlapped, [False, False, False])
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_shm_setup_failure_closes_display_and_retries_later(self):
+        xshm = screenshot.xshm
+        clock = [1000.0]
+
+        def fake_attributes(dpy, root, attrs):
+            attrs._obj.width, attrs._obj.height = 1920, 1080
+            return 1
+
+        x11 = MagicMock()
+        x11.XOpenDisplay.return_value = 1234
+        x11.XGetWindowAttributes.side_effect = fake_attributes
+        xext = MagicMock()
+        xext.XShmQueryExtension.return_value = 1
+        with patch.object(xshm, "_load", return_value=xext), patch.object(xshm, "_x11", x11), patch.object(
+            xshm, "_xext", xext
+        ), patch.object(xshm, "_create_image", return_value=False), patch.object(
+            xshm.time, "monotonic", side_effect=lambda: clock[0]
+        ), patch.dict(xshm._captures, clear=True), patch.dict(xshm._unavailable, clear=True):
+            self.assertIsNone(xshm.capture(":10.0"))
+            x11.XCloseDisplay.assert_called_once_with(1234)
+            self.assertIsNone(xshm.capture(":10.0"))
+            self.assertEqual(x11.XOpenDisplay.call_count, 1)
+            clock[0] += xshm.SHM_RETRY_INTERVAL
+            self.assertIsNone(xshm.capture(":10.0"))
+            self.assertEqual(x11.XOpenDisplay.call_count, 2)
+
+        # The X error handler is only ours around SHM requests
+        x11.XSetErrorHandler.assert_not_called()
+        x11.XSetErrorHandler.return_value = 5678
+        with patch.object(xshm, "_x11", x11):
+            with xshm._trap_x_errors():
+                self.assertEqual(x11.XSetErrorHandler.call_count, 1)
+        x11.XSetErrorHandler.assert_called_with(5678)
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_capture_pil_decodes_streamed_png_without_base64(self):
+        from PIL import Image
+
+        data = io.BytesIO()
+        Image.new("RGB", (4, 3), "red").save(data, "PNG")
+
+        with patch.object(screenshot.xshm, "capture", return_value=None), patch.object(
+            screenshot, "_capture_mss", return_value=None
+        ), patch.object(screenshot, "_capture_png", return_value=data.getvalue()), patch.object(
+            screenshot.base64, "b64decode", side_effect=AssertionError("no base64 round-trip")
+        ):
+            img = screenshot._capture_pil(":10.0")
+
+        self.assertEqual(img.size, (4, 3))
+        self.assertEqual(img.getpixel((0, 0)), (255, 0, 0))
+
+
+    @unittest.skipUnless(ocr.TESSERACT_AVAILABLE, "pytesseract/Pillow not installed")
+    def test_capture_pil_temp_file_fallback_skips_base64_and_cleans_up(self):
+        from PIL import Image
+
+        written = []
+
+        def fake_scrot(cmd, display, **kwargs):
+            written.append(cmd[-1])
+            Image.new("RGB", (4, 3), "blue").save(cmd[-1], "PNG")
+            return CommandResult(0, "", "")
+
+        with patch.object(screenshot.xshm, "capture", return_value=None), patch.object(
+            screenshot, "_capture_mss", return_value=None
+        ), patch.object(screenshot, "_capture_png", return_value=None), patch.object(
+            screenshot, "run_cmd", side_effect=fake_scrot
+        ), patch.object(
+            screenshot.base64, "b64encode", side_effect=AssertionError("no base64 round-trip")
+        ):
+            img = screenshot._capture_pil(":10.0")
+
+        self.assertEqual(img.getpixel((0, 0)), (0, 0, 255))
+        self.assertFalse(pathlib.Path(written[0]).exists())
 
 if __name__ == "__main__":
     unittest.main()